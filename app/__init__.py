@@ -1,15 +1,28 @@
 # app/__init__.py
+import gc
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import SQLAlchemyError
+
+# --- Configuration ---
+# Set by gunicorn.conf.py when the app is built once in the master and forked into workers.
+PRELOAD = os.environ.get('APP_PRELOAD', '0') == '1'
+# Run db.create_all() at startup (set to 0 when migrations are applied by a release step).
+SCHEMA_CHECK = os.environ.get('SCHEMA_CHECK', '1') == '1'
 
 # Initialize the database object. We don't connect it to the app yet.
 db = SQLAlchemy()
 
-def create_app():
-    """Create and configure an instance of the Flask application."""
+def create_app(preload=PRELOAD):
+    """Create and configure an instance of the Flask application.
+
+    With `preload`, only read-only state is built here (schema check, opening
+    book, warm eval cache) so gunicorn can fork workers that share it
+    copy-on-write; each worker then calls start_worker() after the fork.
+    """
     app = Flask(__name__, instance_relative_config=True)
-    
+
     # --- Configuration ---
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_default_secret_key_for_development')
     # Read the database URL from the environment variable we set on Render
@@ -20,15 +33,100 @@ def create_app():
     # Connect the database object to our Flask app
     db.init_app(app)
 
+    # Files the app keeps default to the instance folder (see each module's init_app)
+    from . import book, eval_cache
+    from .log_writer import writer as log_writer
+    eval_cache.init_app(app)
+    book.init_app(app)
+    log_writer.init_app(app)
+
     with app.app_context():
         # Import the models so that SQLAlchemy knows about them
         from . import models
-        # Create the database tables if they don't already exist
-        db.create_all()
-        print("--- Database tables checked/created successfully. ---")
-        
+        # Create the database tables if they don't already exist (once, in the master, when preloading)
+        if SCHEMA_CHECK:
+            db.create_all()
+            # New columns on tables that already existed (create_all() leaves those alone)
+            from .migrations import upgrade_schema
+            try:
+                added = upgrade_schema()
+            except SQLAlchemyError as e:
+                # Typically another worker adding the same column at the same moment.
+                print(f"!!! Schema upgrade failed: {e} !!!")
+            else:
+                if added:
+                    print(f"--- Added columns: {', '.join(added)} ---")
+            print("--- Database tables checked/created successfully. ---")
+
         # Import and register the routes
         from . import routes
         app.register_blueprint(routes.bp)
 
-        return app
\ No newline at end of file
+        # Per-stage timings, /metrics and the opt-in slow-request profiler (see metrics.py)
+        from . import metrics
+        metrics.init_app(app)
+
+        # Command-line maintenance tasks (flask --app run <command>)
+        from . import cli
+        app.register_blueprint(cli.bp)
+
+        if preload:
+            preload_shared(app)
+        else:
+            start_worker(app)
+
+        return app
+
+
+# --- Pre-fork / post-fork startup (see gunicorn.conf.py) ---
+def preload_shared(app):
+    """Load the large read-only data in the master, then leave nothing a fork would break."""
+    from . import analysis  # imported lazily by ai.py otherwise
+    from .book import book
+    from .eval_cache import cache as eval_cache
+
+    with app.app_context():
+        # Pooled connections (and their sockets) must not be inherited by the workers.
+        db.engine.dispose()
+    book_loaded = book.load()
+    warmed = eval_cache.warm()
+    print(f"--- Preloaded: opening book {'mapped' if book_loaded else 'absent'}, "
+          f"{warmed} cached evaluation(s). ---")
+    # Keep the collector from touching (and so un-sharing) everything loaded so far.
+    gc.collect()
+    gc.freeze()
+
+
+def start_worker(app):
+    """Per-process threads; DB connections, HTTP sessions and engines open lazily on first use."""
+    # Drop games nobody has touched for a while (see game_store.py)
+    from .game_store import store as game_store
+    game_store.start_eviction_timer(app)
+
+    # Finished games are inserted in batches off the request path (see log_writer.py)
+    from .log_writer import writer as log_writer
+    log_writer.start(app)
+
+    # Replace Stockfish processes that stop answering (see uci_pool.py)
+    from .uci_pool import pool as engine_pool
+    if engine_pool.available:
+        engine_pool.start_health_checks()
+
+    # Publish this worker's metrics for whichever worker answers /metrics (see metrics.py)
+    from . import metrics
+    if metrics.MULTIPROC_DIR:
+        metrics.registry.start_flusher()
+
+
+def stop_worker():
+    """Flush queued games and release this process's engines and sockets."""
+    from .cloud_client import client as cloud_client
+    from .log_writer import writer as log_writer
+    from .uci_pool import pool as engine_pool
+    from . import metrics
+
+    log_writer.close()
+    engine_pool.close()
+    cloud_client.close()
+    if metrics.MULTIPROC_DIR:
+        metrics.registry.write()  # final totals, so the counters survive this worker
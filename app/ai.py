@@ -1,63 +1,190 @@
 # app/ai.py (Hybrid AI Brain)
 import chess
-import requests
-import random
-import json
+import chess.engine
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from . import engine, evaluation, eval_cache, cloud_client, uci_pool, ponder, book, metrics
+
+# Per-move budget for the local search engine, in milliseconds.
+SEARCH_TIME_MS = int(os.environ.get('AI_SEARCH_TIME_MS', 300))
+# Hedged mode: race the cloud against local search and answer within this many
+# milliseconds. Set to 0 to wait for the cloud first (the old sequential path).
+HEDGE_DEADLINE_MS = int(os.environ.get('AI_HEDGE_DEADLINE_MS', 300))
+# Cloud lookups run here so a slow API never holds the request thread.
+_cloud_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('AI_CLOUD_WORKERS', 8)),
+                                 thread_name_prefix='cloud-eval')
 
 # --- NO MORE ENGINE INITIALIZATION! ---
 
 # --- Secondary Brain - Pure Python Evaluation ---
 def evaluate_board(board):
-    piece_values = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
-    score = 0
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            value = piece_values[piece.piece_type]
-            score += value if piece.color == chess.WHITE else -value
-    return score
-
-def get_simple_best_move(board):
-    legal_moves = list(board.legal_moves)
-    if not legal_moves: return None
-    best_move = None
-    best_score = -float('inf') if board.turn == chess.WHITE else float('inf')
-    for move in legal_moves:
-        board.push(move)
-        score = evaluate_board(board)
-        board.pop()
-        if board.turn == chess.WHITE:
-            if score > best_score:
-                best_score = score
-                best_move = move
-        else:
-            if score < best_score:
-                best_score = score
-                best_move = move
-    return best_move.uci() if best_move else random.choice(legal_moves).uci()
-
-# --- Primary Brain - Lichess API with Smart Fallback ---
-def get_ai_move(board):
-    api_url = "https://lichess.org/api/cloud-eval"
-    params = {"fen": board.fen()}
+    """White-POV score in centipawns (bitboard material + piece-square tables)."""
+    return evaluation.evaluate(board)
+
+def get_simple_best_move(board, time_limit_ms=None, stop=None, max_depth=None, game_history=None):
+    """Local fallback: alpha-beta search (see app/engine.py) under a time budget."""
+    if time_limit_ms is None:
+        time_limit_ms = SEARCH_TIME_MS
+    # The search plays its first legal move if even depth 1 runs out of time; no move means none is legal.
+    result = engine.search(board, time_limit_ms=time_limit_ms, stop=stop, max_depth=max_depth or engine.MAX_PLY,
+                           game_history=game_history)
+    if result.move is None: return None
+    metrics.record_search(result)
+    return result.move.uci()
+
+# --- Local Brain - warm Stockfish from the UCI pool, else the pure-Python engine ---
+def get_local_move(board, time_limit_ms=None, stop=None, skill_level=None, game_history=None):
+    if time_limit_ms is None:
+        time_limit_ms = SEARCH_TIME_MS
+    if uci_pool.pool.available:
+        try:
+            # Leave some of the budget for the IPC round-trip.
+            move = uci_pool.pool.best_move(board, time_ms=max(10, int(time_limit_ms * 0.8)),
+                                           skill_level=skill_level)
+            if move:
+                print(f"UCI engine returned move: {move}")
+                return move
+        except (uci_pool.EngineUnavailable, chess.engine.EngineError,
+                chess.engine.EngineTerminatedError, OSError) as e:
+            metrics.fallbacks.inc('uci_error')
+            print(f"!!! UCI engine failed: {e}. Using pure Python engine. !!!")
+    return get_simple_best_move(board, time_limit_ms=time_limit_ms, stop=stop, game_history=game_history)
+
+# Precomputes replies to the player's likely moves between requests (see ponder.py)
+ponderer = ponder.Ponderer(search=get_local_move)
+
+# --- Primary Brain - Lichess API (behind a tiered cache) ---
+def get_cloud_move(board, skip_cache=False):
+    """Best move from the eval cache or the cloud-eval API, or None if neither has one.
+
+    Pass skip_cache=True when the caller has just missed the cache itself.
+    """
+    cached = None if skip_cache else eval_cache.cache.get(board)
+    if cached is not None:
+        if cached.negative:
+            print("Eval cache: cloud has no eval for this position.")
+            return None
+        if chess.Move.from_uci(cached.best_move) in board.legal_moves:
+            print(f"Eval cache returned best move: {cached.best_move}")
+            return cached.best_move
+
     try:
-        res = requests.get(api_url, params=params, timeout=5)
-        res.raise_for_status()
-        data = res.json()
-        if data and 'pvs' in data and len(data['pvs']) > 0:
-            best_move_uci = data['pvs'][0]['moves'].split(' ')[0]
-            if chess.Move.from_uci(best_move_uci) in board.legal_moves:
-                print(f"Lichess API returned best move: {best_move_uci}")
-                return best_move_uci
-    except requests.exceptions.RequestException as e:
-        print(f"!!! API REQUEST FAILED: {e}. Using fallback AI. !!!")
-
-    print("!!! API failed or returned invalid move. Using pure Python fallback AI. !!!")
-    return get_simple_best_move(board)
-
-# We still need the analysis logic for post-game
+        with metrics.span('cloud'):
+            data = cloud_client.client.get_eval(board.fen())
+        entry = eval_cache.CachedEval.from_cloud_eval(data)
+        if entry is None:
+            # 404 or no PV: the cloud doesn't know this position; remember that.
+            metrics.cloud_requests.inc('unknown')
+            eval_cache.cache.put_negative(board)
+        elif chess.Move.from_uci(entry.best_move) in board.legal_moves:
+            metrics.cloud_requests.inc('success')
+            eval_cache.cache.put(board, entry)
+            print(f"Lichess API returned best move: {entry.best_move}")
+            return entry.best_move
+        else:
+            metrics.cloud_requests.inc('illegal')
+    except (cloud_client.CloudEvalError, ValueError) as e:
+        metrics.cloud_requests.inc('error')
+        print(f"!!! API REQUEST FAILED: {e}. !!!")
+    return None
+
+# --- Hedged selection: cloud and local search race against one deadline ---
+def get_hedged_move(board, deadline_ms=HEDGE_DEADLINE_MS, game_history=None):
+    """Start the cloud lookup in the background and search locally meanwhile.
+
+    The cloud move wins if it arrives before the deadline; otherwise the
+    best local move is played. A late cloud answer still lands in the eval
+    cache for next time.
+    """
+    start = time.perf_counter()
+    cached = eval_cache.cache.get(board)
+    if cached is not None and not cached.negative and chess.Move.from_uci(cached.best_move) in board.legal_moves:
+        metrics.ai_moves.inc('cache')
+        print(f"Eval cache returned best move: {cached.best_move}")
+        return cached.best_move
+
+    stop = threading.Event()
+    cloud_future = None
+    if cached is None:
+        # The lookup only needs the position, not the game's move stack; the cache just missed.
+        cloud_future = _cloud_pool.submit(get_cloud_move, board.copy(stack=False), skip_cache=True)
+
+        def _on_cloud_done(future):
+            # Stop searching as soon as the cloud has a usable answer.
+            if future.exception() is None and future.result():
+                stop.set()
+        cloud_future.add_done_callback(_on_cloud_done)
+
+    budget_ms = max(1.0, deadline_ms - (time.perf_counter() - start) * 1000.0)
+    with metrics.span('local_search'):
+        local_move = get_local_move(board, time_limit_ms=budget_ms, stop=stop, game_history=game_history)
+
+    if cloud_future is not None:
+        remaining = deadline_ms / 1000.0 - (time.perf_counter() - start)
+        try:
+            cloud_move = cloud_future.result(timeout=max(0.0, remaining))
+            if not cloud_move:
+                metrics.fallbacks.inc('cloud_miss')
+        except FutureTimeout:
+            cloud_move = None
+            metrics.fallbacks.inc('cloud_deadline')
+            print("Cloud eval missed the deadline. Using local search move.")
+        except Exception as e:
+            cloud_move = None
+            metrics.fallbacks.inc('cloud_error')
+            print(f"!!! Cloud lookup raised {e!r}. Using local search move. !!!")
+        if cloud_move:
+            metrics.ai_moves.inc('cloud')
+            return cloud_move
+    metrics.ai_moves.inc('local')
+    return local_move
+
+def get_book_move(board):
+    """The opening book's move as UCI, or None: a memory-mapped binary search, no network, no search."""
+    with metrics.span('book'):
+        book_move = book.book.choose(board)
+    if book_move:
+        metrics.ai_moves.inc('book')
+        print(f"Opening book returned move: {book_move}")
+    return book_move
+
+def get_ai_move(board, deadline_ms=None, game_history=None, use_book=True):
+    """Best move as UCI. `game_history` (see game_state.py) spares the local search rebuilding it.
+
+    Pass use_book=False when the caller already asked get_book_move().
+    """
+    # Opening book first.
+    book_move = get_book_move(board) if use_book else None
+    if book_move:
+        return book_move
+    if deadline_ms is None:
+        deadline_ms = HEDGE_DEADLINE_MS
+    if deadline_ms > 0:
+        return get_hedged_move(board, deadline_ms, game_history)
+
+    move = get_cloud_move(board)
+    if move:
+        metrics.ai_moves.inc('cloud')
+        return move
+    metrics.fallbacks.inc('cloud_miss')
+    metrics.ai_moves.inc('local')
+    print("!!! API failed or returned invalid move. Using local fallback AI. !!!")
+    with metrics.span('local_search'):
+        return get_local_move(board, game_history=game_history)
+
+# --- Player style (see analysis.py for the incremental, persistent version) ---
 def analyze_player_style(all_games_for_user):
-    # This is a placeholder for now, as we need a reliable engine first.
-    # The real analysis would happen offline.
-    print(f"Analyzing {len(all_games_for_user)} games to build profile (placeholder)...")
-    return {"aggression": 0.5, "precision": 0.5, "piece_preference": {}}
\ No newline at end of file
+    """Style profile from a list of GameLog rows (or moves_json style lists)."""
+    from . import analysis
+    total = analysis.empty_summary()
+    for game in all_games_for_user:
+        moves = game.history() if hasattr(game, 'history') else game
+        analysis.merge_summary(total, analysis.analyze_game(moves, use_engine=False,
+                                                            starting_fen=getattr(game, 'starting_fen', None)))
+    return {
+        "aggression": total["aggressive"] / total["moves"] if total["moves"] else 0,
+        "avg_rank_percent": total["rank_percent_sum"] / total["ranked"] if total["ranked"] else 0,
+        "piece_preference": total["pieces"],
+    }
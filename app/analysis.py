@@ -0,0 +1,335 @@
+# app/analysis.py (Incremental Player-Style Analysis)
+import collections
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import chess
+import chess.polyglot
+from . import db, evaluation, uci_pool, eval_cache
+from .models import GameLog, UserProfile, decode_history, without_tournament_games
+
+# --- Configuration ---
+ANALYSIS_TOP_N = int(os.environ.get('ANALYSIS_TOP_N', 15))  # same cap as chess_game.py
+ANALYSIS_DEPTH = int(os.environ.get('ANALYSIS_DEPTH', 8))
+ANALYSIS_CHUNK_SIZE = int(os.environ.get('ANALYSIS_CHUNK_SIZE', 200))
+ANALYSIS_CACHE_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_ENTRIES', 50000))
+# Most positions one POST /analyze may ask for.
+ANALYZE_MAX_POSITIONS = int(os.environ.get('ANALYZE_MAX_POSITIONS', 300))
+
+# Rankings by (zobrist hash, top_n, engine used), shared by every caller in the worker.
+_rankings = eval_cache.LRUCache(ANALYSIS_CACHE_ENTRIES)
+# Fans engine analyses out across the UCI pool, one thread per engine.
+_engine_fanout = ThreadPoolExecutor(max_workers=uci_pool.pool.size, thread_name_prefix='analysis')
+
+
+def _init_backfill_worker(engines):
+    # Each backfill process gets its share of the engines, not a full pool of its own
+    # (workers x pool size Stockfish processes otherwise).
+    global _engine_fanout
+    uci_pool.pool.size = engines
+    _engine_fanout = ThreadPoolExecutor(max_workers=engines, thread_name_prefix='analysis')
+
+
+# --- Per-move features (the fields chess_game.py logs for every player move) ---
+def _rank_position(board, top_n, use_engine):
+    """Legal moves best-first as a tuple of {"move", "san", "cp", "mate", "engine"}, side-to-move POV.
+
+    Engine MultiPV lines first when an engine is available, then the rest in
+    1-ply static order.
+    """
+    legal = list(board.legal_moves)
+    ranked = []
+    if use_engine and legal:
+        try:
+            infos = uci_pool.pool.analyse(board, multipv=min(len(legal), top_n), depth=ANALYSIS_DEPTH)
+            for info in infos:
+                if info.get('pv'):
+                    score = info['score'].pov(board.turn)
+                    move = info['pv'][0]
+                    ranked.append({"move": move.uci(), "san": board.san(move), "cp": score.score(),
+                                   "mate": score.mate(), "engine": True})
+        except Exception as e:
+            print(f"!!! Engine ranking failed ({e}); using static ranking. !!!")
+            ranked = []
+    sign = 1 if board.turn == chess.WHITE else -1
+    seen = {entry["move"] for entry in ranked}
+    for move, score in sorted(evaluation.score_children(board, legal), key=lambda item: sign * item[1], reverse=True):
+        if move.uci() not in seen:
+            ranked.append({"move": move.uci(), "san": board.san(move), "cp": sign * score, "mate": None,
+                           "engine": False})
+    return tuple(ranked)
+
+
+def _remember(key, ranked):
+    # An engine ranking that fell back to static order is not cached under the engine key.
+    if not key[2] or not ranked or ranked[0]["engine"]:
+        _rankings.put(key, ranked, eval_cache.POSITIVE_TTL_SECONDS)
+
+
+def _cached_ranking(board, top_n, use_engine):
+    use_engine = use_engine and uci_pool.pool.available
+    key = (chess.polyglot.zobrist_hash(board), top_n, use_engine)
+    ranked = _rankings.get(key)
+    if ranked is None:
+        ranked = _rank_position(board, top_n, use_engine)
+        _remember(key, ranked)
+    return ranked
+
+
+def ranked_moves(board, top_n=ANALYSIS_TOP_N, use_engine=True):
+    """Legal moves best-first: engine MultiPV if available, then 1-ply static order."""
+    return [chess.Move.from_uci(entry["move"]) for entry in _cached_ranking(board, top_n, use_engine)]
+
+
+# --- Batch analysis: many positions at once, deduplicated and cached ---
+def _position_result(board, ranked):
+    moves = [dict(entry) for entry in ranked]  # cached entries are shared; hand out copies
+    best = moves[0] if moves else None
+    return {"fen": board.fen(), "total_options": len(moves), "ranked": moves,
+            "eval": {"cp": best["cp"], "mate": best["mate"]} if best else None}
+
+
+def analyze_positions(boards, top_n=ANALYSIS_TOP_N, use_engine=True):
+    """Rank every position in `boards`; results come back in input order.
+
+    Repeated positions (same Zobrist hash) are analysed once, cached
+    rankings are reused, and the rest are spread over the engine pool.
+    """
+    use_engine = use_engine and uci_pool.pool.available
+    keys = [(chess.polyglot.zobrist_hash(board), top_n, use_engine) for board in boards]
+    rankings = {}
+    missing = {}
+    for key, board in zip(keys, boards):
+        if key in rankings or key in missing:
+            continue
+        ranked = _rankings.get(key)
+        if ranked is None:
+            missing[key] = board
+        else:
+            rankings[key] = ranked
+    if missing:
+        if use_engine and len(missing) > 1:
+            computed = _engine_fanout.map(lambda board: _rank_position(board, top_n, True), missing.values())
+        else:
+            computed = (_rank_position(board, top_n, use_engine) for board in missing.values())
+        for key, ranked in zip(missing, computed):
+            _remember(key, ranked)
+            rankings[key] = ranked
+    return [_position_result(board, rankings[key]) for key, board in zip(keys, boards)]
+
+
+def analyze_game_positions(moves, starting_fen=None, top_n=ANALYSIS_TOP_N, use_engine=True):
+    """Every ply of a game with the played move's rank among the legal moves."""
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    boards = []
+    for move in moves:
+        if move not in board.legal_moves:
+            break
+        boards.append(board.copy(stack=False))
+        board.push(move)
+    results = analyze_positions(boards, top_n=top_n, use_engine=use_engine)
+    for ply, (move, result) in enumerate(zip(moves, results)):
+        ranking = [entry["move"] for entry in result["ranked"]]
+        result.update({"ply": ply, "move": move.uci(), "move_rank": ranking.index(move.uci()) + 1})
+    return results
+
+
+def move_features(board, move, ranking, ranked_by='static'):
+    return {
+        "turn": board.fullmove_number,
+        "move_san": board.san(move),
+        "move_rank": ranking.index(move) + 1,
+        "total_options": len(ranking),
+        "ranked_by": ranked_by,
+        "piece": board.piece_at(move.from_square).symbol(),
+        "is_capture": board.is_capture(move),
+        "is_check": board.gives_check(move),
+    }
+
+
+def empty_summary():
+    return {"games": 0, "moves": 0, "aggressive": 0, "ranked": 0, "rank_percent_sum": 0.0,
+            "engine_ranked": 0, "engine_rank_percent_sum": 0.0, "pieces": {}}
+
+
+def summarize_features(features):
+    """Fold a list of per-move feature dicts into one game summary.
+
+    Static and Stockfish ranks are not comparable, so they are summed apart:
+    "ranked"/"rank_percent_sum" for the static ranking, "engine_*" for the
+    engine's. Features without "ranked_by" (akhil_match_*.json files, written
+    by chess_game.py with Stockfish) count as engine-ranked.
+    """
+    summary = empty_summary()
+    summary["games"] = 1
+    pieces = collections.Counter()
+    for move in features:
+        summary["moves"] += 1
+        if move.get("is_capture") or move.get("is_check"):
+            summary["aggressive"] += 1
+        if move.get("move_rank") and move.get("total_options"):
+            prefix = "engine_" if move.get("ranked_by", "engine") == "engine" else ""
+            summary[prefix + "ranked"] += 1
+            summary[prefix + "rank_percent_sum"] += move["move_rank"] / move["total_options"]
+        if move.get("piece"):
+            pieces[move["piece"].upper()] += 1
+    summary["pieces"] = dict(pieces)
+    return summary
+
+
+def analyze_game(moves, player_color=chess.WHITE, use_engine=True, starting_fen=None):
+    """Summary of one logged game: the player's moves only.
+
+    `moves` is the moves_json style list (GameLog.history()), played from
+    `starting_fen`. Entries that already carry features (the
+    akhil_match_*.json format) are used as-is; web logs only have SAN, so
+    those are replayed and ranked.
+    """
+    if moves and all("move_rank" in move for move in moves):
+        return summarize_features(moves)
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    played = []
+    for entry in moves:
+        try:
+            move = board.parse_san(entry["move_san"])
+        except (KeyError, ValueError):
+            break
+        if board.turn == player_color:
+            played.append((board.copy(stack=False), move))
+        board.push(move)
+    # Rank all of the player's positions in one batch rather than one engine call per ply.
+    results = analyze_positions([position for position, _ in played], use_engine=use_engine)
+    features = [move_features(position, move, [chess.Move.from_uci(entry["move"]) for entry in result["ranked"]],
+                              'engine' if result["ranked"] and result["ranked"][0]["engine"] else 'static')
+                for (position, move), result in zip(played, results)]
+    return summarize_features(features)
+
+
+def _analyze_chunk(args):
+    # Process-pool entry point: [(game_id, moves, starting_fen), ...] -> [(game_id, summary), ...]
+    games, use_engine = args
+    return [(game_id, analyze_game(moves, use_engine=use_engine, starting_fen=starting_fen))
+            for game_id, moves, starting_fen in games]
+
+
+# --- Folding summaries into the persistent profile ---
+def merge_summary(total, summary):
+    for key in ("games", "moves", "aggressive", "ranked", "rank_percent_sum", "engine_ranked",
+                "engine_rank_percent_sum"):
+        total[key] += summary[key]
+    pieces = collections.Counter(total["pieces"])
+    pieces.update(summary["pieces"])
+    total["pieces"] = dict(pieces)
+    return total
+
+
+def get_or_create_profile(user_id):
+    profile = db.session.get(UserProfile, user_id)
+    if profile is None:
+        profile = UserProfile(user_id=user_id, games_analyzed=0, moves_analyzed=0, aggressive_moves=0,
+                              ranked_moves=0, rank_percent_sum=0.0, engine_ranked_moves=0,
+                              engine_rank_percent_sum=0.0, piece_counts_json='{}',
+                              last_game_id=0, imported_sources_json='[]')
+        db.session.add(profile)
+    return profile
+
+
+def apply_summary(profile, summary, last_game_id=None):
+    profile.games_analyzed += summary["games"]
+    profile.moves_analyzed += summary["moves"]
+    profile.aggressive_moves += summary["aggressive"]
+    profile.ranked_moves += summary["ranked"]
+    profile.rank_percent_sum += summary["rank_percent_sum"]
+    profile.engine_ranked_moves = (profile.engine_ranked_moves or 0) + summary["engine_ranked"]
+    profile.engine_rank_percent_sum = (profile.engine_rank_percent_sum or 0.0) + summary["engine_rank_percent_sum"]
+    pieces = collections.Counter(json.loads(profile.piece_counts_json or '{}'))
+    pieces.update(summary["pieces"])
+    profile.piece_counts_json = json.dumps(dict(pieces))
+    if last_game_id is not None:
+        profile.last_game_id = max(profile.last_game_id, last_game_id)
+
+
+def update_profile(user_id, use_engine=False):
+    """Incremental path: fold the user's games newer than the profile's high-water mark.
+
+    Right after a game is saved that is just that game, so the cost is
+    O(moves in the game) rather than a re-analysis of the whole history.
+    """
+    profile = get_or_create_profile(user_id)
+    new_games = (GameLog.query.filter(GameLog.user_id == user_id, GameLog.id > (profile.last_game_id or 0))
+                 .order_by(GameLog.id).all())
+    for game_log in new_games:
+        apply_summary(profile, analyze_game(game_log.history(), use_engine=use_engine,
+                                            starting_fen=game_log.starting_fen), game_log.id)
+    db.session.commit()
+    return profile
+
+
+# --- Offline backfill over the whole GameLog table ---
+def _stream_game_chunks(user_id=None, chunk_size=ANALYSIS_CHUNK_SIZE):
+    """Yield lists of (game_id, user_id, moves, starting_fen) in id order, reading rows in chunks."""
+    query = db.session.query(GameLog.id, GameLog.user_id, GameLog.moves_json, GameLog.moves_blob,
+                             GameLog.annotations_blob, GameLog.starting_fen).order_by(GameLog.id)
+    if user_id is not None:
+        query = query.filter(GameLog.user_id == user_id)
+    query = without_tournament_games(query)
+    chunk = []
+    for game_id, owner_id, moves_json, moves_blob, annotations_blob, starting_fen in query.yield_per(chunk_size):
+        chunk.append((game_id, owner_id, decode_history(moves_json, moves_blob, annotations_blob, starting_fen),
+                      starting_fen))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def backfill_profiles(user_id=None, workers=None, chunk_size=ANALYSIS_CHUNK_SIZE, use_engine=True):
+    """Analyse every game not yet folded into its owner's profile. Returns games analysed."""
+    high_water = {profile.user_id: profile.last_game_id for profile in UserProfile.query.all()}
+    analysed = 0
+    workers = workers or os.cpu_count() or 1
+    engines = max(1, uci_pool.pool.size // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_backfill_worker, initargs=(engines,)) as pool:
+        for chunk in _stream_game_chunks(user_id, chunk_size):
+            todo = [game for game in chunk if game[0] > high_water.get(game[1], 0)]
+            if not todo:
+                continue
+            owners = {game_id: owner_id for game_id, owner_id, _, _ in todo}
+            # Fan the chunk out in slices, one per worker process.
+            slice_size = max(1, len(todo) // workers)
+            slices = [([(game_id, moves, starting_fen) for game_id, _, moves, starting_fen in todo[i:i + slice_size]],
+                       use_engine)
+                      for i in range(0, len(todo), slice_size)]
+            per_user = {}
+            for results in pool.map(_analyze_chunk, slices):
+                for game_id, summary in results:
+                    owner_id = owners[game_id]
+                    total, last_id = per_user.get(owner_id, (empty_summary(), 0))
+                    per_user[owner_id] = (merge_summary(total, summary), max(last_id, game_id))
+            for owner_id, (total, last_id) in per_user.items():
+                apply_summary(get_or_create_profile(owner_id), total, last_id)
+                high_water[owner_id] = last_id
+            # Flush, not commit: committing would close the yield_per cursor.
+            # High-water marks make an interrupted backfill safe to re-run.
+            db.session.flush()
+            analysed += len(todo)
+            print(f"Analysed {analysed} games...")
+    db.session.commit()
+    return analysed
+
+
+def import_match_file(path, user_id):
+    """Fold an akhil_match_*.json style file (per-move features) into a profile, once."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    profile = get_or_create_profile(user_id)
+    sources = json.loads(profile.imported_sources_json or '[]')
+    if digest in sources:
+        return False
+    apply_summary(profile, summarize_features(json.loads(raw)))
+    profile.imported_sources_json = json.dumps(sources + [digest])
+    db.session.commit()
+    return True
@@ -0,0 +1,167 @@
+# app/book.py (Opening Book Built from Our Own Games)
+import collections
+import json
+import os
+import struct
+import threading
+import chess
+import chess.pgn
+import chess.polyglot
+
+# --- Configuration ---
+# Unset: opening_book.bin in the app's instance folder, resolved by init_app().
+OPENING_BOOK_PATH = os.environ.get('OPENING_BOOK_PATH')
+# 'weighted' picks at random in proportion to weight; 'best' always plays the heaviest move.
+BOOK_SELECTION = os.environ.get('BOOK_SELECTION', 'weighted')
+BOOK_MAX_PLY = int(os.environ.get('BOOK_MAX_PLY', 20))
+
+# Polyglot entry: key (u64), move (u16), weight (u16), learn (u32), big-endian.
+_ENTRY = struct.Struct('>QHHI')
+
+
+# --- Building ---
+def _polyglot_move(board, move):
+    """Encode a move the way Polyglot expects (castling as king-takes-rook)."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        to_square = chess.square(7 if board.is_kingside_castling(move) else 0, rank)
+    promotion = move.promotion - 1 if move.promotion else 0
+    return (chess.square_file(to_square) | chess.square_rank(to_square) << 3
+            | chess.square_file(move.from_square) << 6 | chess.square_rank(move.from_square) << 9
+            | promotion << 12)
+
+
+def _result_weight(result, color):
+    # Wins count double, draws and unfinished games once, losses not at all.
+    if result == '1/2-1/2' or result not in ('1-0', '0-1'):
+        return 1
+    return 2 if (result == '1-0') == (color == chess.WHITE) else 0
+
+
+class BookBuilder:
+    """Accumulates (position, move) weights, then writes a sorted Polyglot file."""
+
+    def __init__(self, max_ply=BOOK_MAX_PLY):
+        self.max_ply = max_ply
+        self.weights = collections.Counter()
+        self.positions_by_ply = collections.defaultdict(set)  # distinct keys seen at each ply
+        self.games = 0
+
+    def add_game(self, moves, result='*', starting_fen=None):
+        board = chess.Board(starting_fen or chess.STARTING_FEN)
+        for ply, move in enumerate(moves):
+            if ply >= self.max_ply or move not in board.legal_moves:
+                break
+            key = chess.polyglot.zobrist_hash(board)
+            weight = _result_weight(result, board.turn)
+            if weight:
+                self.weights[(key, _polyglot_move(board, move))] += weight
+            self.positions_by_ply[ply].add(key)
+            board.push(move)
+        self.games += 1
+
+    def add_pgn(self, path):
+        with open(path, encoding='utf-8', errors='replace') as handle:
+            while True:
+                game = chess.pgn.read_game(handle)
+                if game is None:
+                    break
+                fen = game.headers.get('FEN')
+                self.add_game(list(game.mainline_moves()), game.headers.get('Result', '*'), fen)
+
+    def add_games(self, games):
+        """Add (moves, result, starting_fen) tuples, e.g. streamed from GameLog."""
+        for moves, result, starting_fen in games:
+            self.add_game(moves, result, starting_fen)
+
+    def write(self, path):
+        """Write the book (sorted by key, weights scaled into 16 bits) plus a stats sidecar."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        scale = max(1.0, max(self.weights.values(), default=1) / 0xFFFF)
+        entries = sorted((key, move, max(1, int(weight / scale)))
+                         for (key, move), weight in self.weights.items())
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as handle:
+            for key, move, weight in entries:
+                handle.write(_ENTRY.pack(key, move, weight, 0))
+        os.replace(tmp_path, path)  # workers never see a half-written book
+        stats = {'games': self.games, 'entries': len(entries), 'max_ply': self.max_ply,
+                 'positions_by_ply': {str(ply): len(keys) for ply, keys in sorted(self.positions_by_ply.items())}}
+        with open(path + '.stats.json', 'w') as handle:
+            json.dump(stats, handle)
+        return stats
+
+
+# --- Lookup: memory-mapped, binary search, no per-worker heap ---
+class OpeningBook:
+    def __init__(self, path=OPENING_BOOK_PATH, selection=BOOK_SELECTION):
+        self.path = path
+        self.selection = selection
+        self._reader = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.lookups_by_ply = collections.Counter()
+        self.hits_by_ply = collections.Counter()
+
+    def _get_reader(self):
+        # (Re)open when the file appears or is replaced by a rebuild.
+        if self.path is None:
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            if self._reader is None or mtime != self._mtime:
+                if self._reader is not None:
+                    self._reader.close()
+                self._reader = chess.polyglot.open_reader(self.path)
+                self._mtime = mtime
+            return self._reader
+
+    def load(self):
+        """Map the book now (e.g. before forking workers) instead of on first lookup."""
+        return self._get_reader() is not None
+
+    def choose(self, board, rng=None):
+        """A book move for `board` as UCI, or None when out of book."""
+        reader = self._get_reader()
+        if reader is None:
+            return None
+        ply = len(board.move_stack)
+        self.lookups_by_ply[ply] += 1
+        try:
+            if self.selection == 'best':
+                entry = max(reader.find_all(board), key=lambda e: e.weight, default=None)
+            else:
+                entry = reader.weighted_choice(board, random=rng)
+        except IndexError:
+            entry = None
+        if entry is None:
+            return None
+        self.hits_by_ply[ply] += 1
+        return entry.move.uci()
+
+    def stats(self):
+        built = {}
+        try:
+            with open(f"{self.path}.stats.json") as handle:
+                built = json.load(handle)
+        except (OSError, ValueError):
+            pass
+        coverage = {str(ply): {'lookups': n, 'hits': self.hits_by_ply[ply],
+                               'hit_rate': self.hits_by_ply[ply] / n}
+                    for ply, n in sorted(self.lookups_by_ply.items())}
+        return {'path': self.path, 'loaded': self._reader is not None, 'selection': self.selection,
+                'built': built, 'coverage_by_ply': coverage}
+
+
+book = OpeningBook()
+
+
+def init_app(app):
+    """Point the book at the app's instance folder unless OPENING_BOOK_PATH is set."""
+    book.path = OPENING_BOOK_PATH or os.path.join(app.instance_path, 'opening_book.bin')
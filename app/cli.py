@@ -0,0 +1,174 @@
+# app/cli.py (Maintenance Commands: flask --app run <command>)
+import click
+import chess
+from flask import Blueprint
+from . import db
+from .models import User, GameLog, decode_move_list, tournament_user, without_tournament_games
+
+bp = Blueprint('cli', __name__, cli_group=None)
+
+
+@bp.cli.command('backfill-profiles')
+@click.option('--user-id', type=int, default=None, help='Only analyse this user.')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--chunk-size', type=int, default=200, help='GameLog rows read per chunk.')
+@click.option('--static', 'static_only', is_flag=True, help='Rank moves statically, without Stockfish.')
+def backfill_profiles_command(user_id, workers, chunk_size, static_only):
+    """Fold every not-yet-analysed GameLog into the players' profiles."""
+    from .analysis import backfill_profiles
+    count = backfill_profiles(user_id=user_id, workers=workers, chunk_size=chunk_size,
+                              use_engine=not static_only)
+    click.echo(f"Backfill finished: {count} game(s) analysed.")
+
+
+@bp.cli.command('import-matches')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--username', required=True, help='Player the match files belong to.')
+def import_matches_command(paths, username):
+    """Import akhil_match_*.json style files into a player's profile."""
+    from .analysis import import_match_file
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named '{username}'.")
+    for path in paths:
+        imported = import_match_file(path, user.id)
+        click.echo(f"{path}: {'imported' if imported else 'already imported, skipped'}")
+
+
+@bp.cli.command('migrate-gamelog')
+@click.option('--batch-size', type=int, default=500, help='Rows converted per transaction.')
+def migrate_gamelog_command(batch_size):
+    """Add the packed GameLog columns and indexes and convert JSON rows."""
+    from .migrations import migrate_game_log
+    report = migrate_game_log(batch_size=batch_size)
+    click.echo(f"Columns added: {', '.join(report['columns_added']) or 'none'}; "
+               f"rows converted: {report['converted']}; rows left as JSON: {report['skipped']}")
+
+
+@bp.cli.command('build-book')
+@click.option('--output', default=None, help='Book file (default: the one the app reads).')
+@click.option('--max-ply', type=int, default=None, help='Only book the first N plies.')
+@click.option('--pgn', 'pgn_paths', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='Extra PGN files to import (repeatable).')
+@click.option('--no-database', is_flag=True, help='Only use the PGN files.')
+def build_book_command(output, max_ply, pgn_paths, no_database):
+    """Build a Polyglot opening book from GameLog (and optional PGNs); tournament games are left out."""
+    from .book import BookBuilder, BOOK_MAX_PLY, book
+    builder = BookBuilder(max_ply=max_ply or BOOK_MAX_PLY)
+    if not no_database:
+        rows = without_tournament_games(db.session.query(GameLog.moves_json, GameLog.moves_blob,
+                                                         GameLog.starting_fen, GameLog.result)).yield_per(500)
+        builder.add_games((decode_move_list(moves_json, moves_blob, starting_fen), result, starting_fen)
+                          for moves_json, moves_blob, starting_fen, result in rows)
+    for path in pgn_paths:
+        builder.add_pgn(path)
+    stats = builder.write(output or book.path)
+    click.echo(f"Book written: {stats['entries']} entries from {stats['games']} game(s).")
+
+
+@bp.cli.command('export-games')
+@click.option('--format', 'fmt', type=click.Choice(['pgn', 'ndjson']), default='pgn')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='File to write (default: stdout).')
+@click.option('--username', default=None, help='Only this player\'s games.')
+@click.option('--since', default=None, help='Played on or after this date (YYYY-MM-DD).')
+@click.option('--until', default=None, help='Played before this date (YYYY-MM-DD).')
+@click.option('--result', default=None, help='Only games with this result, e.g. 1-0.')
+@click.option('--after-id', type=int, default=None, help='Only games with a larger id.')
+@click.option('--resume', is_flag=True, help='Continue an interrupted export into --output.')
+def export_games_command(fmt, output, username, since, until, result, after_id, resume):
+    """Stream games out of GameLog as PGN or NDJSON."""
+    from .export import export_stream, parse_date, resume_point
+    user_id = None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named '{username}'.")
+        user_id = user.id
+    try:
+        since, until = parse_date(since), parse_date(until)
+    except ValueError as e:
+        raise click.ClickException(f"Bad date: {e}")
+    mode = 'w'
+    if resume:
+        if not output:
+            raise click.ClickException("--resume needs --output.")
+        resumed_id, offset = resume_point(output, fmt)
+        after_id = max(after_id or 0, resumed_id or 0) or None
+        with open(output, 'ab') as handle:
+            handle.truncate(offset)
+        mode = 'a'
+        click.echo(f"Resuming after game {after_id or 0} ({offset} bytes kept).", err=True)
+    chunks = export_stream(fmt, user_id=user_id, since=since, until=until, result=result, after_id=after_id)
+    count = 0
+    with click.open_file(output or '-', mode, encoding='utf-8') as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+            count += 1
+    click.echo(f"Exported {count} game(s).", err=True)
+
+
+@bp.cli.command('tournament')
+@click.argument('player_a')
+@click.argument('player_b')
+@click.option('--games', type=int, default=16, help='Games to play (colours alternate).')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--seed', type=int, default=1, help='Seed of game 0; game i uses seed + i.')
+@click.option('--openings', 'openings_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Opening suite: one FEN or UCI move line per row (default: built-in suite).')
+@click.option('--max-plies', type=int, default=None, help='Adjudicate a draw after this many plies.')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Write report + games as JSON.')
+@click.option('--save', is_flag=True,
+              help='Also log the games under the tournament account (left out of profiles and the book).')
+def tournament_command(player_a, player_b, games, workers, seed, openings_path, max_plies, output, save):
+    """Play PLAYER_A against PLAYER_B headless and report strength and speed.
+
+    \b
+    Players are provider specs:
+      simple:ms=100 | simple:depth=3        the pure-Python engine
+      random                                uniformly random legal moves
+      cloud:url=http://127.0.0.1:8765/api/cloud-eval,ms=50
+      uci:path=pystockfish-engine,ms=50,skill=5
+      mimic:user=<username>,ms=50,temp=1.0  (or profile=<to_style JSON file>)
+    """
+    import json
+    from . import tournament, movecodec
+    from .models import UserProfile
+    styles = {}
+    for spec in {player_a, player_b}:
+        kind, options = tournament.parse_spec(spec)
+        if kind != 'mimic':
+            continue
+        if 'profile' in options:
+            with open(options['profile']) as handle:
+                styles[spec] = json.load(handle)
+        elif 'user' in options:
+            user = User.query.filter_by(username=options['user']).first()
+            profile = db.session.get(UserProfile, user.id) if user else None
+            if profile is None:
+                raise click.ClickException(f"No style profile for '{options['user']}'.")
+            styles[spec] = profile.to_style()
+    openings = tournament.load_openings(openings_path) if openings_path else None
+
+    def progress(game, done, total):
+        click.echo(f"[{done}/{total}] game {game['id']}: {game['white']} - {game['black']} "
+                   f"{game['result']} ({game['termination']}, {len(game['moves'])} plies)")
+
+    played, report = tournament.run_tournament(player_a, player_b, games=games, workers=workers,
+                                               openings=openings, seed=seed, styles=styles,
+                                               max_plies=max_plies or tournament.TOURNAMENT_MAX_PLIES,
+                                               progress=progress)
+    if save:
+        owner = tournament_user(create=True)
+        for game in played:
+            moves = [chess.Move.from_uci(uci) for uci in game['moves']]
+            starting_fen = None if game['starting_fen'] == chess.STARTING_FEN else game['starting_fen']
+            db.session.add(GameLog(user_id=owner.id, result=game['result'], moves_json='',
+                                   starting_fen=starting_fen, moves_blob=movecodec.encode_moves(moves),
+                                   ply_count=len(moves)))
+        db.session.commit()
+    if output:
+        for game in played:
+            game['moves_json'] = tournament.moves_json(game)
+        with open(output, 'w') as handle:
+            json.dump({'report': report, 'games': played}, handle, indent=1)
+    click.echo(json.dumps(report, indent=2))
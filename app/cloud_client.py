@@ -0,0 +1,186 @@
+# app/cloud_client.py (Shared HTTP Client for the Cloud-Eval API)
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Configuration ---
+CLOUD_EVAL_URL = os.environ.get('CLOUD_EVAL_URL', 'https://lichess.org/api/cloud-eval')
+CLOUD_EVAL_TIMEOUT = float(os.environ.get('CLOUD_EVAL_TIMEOUT', 5))
+POOL_SIZE = int(os.environ.get('CLOUD_EVAL_POOL_SIZE', 10))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CLOUD_EVAL_BREAKER_FAILURES', 3))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get('CLOUD_EVAL_BREAKER_COOLDOWN', 30))
+
+
+class CloudEvalError(Exception):
+    """The cloud-eval call failed (network error, bad status, bad body or open circuit)."""
+
+
+class CircuitOpenError(CloudEvalError):
+    """Raised without touching the network while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Classic closed -> open -> half-open breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    every call is rejected for `cooldown` seconds. Then one trial call is
+    let through: success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class CloudEvalClient:
+    """Keep-alive pooled, circuit-broken, single-flight client for /api/cloud-eval."""
+
+    def __init__(self, base_url=CLOUD_EVAL_URL, timeout=CLOUD_EVAL_TIMEOUT, pool_size=POOL_SIZE,
+                 breaker=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.flights = SingleFlight()
+        self.pool_size = pool_size
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        self.requests_sent = 0
+        self.rejected = 0
+
+    @property
+    def session(self):
+        """The keep-alive session, opened on first use in each process.
+
+        A session (and its sockets) inherited across a gunicorn fork would be
+        shared with the master, so a forked worker opens its own.
+        """
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def get_eval(self, fen):
+        """Return the cloud-eval JSON for `fen`, or None if the cloud has no eval (404).
+
+        Raises CloudEvalError on any other failure, including an open circuit.
+        """
+        return self.flights.do(fen, lambda: self._fetch(fen))
+
+    def _fetch(self, fen):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("cloud-eval circuit is open")
+        self.requests_sent += 1
+        try:
+            res = self.session.get(self.base_url, params={"fen": fen}, timeout=self.timeout)
+            if res.status_code == 404:
+                # A clean "unknown position" answer, not an outage.
+                self.breaker.record_success()
+                return None
+            res.raise_for_status()
+            data = res.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.breaker.record_failure()
+            raise CloudEvalError(str(e)) from e
+        self.breaker.record_success()
+        return data
+
+    def stats(self):
+        return {
+            'requests_sent': self.requests_sent,
+            'rejected_by_breaker': self.rejected,
+            'deduplicated': self.flights.shared,
+            'breaker_state': self.breaker.state,
+            'breaker_times_opened': self.breaker.times_opened,
+        }
+
+    def close(self):
+        if self._session is not None and self._session_pid == os.getpid():
+            self._session.close()
+        self._session = None
+
+
+client = CloudEvalClient()
@@ -0,0 +1,277 @@
+# app/engine.py (Local Search Engine)
+import collections
+import time
+import chess
+import chess.polyglot
+from .evaluation import PIECE_VALUES, IncrementalEvaluator
+from .game_state import repetition_history
+
+# --- Tuning ---
+MATE_SCORE = 100000
+INF = MATE_SCORE + 1
+MAX_PLY = 64
+TT_MAX_ENTRIES = 200000
+TIME_CHECK_INTERVAL = 256  # nodes between deadline checks
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the move deadline has passed."""
+
+
+class SearchResult:
+    def __init__(self, move=None, score=0, depth=0, nodes=0, elapsed_ms=0.0):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed_ms = elapsed_ms
+
+    def __repr__(self):
+        move = self.move.uci() if self.move else None
+        return f"SearchResult(move={move}, score={self.score}, depth={self.depth}, nodes={self.nodes})"
+
+
+class Searcher:
+    """Negamax alpha-beta search with iterative deepening.
+
+    The transposition table, killer moves and history scores live on the
+    instance, so reusing one Searcher across moves of the same game keeps
+    what it learned from the previous search.
+    """
+
+    def __init__(self, tt_size=TT_MAX_ENTRIES):
+        self.tt = {}
+        self.tt_size = tt_size
+        self.history = {}
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+        self._root_best = None
+        self._keys = collections.Counter()  # zobrist keys of the game so far plus the current line
+        self._occupancies = collections.Counter()
+        self.evaluator = IncrementalEvaluator()
+
+    # --- Public entry point ---
+    def search(self, board, time_limit_ms=300, max_depth=MAX_PLY, stop=None, game_history=None):
+        """Search `board` until `time_limit_ms` runs out or `max_depth` is reached.
+
+        `stop` is an optional threading.Event that ends the search early
+        when set from another thread. Always returns the best move of the deepest fully searched iteration
+        (or the best move found so far in the iteration that was cut off).
+        `game_history` is game_state.repetition_history(board), if the caller already has it.
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_limit_ms / 1000.0
+        self.stop = stop
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        # Repetitions are found by key lookup, so the copy needs no move stack.
+        if game_history is None:
+            game_history = repetition_history(board)
+        self._keys = collections.Counter(key for _, key in game_history)
+        self._occupancies = collections.Counter(occupied for occupied, _ in game_history)
+        board = board.copy(stack=False)
+        self.evaluator.reset(board)
+
+        legal_moves = list(board.legal_moves)
+        result = SearchResult()
+        if not legal_moves:
+            return result
+        # Something legal to play even if the first iteration cannot finish.
+        result.move = legal_moves[0]
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._search_root(board, depth)
+            except SearchTimeout:
+                if self._root_best is not None:
+                    result.move = self._root_best
+                break
+            result.move, result.score, result.depth = move, score, depth
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+            if time.perf_counter() >= self.deadline or (stop is not None and stop.is_set()):
+                break
+
+        result.nodes = self.nodes
+        result.elapsed_ms = (time.perf_counter() - start) * 1000.0
+        return result
+
+    # --- Internals ---
+    def _check_time(self):
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if time.perf_counter() >= self.deadline or (self.stop is not None and self.stop.is_set()):
+                raise SearchTimeout()
+
+    def _search_root(self, board, depth):
+        self._root_best = None
+        alpha, beta = -INF, INF
+        best_move = None
+        key = chess.polyglot.zobrist_hash(board)
+        for move in self._ordered_moves(board, 0, self._tt_move(key)):
+            self.evaluator.push(board, move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                self.evaluator.pop(board)
+            if score > alpha:
+                alpha = score
+                best_move = move
+                # Safe to return on timeout: the previous best is searched first.
+                self._root_best = move
+        self._store(key, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._check_time()
+
+        if board.halfmove_clock >= 100:
+            return 0
+        key = None
+        if self._occupancies[board.occupied]:
+            # Same occupancy as an earlier position in the game or on this line: hash to be sure.
+            key = chess.polyglot.zobrist_hash(board)
+            if self._keys[key]:
+                return 0
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        alpha_orig = alpha
+        if key is None:
+            key = chess.polyglot.zobrist_hash(board)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_score
+                if entry_flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                elif entry_flag == UPPER:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        best_score = -INF
+        best_move = None
+        searched = 0
+        occupied = board.occupied
+        self._keys[key] += 1
+        self._occupancies[occupied] += 1
+        try:
+            for move in self._ordered_moves(board, ply, tt_move):
+                is_capture = board.is_capture(move)
+                self.evaluator.push(board, move)
+                try:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    self.evaluator.pop(board)
+                searched += 1
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    if not is_capture:
+                        self._record_cutoff(move, depth, ply, board.turn)
+                    break
+        finally:
+            self._keys[key] -= 1
+            self._occupancies[occupied] -= 1
+
+        if searched == 0:
+            # Checkmate or stalemate; prefer quicker mates.
+            return -(MATE_SCORE - ply) if board.is_check() else 0
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, depth, best_score, flag, best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        self._check_time()
+        stand_pat = self.evaluator.score(board)
+        if stand_pat >= beta:
+            return beta
+        if stand_pat > alpha:
+            alpha = stand_pat
+        if ply >= MAX_PLY:
+            return alpha
+
+        captures = sorted(board.generate_legal_captures(), key=lambda m: self._mvv_lva(board, m), reverse=True)
+        for move in captures:
+            self.evaluator.push(board, move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                self.evaluator.pop(board)
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    # --- Move ordering: TT move, captures by MVV-LVA, killers, history ---
+    def _ordered_moves(self, board, ply, tt_move):
+        killers = self.killers[min(ply, MAX_PLY)]
+        color = board.turn
+        scored = []
+        for move in board.legal_moves:
+            if move == tt_move:
+                score = 10000000
+            elif board.is_capture(move):
+                score = 1000000 + self._mvv_lva(board, move)
+            elif move.promotion:
+                score = 900000 + PIECE_VALUES[move.promotion]
+            elif move == killers[0]:
+                score = 800000
+            elif move == killers[1]:
+                score = 790000
+            else:
+                score = self.history.get((color, move.from_square, move.to_square), 0)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _mvv_lva(self, board, move):
+        if board.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board.piece_type_at(move.to_square) or chess.PAWN
+        attacker = board.piece_type_at(move.from_square)
+        return PIECE_VALUES[victim] * 10 - PIECE_VALUES[attacker] // 10
+
+    def _record_cutoff(self, move, depth, ply, color):
+        killers = self.killers[min(ply, MAX_PLY)]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (color, move.from_square, move.to_square)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _tt_move(self, key):
+        entry = self.tt.get(key)
+        return entry[3] if entry else None
+
+    def _store(self, key, depth, score, flag, move):
+        if len(self.tt) >= self.tt_size and key not in self.tt:
+            # Cheap replacement policy: drop the whole table when it fills up.
+            self.tt.clear()
+        self.tt[key] = (depth, score, flag, move)
+
+
+def search(board, time_limit_ms=300, max_depth=MAX_PLY, stop=None, game_history=None):
+    """Convenience wrapper: run a fresh search on `board` and return a SearchResult."""
+    return Searcher().search(board, time_limit_ms=time_limit_ms, max_depth=max_depth, stop=stop,
+                             game_history=game_history)
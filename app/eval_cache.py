@@ -0,0 +1,282 @@
+# app/eval_cache.py (Tiered Position-Evaluation Cache)
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- Configuration ---
+MEMORY_MAX_ENTRIES = int(os.environ.get('EVAL_CACHE_MEMORY_ENTRIES', 10000))
+POSITIVE_TTL_SECONDS = int(os.environ.get('EVAL_CACHE_TTL', 7 * 24 * 3600))
+NEGATIVE_TTL_SECONDS = int(os.environ.get('EVAL_CACHE_NEGATIVE_TTL', 24 * 3600))
+# Unset: eval_cache.sqlite3 in the app's instance folder, resolved by init_app().
+DISK_PATH = os.environ.get('EVAL_CACHE_PATH')
+# Entries copied from disk into memory before gunicorn forks (preload mode), freshest first.
+WARM_ENTRIES = int(os.environ.get('EVAL_CACHE_WARM_ENTRIES', MEMORY_MAX_ENTRIES))
+
+
+def position_key(board):
+    """Normalized FEN: placement, side to move, castling and a *legal* en passant square.
+
+    Move counters are dropped so transpositions share one entry.
+    """
+    return board.epd()
+
+
+class CachedEval:
+    """What we remember about a position. `best_move` is None for a negative entry."""
+
+    __slots__ = ('best_move', 'pv', 'depth', 'cp', 'mate')
+
+    def __init__(self, best_move=None, pv=None, depth=None, cp=None, mate=None):
+        self.best_move = best_move
+        self.pv = pv or []
+        self.depth = depth
+        self.cp = cp
+        self.mate = mate
+
+    @property
+    def negative(self):
+        return self.best_move is None
+
+    @classmethod
+    def from_cloud_eval(cls, data):
+        """Build an entry from a lichess /api/cloud-eval JSON body (None if it has no PV)."""
+        if not data or not data.get('pvs'):
+            return None
+        first = data['pvs'][0]
+        moves = first.get('moves', '').split()
+        if not moves:
+            return None
+        return cls(best_move=moves[0], pv=moves, depth=data.get('depth'),
+                   cp=first.get('cp'), mate=first.get('mate'))
+
+    def to_row(self):
+        return (self.best_move, json.dumps(self.pv), self.depth, self.cp, self.mate)
+
+    @classmethod
+    def from_row(cls, row):
+        best_move, pv, depth, cp, mate = row
+        return cls(best_move=best_move, pv=json.loads(pv) if pv else [], depth=depth, cp=cp, mate=mate)
+
+
+# --- Tier 1: in-process LRU with TTL ---
+class LRUCache:
+    def __init__(self, max_entries=MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, now=None):
+        now = now or time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --- Tier 2: persistent SQLite table shared by every worker on the host ---
+class DiskCache:
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS eval_cache (
+            key TEXT PRIMARY KEY,
+            best_move TEXT,
+            pv TEXT,
+            depth INTEGER,
+            cp INTEGER,
+            mate INTEGER,
+            expires_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.expirations = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, now=None):
+        now = now or time.time()
+        row = self._connection().execute(
+            "SELECT best_move, pv, depth, cp, mate, expires_at FROM eval_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        if row[5] <= now:
+            self._connection().execute("DELETE FROM eval_cache WHERE key = ?", (key,))
+            self.expirations += 1
+            return None, None
+        return CachedEval.from_row(row[:5]), row[5]
+
+    def put(self, key, value, ttl):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO eval_cache (key, best_move, pv, depth, cp, mate, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key,) + value.to_row() + (time.time() + ttl,),
+        )
+
+    def newest(self, limit, now=None):
+        """[(key, CachedEval, expires_at)] for up to `limit` live entries, latest expiry first."""
+        rows = self._connection().execute(
+            "SELECT key, best_move, pv, depth, cp, mate, expires_at FROM eval_cache WHERE expires_at > ? "
+            "ORDER BY expires_at DESC LIMIT ?", (now or time.time(), limit)
+        ).fetchall()
+        return [(row[0], CachedEval.from_row(row[1:6]), row[6]) for row in rows]
+
+    def close(self):
+        """Close this thread's connection (e.g. in the master before forking workers)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def purge_expired(self):
+        cursor = self._connection().execute("DELETE FROM eval_cache WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM eval_cache").fetchone()[0]
+
+
+class EvalCache:
+    """Memory LRU in front of the SQLite tier, with hit/miss/eviction counters."""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, board):
+        key = position_key(board)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            self._count('negative_hits' if value.negative else 'positive_hits')
+            return value
+        if self.disk is not None:
+            try:
+                value, expires_at = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"!!! Eval cache disk read failed: {e} !!!")
+                value = None
+            if value is not None:
+                # Promote into memory for the remaining lifetime of the disk entry.
+                self.memory.put(key, value, max(0.0, expires_at - time.time()))
+                self._count('disk_hits')
+                self._count('negative_hits' if value.negative else 'positive_hits')
+                return value
+        self._count('misses')
+        return None
+
+    def put(self, board, value):
+        key = position_key(board)
+        ttl = NEGATIVE_TTL_SECONDS if value.negative else POSITIVE_TTL_SECONDS
+        self.memory.put(key, value, ttl)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value, ttl)
+            except sqlite3.Error as e:
+                print(f"!!! Eval cache disk write failed: {e} !!!")
+        self._count('negative_stores' if value.negative else 'positive_stores')
+
+    def put_negative(self, board):
+        self.put(board, CachedEval())
+
+    def warm(self, limit=WARM_ENTRIES):
+        """Fill the memory tier from disk; returns how many entries were loaded.
+
+        Run in the gunicorn master before forking, the entries are shared
+        copy-on-write by every worker instead of each one re-reading them.
+        """
+        if self.disk is None or limit <= 0:
+            return 0
+        try:
+            rows = self.disk.newest(min(limit, self.memory.max_entries))
+            self.disk.close()  # an SQLite connection must not cross a fork
+        except sqlite3.Error as e:
+            print(f"!!! Eval cache warm-up failed: {e} !!!")
+            return 0
+        now = time.time()
+        for key, value, expires_at in reversed(rows):  # freshest ends up most recently used
+            self.memory.put(key, value, expires_at - now)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats.get('memory_hits', 0) + stats.get('disk_hits', 0) + stats.get('misses', 0)
+        hits = lookups - stats.get('misses', 0)
+        stats.update({
+            'lookups': lookups,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory),
+            'memory_capacity': self.memory.max_entries,
+            'memory_evictions': self.memory.evictions,
+            'memory_expirations': self.memory.expirations,
+        })
+        if self.disk is not None:
+            try:
+                stats['disk_entries'] = len(self.disk)
+            except sqlite3.Error:
+                stats['disk_entries'] = None
+            stats['disk_expirations'] = self.disk.expirations
+        return stats
+
+
+# Memory only until init_app() attaches the disk tier.
+cache = EvalCache()
+
+
+def init_app(app):
+    """Open the disk tier, in the app's instance folder unless EVAL_CACHE_PATH is set."""
+    path = DISK_PATH or os.path.join(app.instance_path, 'eval_cache.sqlite3')
+    if cache.disk is not None and cache.disk.path == path:
+        return
+    try:
+        cache.disk = DiskCache(path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"!!! Eval cache disk tier unavailable ({e}); using memory only. !!!")
+        cache.disk = None
@@ -0,0 +1,177 @@
+# app/evaluation.py (Bitboard Evaluation with Incremental Updates)
+import chess
+
+# Centipawn values, indexed by chess.PAWN..chess.KING
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+
+# --- Piece-square tables ---
+# Written from White's point of view, rank 8 first (as the board is drawn),
+# so a8 is index 0 and h1 is index 63.
+_PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+_KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+_BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+_ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+]
+_QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+_KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+]
+_TABLES = [None, _PAWN_TABLE, _KNIGHT_TABLE, _BISHOP_TABLE, _ROOK_TABLE, _QUEEN_TABLE, _KING_TABLE]
+
+
+def _build_square_values():
+    # SQUARE_VALUES[color][piece_type][square] = material + positional bonus,
+    # indexed by python-chess square numbers (a1 = 0).
+    values = {chess.WHITE: [None], chess.BLACK: [None]}
+    for piece_type in chess.PIECE_TYPES:
+        table = _TABLES[piece_type]
+        value = PIECE_VALUES[piece_type]
+        values[chess.WHITE].append([value + table[square ^ 56] for square in chess.SQUARES])
+        values[chess.BLACK].append([value + table[square] for square in chess.SQUARES])
+    return values
+
+SQUARE_VALUES = _build_square_values()
+
+
+# --- Full evaluation (White's point of view) ---
+def evaluate(board):
+    """Material via popcounts plus piece-square bonuses, from White's point of view."""
+    score = 0
+    for piece_type in chess.PIECE_TYPES:
+        white_mask = board.pieces_mask(piece_type, chess.WHITE)
+        black_mask = board.pieces_mask(piece_type, chess.BLACK)
+        value = PIECE_VALUES[piece_type]
+        score += value * (chess.popcount(white_mask) - chess.popcount(black_mask))
+        white_table = _TABLES[piece_type]
+        for square in chess.scan_forward(white_mask):
+            score += white_table[square ^ 56]
+        for square in chess.scan_forward(black_mask):
+            score -= white_table[square]
+    return score
+
+
+def move_delta(board, move):
+    """Change in the White-POV score if `move` is played on `board`.
+
+    Only looks at the squares the move touches, so it costs O(1).
+    """
+    color = board.turn
+    own = SQUARE_VALUES[color]
+    theirs = SQUARE_VALUES[not color]
+    from_square, to_square = move.from_square, move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    if move.promotion:
+        delta = own[move.promotion][to_square] - own[chess.PAWN][from_square]
+    else:
+        delta = own[piece_type][to_square] - own[piece_type][from_square]
+
+    if piece_type == chess.KING and abs(from_square - to_square) == 2:
+        # Standard castling: move the rook as well.
+        rank = chess.square_rank(from_square)
+        if to_square > from_square:
+            rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+        else:
+            rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+        delta += own[chess.ROOK][rook_to] - own[chess.ROOK][rook_from]
+    elif board.is_en_passant(move):
+        captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        delta += theirs[chess.PAWN][captured_square]
+    else:
+        victim = board.piece_type_at(to_square)
+        if victim:
+            delta += theirs[victim][to_square]
+
+    return delta if color == chess.WHITE else -delta
+
+
+def score_children(board, moves=None):
+    """Batch entry point: White-POV scores of every child of `board` in one call.
+
+    Returns a list of (move, score) pairs without pushing any move.
+    """
+    base = evaluate(board)
+    if moves is None:
+        moves = board.legal_moves
+    return [(move, base + move_delta(board, move)) for move in moves]
+
+
+class IncrementalEvaluator:
+    """Keeps the evaluation of a board up to date across push/pop.
+
+    Use `push`/`pop` instead of `board.push`/`board.pop` and a leaf
+    evaluation is a list lookup rather than a scan of the board.
+    """
+
+    def __init__(self, board=None):
+        self.stack = [evaluate(board) if board is not None else 0]
+
+    def reset(self, board):
+        self.stack = [evaluate(board)]
+
+    def push(self, board, move):
+        self.stack.append(self.stack[-1] + move_delta(board, move))
+        board.push(move)
+
+    def pop(self, board):
+        self.stack.pop()
+        return board.pop()
+
+    @property
+    def white_score(self):
+        return self.stack[-1]
+
+    def score(self, board):
+        """Score from the side to move's point of view (for negamax)."""
+        return self.stack[-1] if board.turn == chess.WHITE else -self.stack[-1]
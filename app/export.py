@@ -0,0 +1,118 @@
+# app/export.py (Streaming PGN / NDJSON Export of GameLog)
+import datetime
+import json
+import os
+import chess
+import chess.pgn
+from . import db, movecodec
+from .models import GameLog, User, decode_move_list
+
+# --- Configuration ---
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 500))
+# Whole-database exports need "Authorization: Bearer <EXPORT_TOKEN>"; unset disables them.
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN')
+AI_PLAYER_NAME = 'Mimic AI'
+FORMATS = ('pgn', 'ndjson')
+MIMETYPES = {'pgn': 'application/x-chess-pgn', 'ndjson': 'application/x-ndjson'}
+
+
+def parse_date(value):
+    """'YYYY-MM-DD' or an ISO datetime -> datetime (None stays None). Raises ValueError."""
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value)
+
+
+def iter_games(user_id=None, since=None, until=None, result=None, after_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield raw column tuples in id order, `chunk_size` rows per round trip.
+
+    yield_per streams from a server-side cursor (Postgres) so memory stays
+    flat however large the table is; `after_id` resumes an interrupted export.
+    """
+    query = (db.session.query(GameLog.id, GameLog.user_id, User.username, GameLog.result, GameLog.played_at,
+                              GameLog.starting_fen, GameLog.moves_json, GameLog.moves_blob,
+                              GameLog.annotations_blob)
+             .join(User, User.id == GameLog.user_id)
+             .order_by(GameLog.id))
+    if user_id is not None:
+        query = query.filter(GameLog.user_id == user_id)
+    if since is not None:
+        query = query.filter(GameLog.played_at >= since)
+    if until is not None:
+        query = query.filter(GameLog.played_at < until)
+    if result:
+        query = query.filter(GameLog.result == result)
+    if after_id:
+        query = query.filter(GameLog.id > after_id)
+    return query.yield_per(chunk_size)
+
+
+def game_to_pgn(row):
+    game_id, user_id, username, result, played_at, starting_fen, moves_json, moves_blob, _ = row
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    game = chess.pgn.Game()
+    game.headers['Event'] = 'Mimic Chess'
+    game.headers['Site'] = 'mimic-chess-ai'
+    game.headers['Date'] = played_at.strftime('%Y.%m.%d') if played_at else '????.??.??'
+    # The player always has White in the web UI.
+    game.headers['White'] = username
+    game.headers['Black'] = AI_PLAYER_NAME
+    game.headers['Result'] = result if result in ('1-0', '0-1', '1/2-1/2') else '*'
+    game.headers['GameId'] = str(game_id)
+    if starting_fen:
+        game.setup(board)
+    node = game
+    for move in decode_move_list(moves_json, moves_blob, starting_fen):
+        node = node.add_main_variation(move)
+    return str(game) + '\n\n'
+
+
+def game_to_ndjson(row):
+    game_id, user_id, username, result, played_at, starting_fen, moves_json, moves_blob, annotations_blob = row
+    moves = decode_move_list(moves_json, moves_blob, starting_fen)
+    data = {'id': game_id, 'user_id': user_id, 'username': username, 'result': result,
+            'played_at': played_at.isoformat() if played_at else None,
+            'starting_fen': starting_fen or chess.STARTING_FEN,
+            'moves': [move.uci() for move in moves]}
+    if annotations_blob:
+        data['annotations'] = movecodec.decode_annotations(annotations_blob)
+    return json.dumps(data) + '\n'
+
+
+def export_stream(fmt, **filters):
+    """Generator of text chunks, one game each, in the requested format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format '{fmt}'")
+    render = game_to_pgn if fmt == 'pgn' else game_to_ndjson
+    for row in iter_games(**filters):
+        yield render(row)
+
+
+def resume_point(path, fmt):
+    """(after_id, offset) for continuing an export file: keep bytes [0, offset), resume after after_id.
+
+    NDJSON keeps every complete line. PGN drops the last game, which may have
+    been cut off mid-way, and exports it again.
+    """
+    after_id, offset = None, 0
+    pgn_point = (None, 0)  # id of the game before the last one, and where the last one starts
+    position = 0
+    try:
+        with open(path, 'rb') as handle:
+            for line in handle:
+                start, position = position, position + len(line)
+                if fmt == 'pgn':
+                    if line.startswith(b'[Event '):
+                        pgn_point = (after_id, start)
+                    elif line.startswith(b'[GameId "'):
+                        after_id = int(line[len(b'[GameId "'):].split(b'"', 1)[0])
+                elif line.endswith(b'\n'):
+                    try:
+                        after_id, offset = json.loads(line)['id'], position
+                    except (ValueError, KeyError):
+                        break
+    except OSError:
+        return None, 0
+    if fmt == 'pgn':
+        return pgn_point
+    return after_id, offset
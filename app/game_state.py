@@ -0,0 +1,182 @@
+# app/game_state.py (Per-Ply Cached Game State)
+import collections
+import chess
+import chess.polyglot
+
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(_RANDOM)
+
+
+def repetition_history(board):
+    """[(occupied, zobrist key)] for the positions since the last pawn move or capture, current one last.
+
+    Earlier positions can never occur again, so this is all repetition
+    detection needs. Costs one hash per reversible ply, however long the game.
+    """
+    board = board.copy(stack=board.halfmove_clock)
+    history = [(board.occupied, chess.polyglot.zobrist_hash(board))]
+    while board.move_stack:
+        board.pop()
+        history.append((board.occupied, chess.polyglot.zobrist_hash(board)))
+    history.reverse()
+    return history
+
+
+_castling_keys = {}  # clean castling rights -> their polyglot keys (standard chess)
+
+
+def _castling_key(board):
+    if board.chess960:
+        return _HASHER.hash_castling(board)
+    rights = board.clean_castling_rights()
+    key = _castling_keys.get(rights)
+    if key is None:
+        key = _castling_keys[rights] = _HASHER.hash_castling(board)
+    return key
+
+
+def _piece_sets(board):
+    return (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.WHITE])
+
+
+def _piece_delta(before, after):
+    """XOR of the polyglot piece-square keys that differ between two _piece_sets()."""
+    delta = 0
+    white_before, white_after = before[6], after[6]
+    for index in range(6):
+        old, new = before[index], after[index]
+        if old == new and white_before & old == white_after & new:
+            continue
+        # Polyglot piece index: 2 * (piece type - 1), plus 1 for White.
+        for color, changed in ((1, (old & white_before) ^ (new & white_after)),
+                               (0, (old & ~white_before) ^ (new & ~white_after))):
+            for square in chess.scan_forward(changed):
+                delta ^= _RANDOM[64 * (2 * index + color) + square]
+    return delta
+
+
+class GameState:
+    """A board plus the answers /move keeps asking about it, computed at most once per ply.
+
+    The legal moves, SAN strings and outcome are cached until the next
+    push(). The Zobrist key is updated from the squares a move changed,
+    and repetitions are counted in a running key -> count map, so the
+    outcome check costs the same at move 10 and move 200 (python-chess
+    scans the whole move stack on every is_game_over()). Moves must go
+    through push(); pushing on `board` directly would leave the caches stale.
+    """
+
+    def __init__(self, board=None):
+        self.board = board if board is not None else chess.Board()
+        self._pieces = _piece_sets(self.board)
+        self._piece_key = _HASHER.hash_board(self.board)
+        self._history = None  # see repetition_history(); rebuilt on first use for a board with a past
+        self._counts = None
+        if not self.board.move_stack:
+            self._track([(self.board.occupied, self.zobrist)])
+        self._clear_ply()
+
+    def _clear_ply(self):
+        self._legal = None
+        self._legal_set = None
+        self._san = {}
+        self._outcome = False  # None is a valid outcome ("still playing")
+
+    def _track(self, history):
+        self._history = history
+        self._counts = collections.Counter(key for _, key in history)
+
+    # --- Moves ---
+    def push(self, move):
+        self.board.push(move)
+        pieces = _piece_sets(self.board)
+        self._piece_key ^= _piece_delta(self._pieces, pieces)
+        self._pieces = pieces
+        self._clear_ply()
+        if self._history is None:
+            return
+        entry = (self.board.occupied, self.zobrist)
+        if self.board.halfmove_clock == 0:
+            self._track([entry])
+        else:
+            self._history.append(entry)
+            self._counts[entry[1]] += 1
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.board = self.board.copy()
+        state._pieces, state._piece_key = self._pieces, self._piece_key
+        state._history, state._counts = None, None
+        if self._history is not None:
+            state._track(list(self._history))
+        state._legal, state._legal_set, state._outcome = self._legal, self._legal_set, self._outcome
+        state._san = dict(self._san)
+        return state
+
+    # --- Cached per ply ---
+    @property
+    def legal_moves(self):
+        if self._legal is None:
+            self._legal = list(self.board.legal_moves)
+        return self._legal
+
+    def is_legal(self, move):
+        if self._legal is None:
+            return self.board.is_legal(move)  # one check is cheaper than generating every move
+        if self._legal_set is None:
+            self._legal_set = set(self._legal)
+        return move in self._legal_set
+
+    def san(self, move):
+        san = self._san.get(move)
+        if san is None:
+            san = self._san[move] = self.board.san(move)
+        return san
+
+    @property
+    def zobrist(self):
+        """chess.polyglot.zobrist_hash(board), without rehashing every piece."""
+        board = self.board
+        return self._piece_key ^ _castling_key(board) ^ _HASHER.hash_ep_square(board) ^ _HASHER.hash_turn(board)
+
+    @property
+    def history(self):
+        """repetition_history() of the current position, kept up to date by push()."""
+        if self._history is None:
+            self._track(repetition_history(self.board))
+        return self._history
+
+    def repetitions(self):
+        """How many times the current position has occurred, this time included."""
+        key = self.history[-1][1]  # builds the counts on first use
+        return self._counts[key]
+
+    def outcome(self):
+        """Same answer as board.outcome() for standard chess, computed once per ply."""
+        if self._outcome is False:
+            board = self.board
+            has_moves = bool(self._legal) if self._legal is not None else any(board.generate_legal_moves())
+            if not has_moves:
+                if board.is_check():
+                    self._outcome = chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+                elif board.is_insufficient_material():
+                    self._outcome = chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+                else:
+                    self._outcome = chess.Outcome(chess.Termination.STALEMATE, None)
+            elif board.is_insufficient_material():
+                self._outcome = chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+            elif board.halfmove_clock >= 150:
+                self._outcome = chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+            elif self.repetitions() >= 5:
+                self._outcome = chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+            else:
+                self._outcome = None
+        return self._outcome
+
+    def is_game_over(self):
+        return self.outcome() is not None
+
+    def result(self):
+        outcome = self.outcome()
+        return outcome.result() if outcome else '*'
@@ -0,0 +1,248 @@
+# app/game_store.py (Per-User Game Sessions)
+import collections
+import datetime
+import os
+import threading
+import time
+import uuid
+import chess
+from . import db
+from .models import GameSession
+from .game_state import GameState
+from . import movecodec, metrics
+
+# --- Configuration ---
+HOT_BOARDS_PER_WORKER = int(os.environ.get('GAME_STORE_HOT_BOARDS', 256))
+GAME_IDLE_TIMEOUT_SECONDS = int(os.environ.get('GAME_IDLE_TIMEOUT', 2 * 3600))
+EVICTION_INTERVAL_SECONDS = int(os.environ.get('GAME_EVICTION_INTERVAL', 300))
+
+
+class GameNotFound(Exception):
+    """The game id is unknown (never created, finished, or evicted as idle)."""
+
+
+class GameConflict(Exception):
+    """Another request (possibly on another worker) moved in this game first."""
+
+
+class _HotBoard:
+    __slots__ = ('state', 'lock', 'last_used')
+
+    def __init__(self, state):
+        self.state = state
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class GameHandle:
+    """A checked-out game. Push moves through it; they are written back on exit.
+
+    `state` is the worker's cached GameState (see game_state.py); `board` is its board.
+    """
+
+    def __init__(self, game_id, user_id, starting_fen, state, base_ply, result=None):
+        self.game_id = game_id
+        self.user_id = user_id
+        self.starting_fen = starting_fen
+        self.result = result
+        self.state = state
+        self.board = state.board
+        self.base_ply = base_ply
+        self.pending = []
+        self.finished = False
+
+    def push(self, move):
+        self.state.push(move)
+        self.pending.append(move)
+
+    def finish(self, result):
+        """Mark the game over; written in the same UPDATE as the last moves.
+
+        The row stays until idle eviction so late polls can read the result.
+        """
+        self.result = result
+        self.finished = True
+
+
+class GameStore:
+    """Games live in the GameSession table; each worker keeps an LRU of rebuilt boards.
+
+    A cached board is only trusted while its ply count matches the row, so
+    a move served by another worker just means replaying the missing moves.
+    """
+
+    def __init__(self, hot_boards=HOT_BOARDS_PER_WORKER):
+        self.hot_boards = hot_boards
+        self._hot = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Lifecycle ---
+    def new_game(self, user_id, starting_fen=chess.STARTING_FEN):
+        game_id = uuid.uuid4().hex
+        db.session.add(GameSession(id=game_id, user_id=user_id, starting_fen=starting_fen,
+                                   moves=b'', ply_count=0))
+        db.session.commit()
+        self._remember(game_id, GameState(chess.Board(starting_fen)))
+        return game_id
+
+    def delete(self, game_id):
+        GameSession.query.filter_by(id=game_id).delete()
+        db.session.commit()
+        self._forget(game_id)
+
+    def reply_after(self, game_id, ply, user_id=None):
+        """The move played at `ply` (0-based), the game result and the last update, as (move, result, updated_at).
+
+        move is None while that ply has not been played yet. Lets any worker
+        answer "has the AI replied?" from the shared table.
+        """
+        row = db.session.get(GameSession, game_id)
+        if row is None or (user_id is not None and row.user_id != user_id):
+            raise GameNotFound(game_id)
+        if row.ply_count <= ply:
+            return None, row.result, row.updated_at
+        return movecodec.unpack_move(movecodec.decode_codes(row.moves)[ply]), row.result, row.updated_at
+
+    def packed(self, game_id):
+        """(starting_fen, packed moves, ply count) of a game, for writing its GameLog."""
+        row = db.session.get(GameSession, game_id)
+        if row is None:
+            raise GameNotFound(game_id)
+        return row.starting_fen, row.moves or b'', row.ply_count
+
+    def move_history(self, game_id):
+        """[{"turn", "move_san"}, ...] for every move played, in the GameLog format."""
+        row = db.session.get(GameSession, game_id)
+        if row is None:
+            raise GameNotFound(game_id)
+        board = chess.Board(row.starting_fen)
+        history = []
+        for move in movecodec.decode_moves(row.moves):
+            history.append({"turn": board.fullmove_number, "move_san": board.san(move)})
+            board.push(move)
+        return history
+
+    # --- Check-out / write-back ---
+    def open(self, game_id, user_id=None):
+        return _GameContext(self, game_id, user_id)
+
+    def _checkout(self, game_id, user_id):
+        row = db.session.get(GameSession, game_id)
+        if row is None or (user_id is not None and row.user_id != user_id):
+            raise GameNotFound(game_id)
+        hot = self._get_hot(game_id)
+        hot.lock.acquire()
+        try:
+            state = hot.state
+            if state is None or len(state.board.move_stack) > row.ply_count:
+                state = GameState(chess.Board(row.starting_fen))
+            if len(state.board.move_stack) < row.ply_count:
+                for move in movecodec.decode_moves(row.moves)[len(state.board.move_stack):]:
+                    state.push(move)
+            hot.state = state
+        except Exception:
+            hot.lock.release()
+            raise
+        return hot, GameHandle(game_id, row.user_id, row.starting_fen, state, row.ply_count, row.result)
+
+    def _commit(self, handle):
+        if not handle.pending and not handle.finished:
+            return
+        row = db.session.get(GameSession, handle.game_id)
+        values = {GameSession.updated_at: datetime.datetime.utcnow()}
+        if handle.pending:
+            values[GameSession.moves] = (row.moves or b'') + movecodec.encode_moves(handle.pending)
+            values[GameSession.ply_count] = handle.base_ply + len(handle.pending)
+        if handle.finished:
+            values[GameSession.result] = handle.result
+        # Optimistic concurrency: only succeed if nobody else advanced the game.
+        updated = GameSession.query.filter_by(id=handle.game_id, ply_count=handle.base_ply).update(
+            values, synchronize_session=False)
+        if updated != 1:
+            db.session.rollback()
+            raise GameConflict(handle.game_id)
+        db.session.commit()
+        if handle.finished:
+            self._forget(handle.game_id)
+
+    # --- Per-worker LRU of hot boards ---
+    def _get_hot(self, game_id):
+        with self._lock:
+            hot = self._hot.get(game_id)
+            if hot is None:
+                hot = self._hot[game_id] = _HotBoard(None)
+            self._hot.move_to_end(game_id)
+            hot.last_used = time.monotonic()
+            self._trim()
+            return hot
+
+    def _remember(self, game_id, state):
+        with self._lock:
+            self._hot[game_id] = _HotBoard(state)
+            self._trim()
+
+    def _forget(self, game_id):
+        with self._lock:
+            self._hot.pop(game_id, None)
+
+    def _trim(self):
+        while len(self._hot) > self.hot_boards:
+            self._hot.popitem(last=False)
+
+    # --- Idle eviction ---
+    def evict_idle(self, max_idle_seconds=GAME_IDLE_TIMEOUT_SECONDS):
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_idle_seconds)
+        removed = GameSession.query.filter(GameSession.updated_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        now = time.monotonic()
+        with self._lock:
+            for game_id in [gid for gid, hot in self._hot.items() if now - hot.last_used > max_idle_seconds]:
+                del self._hot[game_id]
+        return removed
+
+    def start_eviction_timer(self, app, interval=EVICTION_INTERVAL_SECONDS):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        removed = self.evict_idle()
+                    if removed:
+                        print(f"Evicted {removed} idle game(s).")
+                except Exception as e:
+                    print(f"!!! Idle game eviction failed: {e} !!!")
+        thread = threading.Thread(target=run, name='game-eviction', daemon=True)
+        thread.start()
+        return thread
+
+
+class _GameContext:
+    def __init__(self, store, game_id, user_id):
+        self.store = store
+        self.game_id = game_id
+        self.user_id = user_id
+        self.hot = None
+        self.handle = None
+
+    def __enter__(self):
+        with metrics.span('game_load'):
+            self.hot, self.handle = self.store._checkout(self.game_id, self.user_id)
+        return self.handle
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                with metrics.span('db_commit'):
+                    self.store._commit(self.handle)
+        except Exception:
+            exc_type = True
+            raise
+        finally:
+            if exc_type is not None:
+                # The board may hold moves that never reached the store.
+                self.hot.state = None
+            self.hot.lock.release()
+        return False
+
+
+store = GameStore()
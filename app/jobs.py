@@ -0,0 +1,122 @@
+# app/jobs.py (Bounded Background Executor for AI Moves)
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+MOVE_WORKERS = int(os.environ.get('AI_MOVE_WORKERS', os.cpu_count() or 2))
+# Jobs allowed in the system (running + waiting) before we answer 429.
+MOVE_QUEUE_LIMIT = int(os.environ.get('AI_MOVE_QUEUE_LIMIT', 32))
+# Finished jobs are kept this long so late polls still find them.
+JOB_RETENTION_SECONDS = int(os.environ.get('AI_JOB_RETENTION', 300))
+# A reply still missing from the shared game table this long after the player's move is
+# reported as failed: the job died, possibly on another worker that cannot tell us.
+AI_REPLY_TIMEOUT_SECONDS = int(os.environ.get('AI_REPLY_TIMEOUT', 60))
+
+
+class QueueFull(Exception):
+    """The executor already holds MOVE_QUEUE_LIMIT jobs; the caller should back off."""
+
+
+class Job:
+    PENDING, DONE, ERROR = 'pending', 'done', 'error'
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = self.PENDING
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        data = {'job_id': self.job_id, 'status': self.status}
+        if self.status == self.DONE:
+            data.update(self.result or {})
+        elif self.status == self.ERROR:
+            data['message'] = self.error
+        return data
+
+
+class JobQueue:
+    """ThreadPoolExecutor with a hard cap on outstanding jobs and a result registry."""
+
+    def __init__(self, workers=MOVE_WORKERS, limit=MOVE_QUEUE_LIMIT, retention=JOB_RETENTION_SECONDS):
+        self.limit = limit
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-move')
+        self._slots = threading.BoundedSemaphore(limit)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def reserve(self):
+        """Claim a slot before doing work that must be followed by submit().
+
+        Raises QueueFull instead of queueing past the limit.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull()
+
+    def release(self):
+        """Give back a slot from reserve() that will not be used."""
+        self._slots.release()
+
+    def submit(self, job_id, fn, args=(), reserved=False):
+        """Run fn(*args) in the background; its return value becomes the job result."""
+        if not reserved:
+            self.reserve()
+        job = Job(job_id)
+        with self._lock:
+            self._purge_finished()
+            self._jobs[job_id] = job
+        try:
+            self._executor.submit(self._run, job, fn, args)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            if not reserved:
+                self._slots.release()
+            raise
+        return job
+
+    def _run(self, job, fn, args):
+        try:
+            job.result = fn(*args)
+            job.status = Job.DONE
+        except Exception as e:
+            print(f"!!! Job {job.job_id} failed: {e!r} !!!")
+            job.error = str(e)
+            job.status = Job.ERROR
+        finally:
+            job.finished_at = time.monotonic()
+            self._slots.release()
+            job.done.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending_for(self, prefix):
+        """True while a job whose id starts with `prefix` is queued or running here."""
+        with self._lock:
+            return any(job.status == Job.PENDING and job_id.startswith(prefix)
+                       for job_id, job in self._jobs.items())
+
+    def _purge_finished(self):
+        cutoff = time.monotonic() - self.retention
+        for job_id in [jid for jid, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == Job.PENDING)
+            return {'pending': pending, 'limit': self.limit, 'rejected': self.rejected,
+                    'tracked': len(self._jobs)}
+
+
+move_jobs = JobQueue()
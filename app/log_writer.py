@@ -0,0 +1,342 @@
+# app/log_writer.py (Write-Behind GameLog Writer)
+import atexit
+import base64
+import collections
+import datetime
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+import chess
+import sqlalchemy as sa
+from . import db, movecodec, analysis
+from .models import GameLog
+
+# --- Configuration ---
+LOG_BATCH_SIZE = int(os.environ.get('GAMELOG_BATCH_SIZE', 100))
+LOG_FLUSH_INTERVAL = float(os.environ.get('GAMELOG_FLUSH_INTERVAL', 1.0))
+LOG_QUEUE_SIZE = int(os.environ.get('GAMELOG_QUEUE_SIZE', 10000))
+# Games that could not be written (DB down, queue full) wait here and are retried.
+# Unset: gamelog_spool.jsonl in the app's instance folder, resolved by init_app().
+LOG_SPOOL_PATH = os.environ.get('GAMELOG_SPOOL_PATH')
+# Games the database rejects one by one (e.g. their user was deleted) are moved here for a human.
+# Unset: gamelog_dead_letter.jsonl in the app's instance folder.
+LOG_DEAD_LETTER_PATH = os.environ.get('GAMELOG_DEAD_LETTER_PATH')
+
+
+def game_record(user_id, board, result):
+    """The GameLog row for a finished board, as a plain dict (no DB access).
+
+    Web games carry no annotations_blob: /move never ranks the player's
+    moves, so their style features come only from analysis.update_profile().
+    """
+    starting_fen = board.root().fen()
+    return {'user_id': user_id, 'result': result, 'moves_json': '',
+            'starting_fen': None if starting_fen == chess.STARTING_FEN else starting_fen,
+            'moves_blob': movecodec.encode_moves(board.move_stack),
+            'ply_count': len(board.move_stack),
+            'played_at': datetime.datetime.utcnow()}
+
+
+def _to_spool_line(record):
+    data = dict(record, moves_blob=base64.b64encode(record['moves_blob']).decode('ascii'),
+                played_at=record['played_at'].isoformat())
+    return json.dumps(data) + '\n'
+
+
+def _to_dead_letter_line(record, error):
+    data = json.loads(_to_spool_line(record)) if isinstance(record, dict) else {'line': record}
+    return json.dumps(dict(data, error=str(error))) + '\n'
+
+
+def _from_spool_line(line):
+    data = json.loads(line)
+    data['moves_blob'] = base64.b64decode(data['moves_blob'])
+    data['played_at'] = datetime.datetime.fromisoformat(data['played_at'])
+    return data
+
+
+class GameLogWriter:
+    """Finished games go on a bounded queue; one thread bulk-inserts them.
+
+    A batch is written when it reaches `batch_size` games or `flush_interval`
+    seconds after its first game, whichever comes first. Games written while
+    the database is unreachable, and games that arrive while the queue is
+    full, are appended to a spool file (flock'ed, so gunicorn workers can
+    share it) and replayed after the next successful write. A batch the
+    database refuses is retried game by game; games it still rejects go to a
+    dead-letter file instead of blocking the spool. close() drains the queue;
+    it runs at exit.
+    """
+
+    def __init__(self, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL,
+                 queue_size=LOG_QUEUE_SIZE, spool_path=LOG_SPOOL_PATH, dead_letter_path=LOG_DEAD_LETTER_PATH,
+                 update_profiles=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path
+        self.update_profiles = update_profiles
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._app = None
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    # --- Producer side (request threads) ---
+    def submit(self, record):
+        """Queue one game_record(); never blocks and never touches the database."""
+        if self._thread is None:
+            # Not started (scripts, shell): write through.
+            self._write([record])
+            return
+        try:
+            self._queue.put_nowait(record)
+            self._count('queued')
+        except queue.Full:
+            self._spool([record])
+            self._count('overflowed')
+
+    def init_app(self, app):
+        """Put the spool and dead-letter files in the app's instance folder unless configured."""
+        self.spool_path = self.spool_path or os.path.join(app.instance_path, 'gamelog_spool.jsonl')
+        self.dead_letter_path = self.dead_letter_path or os.path.join(app.instance_path,
+                                                                      'gamelog_dead_letter.jsonl')
+
+    # --- Flusher thread ---
+    def start(self, app):
+        if self._thread is not None:
+            return self._thread
+        self._app = app
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='gamelog-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self._thread
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        self._replay_spool()
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                written = self._write(batch)
+                self._done(len(batch))
+                if written:
+                    self._replay_spool()
+        self._drain()
+
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+            self._done(len(batch))
+
+    def _done(self, n):
+        for _ in range(n):
+            self._queue.task_done()
+
+    def _insert(self, records):
+        db.session.execute(sa.insert(GameLog), records)
+        db.session.commit()
+
+    def _insert_checked(self, records):
+        """Insert `records`; returns (inserted, rejected [(record, error)], unwritten).
+
+        A batch the database refuses is retried one game per transaction, so one
+        bad row (say, for a deleted user) can't hold back the rest. While the
+        database is unreachable (OperationalError) nothing more is tried and the
+        games not yet inserted come back as `unwritten`, for the spool.
+        """
+        try:
+            self._insert(records)
+            return records, [], []
+        except sa.exc.OperationalError:
+            db.session.rollback()
+            return [], [], records
+        except Exception:
+            db.session.rollback()
+        inserted, rejected = [], []
+        for index, record in enumerate(records):
+            try:
+                self._insert([record])
+            except sa.exc.OperationalError:
+                db.session.rollback()
+                return inserted, rejected, records[index:]
+            except Exception as e:
+                db.session.rollback()
+                rejected.append((record, e))
+            else:
+                inserted.append(record)
+        return inserted, rejected, []
+
+    def _write(self, records):
+        """Insert a batch; rejected games are dead-lettered, unwritten ones spooled.
+
+        Returns True when nothing had to be spooled.
+        """
+        start = time.perf_counter()
+        try:
+            with self._app_context():
+                inserted, rejected, unwritten = self._insert_checked(records)
+                if inserted:
+                    self._count('written', len(inserted))
+                    self._count('batches')
+                    self._count('write_ms', (time.perf_counter() - start) * 1000.0)
+                    if self.update_profiles:
+                        self._update_profiles({record['user_id'] for record in inserted})
+        except Exception as e:
+            print(f"!!! Writing {len(records)} game log(s) failed: {e} !!!")
+            rejected, unwritten = [], records
+        if rejected:
+            self._dead_letter(rejected)
+        if unwritten:
+            print(f"!!! Spooling {len(unwritten)} game log(s) until the database is back. !!!")
+            self._count('failed_batches')
+            self._spool(unwritten)
+            return False
+        return True
+
+    def _update_profiles(self, user_ids):
+        # Off the request path now, so the incremental profile update costs the player nothing.
+        for user_id in user_ids:
+            try:
+                analysis.update_profile(user_id)
+            except Exception as e:
+                db.session.rollback()
+                print(f"!!! Profile update failed for user {user_id}: {e} !!!")
+
+    def _app_context(self):
+        from flask import current_app, has_app_context
+        app = self._app or (current_app._get_current_object() if has_app_context() else None)
+        if app is None:
+            raise RuntimeError("GameLogWriter needs an app: call start(app) or submit inside an app context")
+        return app.app_context()
+
+    # --- Spool and dead-letter files ---
+    @staticmethod
+    def _append(path, lines):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.writelines(lines)
+                handle.flush()
+                os.fsync(handle.fileno())
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _spool(self, records):
+        self._append(self.spool_path, [_to_spool_line(record) for record in records])
+        self._count('spooled', len(records))
+
+    def _dead_letter(self, rejected):
+        """Set aside games the database will never accept as they are, with the reason."""
+        self._append(self.dead_letter_path, [_to_dead_letter_line(record, error) for record, error in rejected])
+        self._count('dead_lettered', len(rejected))
+        print(f"!!! {len(rejected)} game log(s) rejected by the database; "
+              f"moved to {self.dead_letter_path}: {str(rejected[0][1]).splitlines()[0]} !!!")
+
+    def _replay_spool(self):
+        """Insert spooled games; only those the database could not be reached for stay in the file."""
+        if not os.path.exists(self.spool_path):
+            return 0
+        inserted = []
+        try:
+            with open(self.spool_path, 'r+', encoding='utf-8') as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    records, rejected = [], []
+                    for line in handle:
+                        if not line.strip():
+                            continue
+                        try:
+                            records.append(_from_spool_line(line))
+                        except (ValueError, KeyError, TypeError) as e:
+                            rejected.append((line.rstrip('\n'), e))
+                    unwritten = []
+                    if records:
+                        with self._app_context():
+                            inserted, refused, unwritten = self._insert_checked(records)
+                        rejected.extend(refused)
+                    if rejected:
+                        self._dead_letter(rejected)
+                    handle.seek(0)
+                    handle.truncate()
+                    handle.writelines(_to_spool_line(record) for record in unwritten)
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        except Exception as e:
+            print(f"!!! Replaying the game log spool failed: {e} !!!")
+            return 0
+        if inserted:
+            self._count('replayed', len(inserted))
+            print(f"Replayed {len(inserted)} spooled game log(s).")
+        return len(inserted)
+
+    # --- Shutdown / introspection ---
+    def flush(self, timeout=10.0):
+        """Wait until everything queued so far has been written (or spooled)."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        """Stop the flusher after it has written every queued game."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self._drain()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        batches = counters.get('batches', 0)
+        counters['write_ms'] = round(counters.get('write_ms', 0.0), 1)
+        counters['avg_batch'] = counters.get('written', 0) / batches if batches else 0.0
+        counters['queue_depth'] = self._queue.qsize()
+        counters['running'] = self._thread is not None
+        return counters
+
+
+writer = GameLogWriter()
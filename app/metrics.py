@@ -0,0 +1,354 @@
+# app/metrics.py (Hot-Path Timings, Counters and Prometheus Exposition)
+import bisect
+import contextlib
+import cProfile
+import heapq
+import json
+import os
+import random
+import re
+import threading
+import time
+from flask import g, has_request_context, request
+
+# --- Configuration ---
+# Optional bearer token for GET /metrics; unset leaves it open (scrape from a private network).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# Add a Server-Timing header with the per-stage breakdown to every response (exposes internals; debug only).
+SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+# Directory shared by the gunicorn workers on this host (set by gunicorn.conf.py). Each worker
+# writes its samples there and /metrics sums every worker's, whichever one answers the scrape.
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+MULTIPROC_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+# Opt-in profiler: this share of requests runs under cProfile (0 disables it).
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+# Only the PROFILE_KEEP slowest profiled requests are kept on disk.
+# Unset: profiles/ in the app's instance folder, resolved by init_app().
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+
+# Seconds. Wide enough for a 0.1 ms legality check and a multi-second cold engine start.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+DEPTH_BUCKETS = (1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 16, 24, 32)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by label values: counter.inc('cloud')."""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with _sum and _count, as Prometheus expects."""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (self.name + '_bucket', _labels(self.labelnames, labels, [('le', _number(bound))]),
+                       cumulative)
+            yield self.name + '_sum', _labels(self.labelnames, labels), total
+            yield self.name + '_count', _labels(self.labelnames, labels), cumulative
+
+
+class Collected:
+    """Values read from an existing stats() dict at scrape time, so nothing is counted twice.
+
+    `read` returns a number, or {label value: number} when the metric has one label.
+    """
+
+    def __init__(self, name, help_text, kind, read, labelname=None):
+        self.name, self.help, self.kind, self.read = name, help_text, kind, read
+        self.labelname = labelname
+
+    def samples(self):
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"!!! Metric {self.name} could not be read: {e} !!!")
+            return
+        if isinstance(value, dict):
+            for label, number in sorted(value.items()):
+                yield self.name, _labels((self.labelname,), (label,)), number
+        elif value is not None:
+            yield self.name, '', value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def collect(self, name, help_text, read, kind='gauge', labelname=None):
+        return self.register(Collected(name, help_text, kind, read, labelname))
+
+    def snapshot(self):
+        """[{name, help, kind, samples: [[sample name, labels, value], ...]}] in registration order."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [{'name': metric.name, 'help': metric.help, 'kind': metric.kind,
+                 'samples': [list(sample) for sample in metric.samples()]} for metric in metrics]
+
+    # --- Sharing between worker processes ---
+    def write(self, directory=MULTIPROC_DIR, snapshot=None):
+        """Publish this process's samples as <directory>/metrics-<pid>.json (atomically)."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as handle:
+            json.dump(snapshot if snapshot is not None else self.snapshot(), handle)
+        os.replace(path + '.tmp', path)
+
+    def start_flusher(self, directory=MULTIPROC_DIR, interval=MULTIPROC_FLUSH_SECONDS):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(directory)
+                except OSError as e:
+                    print(f"!!! Metrics could not be written to {directory}: {e} !!!")
+        thread = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        thread.start()
+        return thread
+
+    def _merged(self, directory):
+        """Every worker's snapshot summed. Counters and histograms of exited workers still
+        count (totals must not go backwards); gauges only while their worker is alive."""
+        own = self.snapshot()
+        self.write(directory, own)
+        snapshots = [own]
+        for filename in sorted(os.listdir(directory)):
+            match = re.fullmatch(r'metrics-(\d+)\.json', filename)
+            if not match or int(match.group(1)) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as handle:
+                    snapshot = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            alive = _alive(int(match.group(1)))
+            snapshots.append([metric for metric in snapshot if alive or metric['kind'] != 'gauge'])
+        merged = {}
+        for snapshot in snapshots:
+            for metric in snapshot:
+                entry = merged.setdefault(metric['name'], dict(metric, samples={}))
+                for name, labels, value in metric['samples']:
+                    entry['samples'][(name, labels)] = entry['samples'].get((name, labels), 0) + value
+        return [dict(metric, samples=[(name, labels, value) for (name, labels), value in metric['samples'].items()])
+                for metric in merged.values()]
+
+    def render(self, directory=MULTIPROC_DIR):
+        """Prometheus text exposition format 0.0.4, summed over every worker when `directory` is set."""
+        metrics = self._merged(directory) if directory else self.snapshot()
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric['name']} {metric['help']}")
+            lines.append(f"# TYPE {metric['name']} {metric['kind']}")
+            for name, labels, value in metric['samples']:
+                lines.append(f"{name}{labels} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clear_multiproc_dir(directory=MULTIPROC_DIR):
+    """Drop the previous run's worker files (call once, before the workers start)."""
+    if not directory or not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.startswith('metrics-'):
+            os.remove(os.path.join(directory, filename))
+
+
+registry = Registry()
+
+# --- Hot-path metrics ---
+requests_seconds = registry.histogram('mimic_http_request_duration_seconds', 'Request latency by endpoint',
+                                      ('endpoint', 'method', 'status'))
+stage_seconds = registry.histogram('mimic_stage_duration_seconds',
+                                   'Time spent in each stage of a move (validation, store, AI, commit)', ('stage',))
+ai_moves = registry.counter('mimic_ai_moves_total', 'AI replies by where the move came from', ('source',))
+cloud_requests = registry.counter('mimic_cloud_requests_total', 'Cloud-eval API calls by outcome', ('outcome',))
+fallbacks = registry.counter('mimic_fallbacks_total', 'Times a cheaper answer had to stand in, by reason',
+                             ('reason',))
+search_nodes = registry.counter('mimic_search_nodes_total', 'Nodes visited by the pure-Python search')
+search_depth = registry.histogram('mimic_search_depth', 'Depth completed per pure-Python search',
+                                  buckets=DEPTH_BUCKETS)
+
+
+@contextlib.contextmanager
+def span(stage):
+    """Time a block into mimic_stage_duration_seconds{stage=...} (and the request's Server-Timing)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage)
+        if has_request_context():
+            spans = g.setdefault('metric_spans', [])
+            spans.append((stage, elapsed))
+
+
+def record_search(result):
+    """Nodes and depth from an engine.SearchResult."""
+    search_nodes.inc(amount=result.nodes)
+    search_depth.observe(result.depth)
+
+
+# --- Slow-request profiles ---
+class SlowProfiles:
+    """Keeps cProfile dumps of the slowest sampled requests, at most `keep` files."""
+
+    def __init__(self, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._kept = []  # min-heap of (seconds, path)
+        self._lock = threading.Lock()
+
+    def offer(self, seconds, name, profile):
+        with self._lock:
+            if len(self._kept) >= self.keep and seconds <= self._kept[0][0]:
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+            path = os.path.join(self.directory,
+                                f"{seconds * 1000:08.1f}ms-{safe_name}-{os.getpid()}-{time.time_ns()}.prof")
+            profile.dump_stats(path)
+            heapq.heappush(self._kept, (seconds, path))
+            if len(self._kept) > self.keep:
+                _, dropped = heapq.heappop(self._kept)
+                try:
+                    os.remove(dropped)
+                except OSError:
+                    pass
+        return path
+
+    def paths(self):
+        with self._lock:
+            return [path for _, path in sorted(self._kept, reverse=True)]
+
+
+profiles = SlowProfiles()
+
+
+def _before_request():
+    g.metric_start = time.perf_counter()
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active on this interpreter
+            return
+        g.metric_profile = profile
+
+
+def _after_request(response):
+    start = g.pop('metric_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    requests_seconds.observe(elapsed, endpoint, request.method, str(response.status_code))
+    spans = g.get('metric_spans') or []
+    if SERVER_TIMING and spans:
+        response.headers['Server-Timing'] = ', '.join(
+            f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans)
+    profile = g.pop('metric_profile', None)
+    if profile is not None:
+        profile.disable()
+        path = profiles.offer(elapsed, endpoint, profile)
+        if path:
+            stages = ' '.join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in spans)
+            print(f"Profile saved: {path} ({elapsed * 1000:.1f} ms; {stages})")
+    return response
+
+
+def _teardown_request(exc):
+    # after_request is skipped when a request dies with an exception; stop its profiler anyway.
+    profile = g.pop('metric_profile', None)
+    if profile is not None:
+        profile.disable()
+
+
+def init_app(app):
+    profiles.directory = PROFILE_DIR or os.path.join(app.instance_path, 'profiles')
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
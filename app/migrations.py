@@ -0,0 +1,73 @@
+# app/migrations.py (In-Place Schema Upgrades for Existing Databases)
+import json
+import sqlalchemy as sa
+from . import db, movecodec
+from .models import GameLog, UserProfile
+
+# Columns added to game_log after the first deployment.
+_GAME_LOG_NEW_COLUMNS = ('starting_fen', 'moves_blob', 'annotations_blob', 'ply_count')
+# Columns added to user_profile after it was first created.
+_USER_PROFILE_NEW_COLUMNS = ('engine_ranked_moves', 'engine_rank_percent_sum')
+
+
+def _add_missing_columns(table, names):
+    existing = {column['name'] for column in sa.inspect(db.engine).get_columns(table.name)}
+    added = []
+    with db.engine.begin() as conn:
+        for name in names:
+            if name in existing:
+                continue
+            column = table.columns[name]
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            default = f' DEFAULT {column.server_default.arg}' if column.server_default is not None else ''
+            conn.execute(sa.text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}{default}'))
+            added.append(name)
+    return added
+
+
+def upgrade_schema():
+    """Add the columns and indexes create_all() can't add to existing tables.
+
+    Additive and idempotent, so it runs at every startup; returns the columns added.
+    Converting old rows is left to migrate_game_log().
+    """
+    table = GameLog.__table__
+    added = _add_missing_columns(table, _GAME_LOG_NEW_COLUMNS)
+    for index in table.indexes:
+        index.create(db.engine, checkfirst=True)
+    added += _add_missing_columns(UserProfile.__table__, _USER_PROFILE_NEW_COLUMNS)
+    return added
+
+
+def migrate_game_log(batch_size=500):
+    """Add the packed columns and indexes, then convert JSON rows in batches.
+
+    Safe to re-run: only rows without moves_blob are touched, and a row
+    whose JSON cannot be fully replayed keeps its JSON untouched.
+    """
+    added = upgrade_schema()
+
+    converted = skipped = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(GameLog.id, GameLog.moves_json, GameLog.starting_fen)
+                .filter(GameLog.moves_blob.is_(None), GameLog.id > last_id)
+                .order_by(GameLog.id).limit(batch_size).all())
+        if not rows:
+            break
+        for game_id, moves_json, starting_fen in rows:
+            last_id = game_id
+            history = json.loads(moves_json or '[]')
+            moves_blob, annotations_blob = movecodec.packed_from_history(history, starting_fen)
+            if len(moves_blob) // 2 != len(history):
+                skipped += 1
+                continue
+            db.session.query(GameLog).filter(GameLog.id == game_id).update({
+                GameLog.moves_blob: moves_blob,
+                GameLog.annotations_blob: annotations_blob or None,
+                GameLog.ply_count: len(history),
+                GameLog.moves_json: '',
+            }, synchronize_session=False)
+            converted += 1
+        db.session.commit()
+    return {'columns_added': added, 'converted': converted, 'skipped': skipped}
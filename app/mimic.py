@@ -0,0 +1,146 @@
+# app/mimic.py (Style-Conditioned Move Selection)
+import math
+import os
+import random
+import chess
+import numpy as np
+from . import evaluation
+
+# --- Configuration ---
+# Play like the player by default (a /move request can still ask for "mode": "best" or "mimic").
+MIMIC_DEFAULT = os.environ.get('AI_MIMIC', '0') == '1'
+# >1 flattens the distribution (more varied play), <1 sharpens it towards the profile's favourite.
+MIMIC_TEMPERATURE = float(os.environ.get('AI_MIMIC_TEMPERATURE', 1.0))
+# Profiles built from fewer moves than this are too noisy to imitate; play the best move instead.
+MIMIC_MIN_MOVES = int(os.environ.get('AI_MIMIC_MIN_MOVES', 20))
+# Logit penalty per pawn of static loss, on top of whatever the profile's precision implies.
+CP_LOSS_WEIGHT = float(os.environ.get('AI_MIMIC_CP_LOSS_WEIGHT', 1.0))
+# Share of captures and checks among an average player's moves; aggression is measured against it.
+BASE_AGGRESSION = 0.2
+
+# Feature matrix columns: rank percent, pawns lost, capture or check, then one-hot piece type.
+_RANK, _LOSS, _AGGRESSIVE, _PIECE = 0, 1, 2, 3
+N_FEATURES = _PIECE + 6
+_PIECE_SYMBOLS = 'PNBRQK'
+
+
+def _logit(p):
+    p = min(max(p, 0.01), 0.99)
+    return math.log(p / (1.0 - p))
+
+
+def style_weights(style):
+    """Profile (UserProfile.to_style()) -> weight vector over the feature columns."""
+    weights = np.zeros(N_FEATURES)
+    # If rank/total were exponential with the player's mean, its log-density slope is -1/mean.
+    weights[_RANK] = -1.0 / max(style.get('avg_rank_percent') or 0.5, 0.02)
+    weights[_LOSS] = -CP_LOSS_WEIGHT
+    weights[_AGGRESSIVE] = _logit(style.get('aggression') or 0.0) - _logit(BASE_AGGRESSION)
+    pieces = style.get('piece_preference') or {}
+    total = sum(pieces.values())
+    for i, symbol in enumerate(_PIECE_SYMBOLS):
+        # Laplace-smoothed share, relative to an even split over the six piece types.
+        weights[_PIECE + i] = math.log((pieces.get(symbol, 0) + 1) / (total + 6) * 6)
+    return weights
+
+
+def _check_masks(board):
+    """(direct, discovered): per piece type, the squares that attack the enemy king,
+    and our pieces that alone block one of our sliders from it.
+
+    Lets most moves be tested for check with one bitwise AND instead of
+    board.gives_check, which plays the move out.
+    """
+    color = board.turn
+    king = board.king(not color)
+    if king is None:
+        return None, 0
+    occupied = board.occupied
+    diagonal = chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupied]
+    straight = (chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupied]
+                | chess.BB_FILE_ATTACKS[king][chess.BB_FILE_MASKS[king] & occupied])
+    direct = [0, chess.BB_PAWN_ATTACKS[not color][king], chess.BB_KNIGHT_ATTACKS[king],
+              diagonal, straight, diagonal | straight, 0]
+    ours = board.occupied_co[color]
+    queens = board.queens
+    snipers = ((chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | queens))
+               | (chess.BB_RANK_ATTACKS[king][0] & (board.rooks | queens))
+               | (chess.BB_FILE_ATTACKS[king][0] & (board.rooks | queens))) & ours
+    discovered = 0
+    for sniper in chess.scan_forward(snipers):
+        blockers = chess.between(king, sniper) & occupied
+        if blockers and blockers & (blockers - 1) == 0 and blockers & ours:
+            discovered |= blockers
+    return direct, discovered
+
+
+def move_features(board, best_move=None, legal_moves=None):
+    """(moves, features): every legal move and its feature row, built in one pass.
+
+    Ranks and losses come from the 1-ply static evaluation; `best_move` (the
+    engine's choice, if known) is forced to rank 1 with no loss. Pass
+    `legal_moves` when they are already known (GameState.legal_moves).
+    """
+    moves = list(board.legal_moves if legal_moves is None else legal_moves)
+    n = len(moves)
+    if not n:
+        return moves, np.zeros((0, N_FEATURES))
+    base = evaluation.evaluate(board)
+    sign = 1 if board.turn == chess.WHITE else -1
+    theirs = board.occupied_co[not board.turn]
+    direct, discovered = _check_masks(board)
+    scores, pieces, aggressive = [], [], []
+    best_index = -1
+    for i, move in enumerate(moves):
+        from_square, to_square = move.from_square, move.to_square
+        piece_type = board.piece_type_at(from_square)
+        scores.append(sign * (base + evaluation.move_delta(board, move)))
+        pieces.append(piece_type - 1)
+        if direct is None or move.promotion or chess.BB_SQUARES[from_square] & discovered \
+                or (piece_type == chess.KING and abs(from_square - to_square) == 2) \
+                or (piece_type == chess.PAWN and to_square == board.ep_square):
+            # Promotions, discoveries, castling and en passant: let python-chess decide.
+            aggressive.append(board.is_capture(move) or board.gives_check(move))
+        else:
+            aggressive.append(bool(chess.BB_SQUARES[to_square] & (theirs | direct[piece_type])))
+        if move == best_move:
+            best_index = i
+    scores = np.array(scores, dtype=float)
+    ranks = np.empty(n)
+    ranks[np.argsort(-scores, kind='stable')] = np.arange(n)
+    loss = (scores.max() - scores) / 100.0
+    if best_index >= 0:
+        ranks[ranks < ranks[best_index]] += 1
+        ranks[best_index] = 0
+        loss[best_index] = 0.0
+    features = np.zeros((n, N_FEATURES))
+    features[:, _RANK] = (ranks + 1) / n
+    features[:, _LOSS] = np.minimum(loss, 10.0)
+    features[:, _AGGRESSIVE] = aggressive
+    features[np.arange(n), _PIECE + np.array(pieces)] = 1.0
+    return moves, features
+
+
+def move_probabilities(features, weights, temperature=MIMIC_TEMPERATURE):
+    logits = features @ weights / max(temperature, 1e-3)
+    logits -= logits.max()
+    probs = np.exp(logits)
+    return probs / probs.sum()
+
+
+def usable(style):
+    return bool(style) and (style.get('moves_analyzed') or 0) >= MIMIC_MIN_MOVES
+
+
+def choose_move(board, style, best_move=None, temperature=MIMIC_TEMPERATURE, rng=None, legal_moves=None):
+    """A move sampled to look like the player's, as UCI. Falls back to `best_move`."""
+    if not usable(style):
+        return best_move
+    best = chess.Move.from_uci(best_move) if best_move else None
+    moves, features = move_features(board, best, legal_moves)
+    if not moves:
+        return best_move
+    probs = move_probabilities(features, style_weights(style), temperature)
+    pick = (rng or random).random()
+    index = min(int(np.searchsorted(np.cumsum(probs), pick, side='right')), len(moves) - 1)
+    return moves[index].uci()
@@ -2,6 +2,10 @@
 from . import db # Import the db object from our __init__.py file
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
+import chess
+import json
+import secrets
+from . import movecodec
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,9 +18,140 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+# Engine-vs-engine games saved by `flask tournament --save` belong to this account.
+# Nobody can log in as it, and profile analysis and the opening book leave its games out.
+TOURNAMENT_USERNAME = 'tournament'
+
+def tournament_user(create=False):
+    """The account tournament games are logged under (None until games are first saved)."""
+    user = User.query.filter_by(username=TOURNAMENT_USERNAME).first()
+    if user is None and create:
+        user = User(username=TOURNAMENT_USERNAME)
+        user.set_password(secrets.token_hex(32))  # never shown to anyone
+        db.session.add(user)
+        db.session.flush()
+    return user
+
 class GameLog(db.Model):
+    """A finished game.
+
+    Moves are stored packed (16 bits each, see movecodec.py) with optional
+    per-move annotations in a parallel array. moves_json is only filled for
+    rows written before the packed columns existed and not yet migrated.
+    """
+    __table_args__ = (
+        db.Index('ix_game_log_user_played', 'user_id', 'played_at'),
+        db.Index('ix_game_log_user_id_id', 'user_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     result = db.Column(db.String(10), nullable=False)
-    moves_json = db.Column(db.Text, nullable=False)
-    played_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
\ No newline at end of file
+    moves_json = db.Column(db.Text, nullable=False, default='')
+    played_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    starting_fen = db.Column(db.String(100))  # NULL means the standard starting position
+    moves_blob = db.Column(db.LargeBinary)
+    annotations_blob = db.Column(db.LargeBinary)
+    ply_count = db.Column(db.Integer)
+
+    @classmethod
+    def from_history(cls, user_id, result, history, starting_fen=None):
+        """Build a packed row from a moves_json style list."""
+        moves_blob, annotations_blob = movecodec.packed_from_history(history, starting_fen)
+        return cls(user_id=user_id, result=result, moves_json='', starting_fen=starting_fen,
+                   moves_blob=moves_blob, annotations_blob=annotations_blob or None,
+                   ply_count=len(moves_blob) // 2)
+
+    @property
+    def is_packed(self):
+        return self.moves_blob is not None
+
+    @property
+    def moves(self):
+        """chess.Move list, decoded on first access."""
+        cached = self.__dict__.get('_decoded_moves')
+        if cached is None:
+            cached = decode_move_list(self.moves_json, self.moves_blob, self.starting_fen)
+            self.__dict__['_decoded_moves'] = cached
+        return cached
+
+    def history(self):
+        """The game as a moves_json style list of dicts, whichever form it is stored in."""
+        return decode_history(self.moves_json, self.moves_blob, self.annotations_blob, self.starting_fen)
+
+
+def without_tournament_games(query):
+    """Narrow a query over GameLog to games people played."""
+    user = tournament_user()
+    return query if user is None else query.filter(GameLog.user_id != user.id)
+
+
+def decode_move_list(moves_json, moves_blob, starting_fen=None):
+    """Column values -> chess.Move list (legacy JSON rows stop at the first unparsable move)."""
+    if moves_blob is not None:
+        return movecodec.decode_moves(moves_blob)
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    moves = []
+    for entry in json.loads(moves_json or '[]'):
+        try:
+            move = board.parse_san(entry["move_san"])
+        except (KeyError, ValueError):
+            break
+        moves.append(move)
+        board.push(move)
+    return moves
+
+
+def decode_history(moves_json, moves_blob, annotations_blob=None, starting_fen=None):
+    """Column values -> moves_json style list; lets bulk readers skip loading ORM objects."""
+    if moves_blob is not None:
+        return movecodec.history_from_packed(starting_fen, moves_blob, annotations_blob)
+    return json.loads(moves_json or '[]')
+
+class GameSession(db.Model):
+    """A game in progress: starting FEN plus 16-bit packed moves (see movecodec.py).
+
+    Lives in the shared database so any gunicorn worker can serve the next move.
+    """
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    starting_fen = db.Column(db.String(100), nullable=False, default=chess.STARTING_FEN)
+    moves = db.Column(db.LargeBinary, nullable=False, default=b'')
+    ply_count = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.String(10))  # set once the game is over
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+
+class UserProfile(db.Model):
+    """Running aggregates of a player's style, folded in one game at a time (see analysis.py)."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    games_analyzed = db.Column(db.Integer, nullable=False, default=0)
+    moves_analyzed = db.Column(db.Integer, nullable=False, default=0)
+    aggressive_moves = db.Column(db.Integer, nullable=False, default=0)
+    # Moves ranked by the static evaluator (live games, --static backfills)...
+    ranked_moves = db.Column(db.Integer, nullable=False, default=0)
+    rank_percent_sum = db.Column(db.Float, nullable=False, default=0.0)
+    # ...and by Stockfish (engine backfills, imported match files); the two scales don't mix.
+    engine_ranked_moves = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    engine_rank_percent_sum = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    piece_counts_json = db.Column(db.Text, nullable=False, default='{}')
+    # Highest GameLog.id already folded in; later games are analysed incrementally.
+    last_game_id = db.Column(db.Integer, nullable=False, default=0)
+    # sha1 of JSON match files already imported, so re-running a backfill is a no-op.
+    imported_sources_json = db.Column(db.Text, nullable=False, default='[]')
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def to_style(self):
+        """The profile in the shape chess_game.py:analyze_player_style returns.
+
+        avg_rank_percent is on the static scale mimic.py ranks moves with; only a
+        profile with no statically ranked moves falls back to the Stockfish one.
+        """
+        engine_ranked = self.engine_ranked_moves or 0
+        engine_avg = (self.engine_rank_percent_sum or 0.0) / engine_ranked if engine_ranked else 0
+        return {
+            "aggression": self.aggressive_moves / self.moves_analyzed if self.moves_analyzed else 0,
+            "avg_rank_percent": self.rank_percent_sum / self.ranked_moves if self.ranked_moves else engine_avg,
+            "avg_engine_rank_percent": engine_avg,
+            "piece_preference": json.loads(self.piece_counts_json or '{}'),
+            "games_analyzed": self.games_analyzed,
+            "moves_analyzed": self.moves_analyzed,
+        }
@@ -0,0 +1,110 @@
+# app/movecodec.py (Compact 16-bit Move Encoding)
+import array
+import sys
+import chess
+
+# Layout of one move in 16 bits:
+#   bits 0-5   from square (a1 = 0 ... h8 = 63)
+#   bits 6-11  to square
+#   bits 12-14 promotion piece type (0 = none, 2..5 = N, B, R, Q)
+_SQUARE_MASK = 0x3F
+
+
+def pack_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def unpack_move(code):
+    promotion = (code >> 12) & 0x7
+    return chess.Move(code & _SQUARE_MASK, (code >> 6) & _SQUARE_MASK, promotion or None)
+
+
+def encode_moves(moves):
+    """Pack a sequence of chess.Move into little-endian bytes, two per move."""
+    codes = array.array('H', (pack_move(move) for move in moves))
+    if sys.byteorder != 'little':
+        codes.byteswap()
+    return codes.tobytes()
+
+
+def decode_codes(blob):
+    codes = array.array('H')
+    codes.frombytes(blob or b'')
+    if sys.byteorder != 'little':
+        codes.byteswap()
+    return codes
+
+
+def decode_moves(blob):
+    return [unpack_move(code) for code in decode_codes(blob)]
+
+
+def replay(starting_fen, blob):
+    """Rebuild a board from a starting FEN and packed moves."""
+    board = chess.Board(starting_fen)
+    for move in decode_moves(blob):
+        board.push(move)
+    return board
+
+
+# --- Per-move annotations, packed in an array parallel to the moves ---
+# Three bytes per move: engine rank (0 = unknown), number of options, flags.
+ANNOTATION_SIZE = 3
+FLAG_CAPTURE = 0x01
+FLAG_CHECK = 0x02
+
+
+def encode_annotations(annotations):
+    """Pack [{"move_rank", "total_options", "is_capture", "is_check"} or None, ...] into bytes."""
+    out = bytearray()
+    for note in annotations:
+        note = note or {}
+        flags = (FLAG_CAPTURE if note.get("is_capture") else 0) | (FLAG_CHECK if note.get("is_check") else 0)
+        out += bytes((min(note.get("move_rank") or 0, 255), min(note.get("total_options") or 0, 255), flags))
+    return bytes(out)
+
+
+def decode_annotations(blob):
+    """Inverse of encode_annotations; entries without a rank decode to None."""
+    notes = []
+    blob = blob or b''
+    for i in range(0, len(blob) - ANNOTATION_SIZE + 1, ANNOTATION_SIZE):
+        rank, total, flags = blob[i], blob[i + 1], blob[i + 2]
+        if rank == 0:
+            notes.append(None)
+        else:
+            notes.append({"move_rank": rank, "total_options": total,
+                          "is_capture": bool(flags & FLAG_CAPTURE), "is_check": bool(flags & FLAG_CHECK)})
+    return notes
+
+
+def history_from_packed(starting_fen, moves_blob, annotations_blob=None):
+    """Rebuild the moves_json style list ({"turn", "move_san", ...}) from the packed columns."""
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    notes = decode_annotations(annotations_blob)
+    history = []
+    for i, move in enumerate(decode_moves(moves_blob)):
+        entry = {"turn": board.fullmove_number, "move_san": board.san(move)}
+        note = notes[i] if i < len(notes) else None
+        if note is not None:
+            entry.update(note)
+            entry["piece"] = board.piece_at(move.from_square).symbol()
+        history.append(entry)
+        board.push(move)
+    return history
+
+
+def packed_from_history(history, starting_fen=None):
+    """moves_json style list -> (moves_blob, annotations_blob). Stops at the first unparsable move."""
+    board = chess.Board(starting_fen or chess.STARTING_FEN)
+    moves, notes = [], []
+    for entry in history:
+        try:
+            move = board.parse_san(entry["move_san"])
+        except (KeyError, ValueError):
+            break
+        moves.append(move)
+        notes.append(entry if entry.get("move_rank") else None)
+        board.push(move)
+    annotations = encode_annotations(notes) if any(notes) else b''
+    return encode_moves(moves), annotations
@@ -0,0 +1,179 @@
+# app/ponder.py (Background Pondering on the Player's Time)
+import collections
+import os
+import queue
+import threading
+import chess
+from . import evaluation
+
+# --- Configuration ---
+# Off by default: the built-in search shares the worker's GIL with request handling.
+PONDER_ENABLED = os.environ.get('PONDER_ENABLED', '0') == '1'
+# Total search time spent per AI turn, split across the predicted replies.
+PONDER_BUDGET_MS = int(os.environ.get('PONDER_BUDGET_MS', 1500))
+PONDER_CANDIDATES = int(os.environ.get('PONDER_CANDIDATES', 3))
+# Long-lived search threads per process; tasks beyond these wait in a queue.
+PONDER_WORKERS = int(os.environ.get('PONDER_WORKERS', 1))
+# Positions remembered for move statistics (per worker).
+MOVE_STATS_MAX_POSITIONS = int(os.environ.get('PONDER_STATS_POSITIONS', 50000))
+
+
+class MoveStats:
+    """How often players chose each move in a position, learned from live games."""
+
+    def __init__(self, max_positions=MOVE_STATS_MAX_POSITIONS):
+        self.max_positions = max_positions
+        self._counts = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, board, move):
+        key = board.epd()
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = collections.Counter()
+                while len(self._counts) > self.max_positions:
+                    self._counts.popitem(last=False)
+            self._counts.move_to_end(key)
+            counts[move] += 1
+
+    def most_common(self, board, n):
+        with self._lock:
+            counts = self._counts.get(board.epd())
+            return [move for move, _ in counts.most_common(n)] if counts else []
+
+
+def predict_replies(board, stats, n=PONDER_CANDIDATES):
+    """The player's most likely replies: popular moves first, then the best-looking ones."""
+    predicted = [move for move in stats.most_common(board, n) if move in board.legal_moves]
+    if len(predicted) < n:
+        sign = 1 if board.turn == chess.WHITE else -1
+        scored = sorted(evaluation.score_children(board), key=lambda item: sign * item[1], reverse=True)
+        for move, _ in scored:
+            if move not in predicted:
+                predicted.append(move)
+            if len(predicted) >= n:
+                break
+    return predicted
+
+
+class _PonderTask:
+    def __init__(self, game_id, ply):
+        self.game_id = game_id
+        self.ply = ply
+        self.stop = threading.Event()
+        self.answers = {}  # epd of the predicted position -> AI reply (UCI)
+
+
+class Ponderer:
+    """One ponder task per game: precomputes AI answers while the player thinks.
+
+    Tasks are queued for PONDER_WORKERS long-lived threads; a task replaced,
+    taken or cancelled before a thread picks it up is skipped.
+    `search` is called as search(board, time_limit_ms=..., stop=...) and
+    must return a UCI string; it is injected to avoid a circular import with ai.py.
+    """
+
+    def __init__(self, search, budget_ms=PONDER_BUDGET_MS, candidates=PONDER_CANDIDATES,
+                 workers=PONDER_WORKERS):
+        self.search = search
+        self.budget_ms = budget_ms
+        self.candidates = candidates
+        self.workers = max(1, workers)
+        self.stats = MoveStats()
+        self._queue = queue.Queue()
+        self._threads = []
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_player_move(self, board, move):
+        """Call with the board *before* the player's move."""
+        self.stats.record(board, move)
+
+    def start(self, game_id, board):
+        """Ponder on `board` (player to move, game not over). Replaces any older task for the game."""
+        if not PONDER_ENABLED:
+            return
+        task = _PonderTask(game_id, len(board.move_stack))
+        with self._lock:
+            old = self._tasks.get(game_id)
+            if old is not None:
+                old.stop.set()
+            self._tasks[game_id] = task
+            # Started on first use, so a preloaded gunicorn master never owns them.
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f'ponder-{i}', daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        # Moves before the last pawn move or capture cannot matter for repetitions; don't copy them.
+        self._queue.put((task, board.copy(stack=board.halfmove_clock)))
+
+    # --- Worker threads ---
+    def _run(self):
+        while True:
+            task, board = self._queue.get()
+            # Tasks replaced or taken while queued are dropped without searching.
+            if task.stop.is_set():
+                self._count('cancelled')
+                continue
+            try:
+                self._ponder(task, board)
+            except Exception as e:
+                print(f"!!! Pondering failed for game {task.game_id}: {e!r} !!!")
+
+    def _ponder(self, task, board):
+        replies = predict_replies(board, self.stats, self.candidates)
+        per_move_ms = max(1, self.budget_ms // max(1, len(replies)))
+        for reply in replies:
+            if task.stop.is_set():
+                self._count('cancelled')
+                return
+            board.push(reply)
+            try:
+                if not board.is_game_over():
+                    answer = self.search(board, time_limit_ms=per_move_ms, stop=task.stop)
+                    if answer and not task.stop.is_set():
+                        task.answers[board.epd()] = answer
+                        self._count('computed')
+            finally:
+                board.pop()
+
+    def take(self, game_id, board):
+        """Precomputed AI reply for `board` (after the player's move), or None.
+
+        Stops the game's ponder task either way.
+        """
+        with self._lock:
+            task = self._tasks.pop(game_id, None)
+        if task is None:
+            return None
+        task.stop.set()
+        answer = task.answers.get(board.epd())
+        if answer is not None and task.ply + 1 == len(board.move_stack) \
+                and chess.Move.from_uci(answer) in board.legal_moves:
+            self._count('hits')
+            print(f"Ponder hit: {answer}")
+            return answer
+        self._count('misses')
+        return None
+
+    def cancel(self, game_id):
+        with self._lock:
+            task = self._tasks.pop(game_id, None)
+        if task is not None:
+            task.stop.set()
+
+    def metrics(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters['active_tasks'] = len(self._tasks)
+        counters['queued'] = self._queue.qsize()
+        lookups = counters.get('hits', 0) + counters.get('misses', 0)
+        counters['hit_rate'] = counters.get('hits', 0) / lookups if lookups else 0.0
+        return counters
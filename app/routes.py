@@ -1,14 +1,19 @@
 # app/routes.py
-from flask import render_template, request, jsonify, session, redirect, url_for, flash, Blueprint
+from flask import render_template, request, jsonify, session, redirect, url_for, flash, Blueprint, Response, current_app, stream_with_context
 from . import db
-from .models import User, GameLog
-from .ai import get_ai_move, analyze_player_style # Import the correct AI
+from .models import User, UserProfile, TOURNAMENT_USERNAME
+from .ai import get_ai_move, get_book_move, ponderer # Import the correct AI
+from . import eval_cache, cloud_client, uci_pool, analysis, book, export, mimic, metrics
+from .game_store import store as game_store, GameNotFound, GameConflict
+from .jobs import move_jobs, Job, QueueFull, AI_REPLY_TIMEOUT_SECONDS
+from .log_writer import writer as log_writer, game_record
 import chess
+import datetime
+import hmac
 import json
+import time
 
 bp = Blueprint('main', __name__)
-board = chess.Board()
-active_games = {}
 
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -19,7 +24,7 @@ def register():
         if not username or not password:
             flash('Username and password are required.')
             return redirect(url_for('main.register'))
-        if User.query.filter_by(username=username).first():
+        if username == TOURNAMENT_USERNAME or User.query.filter_by(username=username).first():
             flash('Username is already taken.')
             return redirect(url_for('main.register'))
         new_user = User(username=username)
@@ -58,42 +63,386 @@ def logout():
 def home():
     if 'user_id' not in session:
         return redirect(url_for('main.login'))
-    board.reset()
-    active_games[session['user_id']] = []
-    return render_template('index.html')
+    # Every visit starts a fresh game; drop the one this browser was playing.
+    old_game_id = session.pop('game_id', None)
+    if old_game_id:
+        ponderer.cancel(old_game_id)
+        game_store.delete(old_game_id)
+    session['game_id'] = game_store.new_game(session['user_id'])
+    return render_template('index.html', mimic_default=mimic.MIMIC_DEFAULT)
+
+def _parse_move_request(allow_resume=False):
+    """Common checks for both move endpoints. Returns (user_id, game_id, move, mimic, error_response).
+
+    With `allow_resume`, a request without a move is accepted and `move` is None.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return None, None, None, None, (jsonify({'status': 'Error', 'message': 'Not authenticated'}), 401)
+    game_id = session.get('game_id')
+    if not game_id:
+        return None, None, None, None, (jsonify({'status': 'Error', 'message': 'No active game'}), 400)
+    try:
+        move = request.json.get('move')
+        move_object = None if move is None and allow_resume else chess.Move.from_uci(move)
+    except (TypeError, ValueError):
+        return None, None, None, None, (jsonify({'status': 'Error', 'message': 'Illegal move'}), 400)
+    mode = request.json.get('mode')
+    use_mimic = mimic.MIMIC_DEFAULT if mode not in ('best', 'mimic') else mode == 'mimic'
+    return user_id, game_id, move_object, use_mimic, None
+
+def _awaiting_ai(game_id, board):
+    # The player has White; Black to move means an AI reply is still owed (maybe by another worker).
+    return board.turn != chess.WHITE or move_jobs.pending_for(f"{game_id}-")
+
+def _reply_lost(game_id, reply_ply, user_id):
+    # The AI reply owed at `reply_ply` failed here, or no worker produced it in time (see _job_state).
+    if move_jobs.pending_for(f"{game_id}-"):
+        return False
+    return _job_state(f"{game_id}-{reply_ply}", user_id)['status'] == Job.ERROR
 
 @bp.route('/move', methods=['POST'])
 def handle_move():
+    user_id, game_id, move_object, use_mimic, error = _parse_move_request()
+    if error:
+        return error
+
+    try:
+        with game_store.open(game_id, user_id) as game:
+            # Legal moves, outcome and repetition counts are cached per ply (see game_state.py).
+            state, board = game.state, game.board
+            if game.result:
+                return jsonify({'status': 'Game Over', 'result': game.result})
+            if _awaiting_ai(game_id, board):
+                return jsonify({'status': 'Error', 'message': 'Waiting for the AI to reply'}), 409
+            with metrics.span('validate'):
+                legal = state.is_legal(move_object)
+            if not legal:
+                return jsonify({'status': 'Error', 'message': 'Illegal move'}), 400
+            ponderer.record_player_move(board, move_object)
+            game.push(move_object)
+            ai_move_uci = None
+            with metrics.span('game_over'):
+                player_ended_game = state.is_game_over()
+            if not player_ended_game:
+                ai_move_uci = _choose_ai_move(game_id, state, user_id, use_mimic)
+                if ai_move_uci:
+                    game.push(chess.Move.from_uci(ai_move_uci))
+            with metrics.span('game_over'):
+                game_over = state.is_game_over()
+            result = state.result() if game_over else None
+            _after_ai_move(game_id, board, game_over)
+            record = game_record(user_id, board, result) if game_over else None
+            if game_over:
+                game.finish(result)
+    except GameNotFound:
+        return jsonify({'status': 'Error', 'message': 'Game not found'}), 404
+    except GameConflict:
+        return jsonify({'status': 'Error', 'message': 'Game was updated by another request'}), 409
+
+    if game_over:
+        save_game_log(session.get('username'), record)
+        if ai_move_uci is None:
+            return jsonify({'status': 'Game Over', 'result': result})
+    return jsonify({'status': 'Success', 'ai_move': ai_move_uci})
+
+# --- Asynchronous move API: submit, then poll /jobs/<id> or stream /jobs/<id>/events ---
+# Posting without a move requeues an AI reply whose job failed or was lost.
+@bp.route('/move/async', methods=['POST'])
+def submit_move():
+    user_id, game_id, move_object, use_mimic, error = _parse_move_request(allow_resume=True)
+    if error:
+        return error
+
+    # Claim executor capacity before touching the game, so a 429 leaves it unchanged.
+    try:
+        move_jobs.reserve()
+    except QueueFull:
+        response = jsonify({'status': 'Busy', 'message': 'AI is saturated, retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+
+    submitted = False
+    try:
+        with game_store.open(game_id, user_id) as game:
+            state, board = game.state, game.board
+            if game.result:
+                return jsonify({'status': 'Game Over', 'result': game.result})
+            if move_object is None:
+                reply_ply = game.base_ply
+                if board.turn == chess.WHITE or not _reply_lost(game_id, reply_ply, user_id):
+                    return jsonify({'status': 'Error', 'message': 'No AI reply to retry'}), 409
+            else:
+                if _awaiting_ai(game_id, board):
+                    return jsonify({'status': 'Error', 'message': 'Waiting for the AI to reply'}), 409
+                with metrics.span('validate'):
+                    legal = state.is_legal(move_object)
+                if not legal:
+                    return jsonify({'status': 'Error', 'message': 'Illegal move'}), 400
+                ponderer.record_player_move(board, move_object)
+                game.push(move_object)
+                reply_ply = game.base_ply + 1
+            with metrics.span('game_over'):
+                game_over = state.is_game_over()
+            result = state.result() if game_over else None
+            record = game_record(user_id, board, result) if game_over else None
+            if game_over:
+                game.finish(result)
+            position = state.copy()
+
+        if game_over:
+            ponderer.cancel(game_id)
+            save_game_log(session.get('username'), record)
+            return jsonify({'status': 'Game Over', 'result': result})
+
+        job_id = f"{game_id}-{reply_ply}"
+        move_jobs.submit(job_id, _play_ai_reply, reserved=True,
+                         args=(current_app._get_current_object(), game_id, user_id,
+                               session.get('username'), reply_ply, position, use_mimic))
+        submitted = True
+    except GameNotFound:
+        return jsonify({'status': 'Error', 'message': 'Game not found'}), 404
+    except GameConflict:
+        return jsonify({'status': 'Error', 'message': 'Game was updated by another request'}), 409
+    finally:
+        if not submitted:
+            move_jobs.release()
+
+    return jsonify({'status': 'Accepted', 'job_id': job_id,
+                    'poll_url': url_for('main.job_status', job_id=job_id),
+                    'events_url': url_for('main.job_events', job_id=job_id)}), 202
+
+def _choose_ai_move(game_id, state, user_id=None, use_mimic=False):
+    # The opening book comes first, then a ponder hit answers at once; otherwise compute the reply now.
+    board = state.board
+    with metrics.span('ai_move'):
+        best_move = get_book_move(board)
+        if best_move:
+            ponderer.cancel(game_id)
+        else:
+            best_move = ponderer.take(game_id, board)
+            if best_move:
+                metrics.ai_moves.inc('ponder')
+        if not best_move:
+            best_move = get_ai_move(board, game_history=state.history, use_book=False) # Calling the Hybrid AI
+    if use_mimic and user_id:
+        # Mimic mode: sample a move the way this player would, around the best move.
+        with metrics.span('mimic'):
+            profile = db.session.get(UserProfile, user_id)
+            if profile is not None:
+                return mimic.choose_move(board, profile.to_style(), best_move, legal_moves=state.legal_moves)
+    return best_move
+
+def _after_ai_move(game_id, board, game_over):
+    if game_over:
+        ponderer.cancel(game_id)
+    else:
+        ponderer.start(game_id, board)
+
+def _play_ai_reply(app, game_id, user_id, username, reply_ply, position, use_mimic=False):
+    # Runs on the move executor, outside any request.
+    with app.app_context():
+        ai_move_uci = _choose_ai_move(game_id, position, user_id, use_mimic)
+        with game_store.open(game_id, user_id) as game:
+            if game.base_ply != reply_ply:
+                raise GameConflict(game_id)
+            if ai_move_uci:
+                game.push(chess.Move.from_uci(ai_move_uci))
+            with metrics.span('game_over'):
+                game_over = game.state.is_game_over()
+            result = game.state.result() if game_over else None
+            _after_ai_move(game_id, game.board, game_over)
+            record = game_record(user_id, game.board, result) if game_over else None
+            if game_over:
+                game.finish(result)
+        if game_over:
+            save_game_log(username, record)
+    return {'ai_move': ai_move_uci, 'game_over': game_over, 'result': result}
+
+def _job_state(job_id, user_id):
+    """Job status as a dict. Falls back to the shared game table when another worker owns the job or it failed."""
+    job = move_jobs.get(job_id)
+    if job is not None and job.status != Job.ERROR:
+        return job.to_dict()
+    game_id, _, ply = job_id.rpartition('-')
+    if not game_id or not ply.isdigit():
+        raise GameNotFound(job_id)
+    # A failed job may have lost the race to a requeued one that did reply.
+    move, result, updated_at = game_store.reply_after(game_id, int(ply), user_id)
+    if move is None and result is None:
+        if job is not None:
+            return job.to_dict()
+        waited = (datetime.datetime.utcnow() - updated_at).total_seconds() if updated_at else 0
+        if waited > AI_REPLY_TIMEOUT_SECONDS:
+            return {'job_id': job_id, 'status': Job.ERROR, 'message': 'AI reply failed or timed out'}
+        return {'job_id': job_id, 'status': Job.PENDING}
+    return {'job_id': job_id, 'status': Job.DONE, 'ai_move': move.uci() if move else None,
+            'game_over': result is not None, 'result': result}
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({'status': 'Error', 'message': 'Not authenticated'}), 401
-    player_move_uci = request.json.get('move')
-    move_object = chess.Move.from_uci(player_move_uci)
-    if move_object in board.legal_moves:
-        move_data = { "turn": board.fullmove_number, "move_san": board.san(move_object) }
-        active_games.setdefault(user_id, []).append(move_data)
-        board.push(move_object)
-        if board.is_game_over():
-            save_game_log()
-            return jsonify({'status': 'Game Over', 'result': board.result()})
-        ai_move_uci = get_ai_move(board) # Calling the Hybrid AI
-        if ai_move_uci:
-            move_data = { "turn": board.fullmove_number, "move_san": board.san(chess.Move.from_uci(ai_move_uci)) }
-            active_games[user_id].append(move_data)
-            board.push(chess.Move.from_uci(ai_move_uci))
-        if board.is_game_over():
-            save_game_log()
-        return jsonify({'status': 'Success', 'ai_move': ai_move_uci})
-    return jsonify({'status': 'Error', 'message': 'Illegal move'}), 400
-
-def save_game_log():
-    # ... code is unchanged ...
+    try:
+        return jsonify(_job_state(job_id, user_id))
+    except GameNotFound:
+        return jsonify({'status': 'Error', 'message': 'Unknown job'}), 404
+
+@bp.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events: one `result` event when the AI has replied."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'status': 'Error', 'message': 'Not authenticated'}), 401
+
+    def stream():
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            job = move_jobs.get(job_id)
+            if job is not None:
+                job.done.wait(timeout=1.0)
+            try:
+                state = _job_state(job_id, user_id)
+            except GameNotFound:
+                state = {'job_id': job_id, 'status': Job.ERROR, 'message': 'Unknown job'}
+            if state['status'] != Job.PENDING:
+                yield f"event: result\ndata: {json.dumps(state)}\n\n"
+                return
+            if job is None:
+                time.sleep(0.25)
+            yield ": waiting\n\n"
+        yield f"event: result\ndata: {json.dumps({'job_id': job_id, 'status': Job.ERROR, 'message': 'Timed out'})}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Game export: streamed, one game per chunk, resumable with ?after_id= ---
+def _export_response(fmt, user_id=None):
+    if fmt not in export.FORMATS:
+        return jsonify({'status': 'Error', 'message': f"Format must be one of {', '.join(export.FORMATS)}"}), 404
+    try:
+        filters = {'user_id': user_id,
+                   'since': export.parse_date(request.args.get('since')),
+                   'until': export.parse_date(request.args.get('until')),
+                   'result': request.args.get('result'),
+                   'after_id': request.args.get('after_id', type=int)}
+    except ValueError:
+        return jsonify({'status': 'Error', 'message': 'Dates must be ISO format (YYYY-MM-DD)'}), 400
+    return Response(stream_with_context(export.export_stream(fmt, **filters)), mimetype=export.MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename=games.{fmt}',
+                             'X-Accel-Buffering': 'no'})
+
+@bp.route('/export/games.<fmt>')
+def export_my_games(fmt):
     user_id = session.get('user_id')
-    username = session.get('username')
-    if not user_id or not username: return
-    result = board.result()
-    moves_as_json_string = json.dumps(active_games.get(user_id, []))
-    new_log = GameLog(user_id=user_id, result=result, moves_json=moves_as_json_string)
-    db.session.add(new_log)
-    db.session.commit()
-    print(f"Game log saved to database for user '{username}'")
\ No newline at end of file
+    if not user_id:
+        return jsonify({'status': 'Error', 'message': 'Not authenticated'}), 401
+    return _export_response(fmt, user_id)
+
+@bp.route('/export/all.<fmt>')
+def export_all_games(fmt):
+    token = request.headers.get('Authorization', '')
+    if not export.EXPORT_TOKEN or not hmac.compare_digest(token, f'Bearer {export.EXPORT_TOKEN}'):
+        return jsonify({'status': 'Error', 'message': 'Forbidden'}), 403
+    return _export_response(fmt, request.args.get('user_id', type=int))
+
+# --- Batch analysis: {"fens": [...]} or {"moves": [uci, ...], "starting_fen": ...} ---
+@bp.route('/analyze', methods=['POST'])
+def analyze():
+    if not session.get('user_id'):
+        return jsonify({'status': 'Error', 'message': 'Not authenticated'}), 401
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'Error', 'message': 'Send a JSON object'}), 400
+    use_engine = bool(data.get('use_engine', True))
+    try:
+        top_n = min(int(data.get('top_n') or analysis.ANALYSIS_TOP_N), analysis.ANALYSIS_TOP_N)
+        if top_n < 1:
+            raise ValueError("top_n must be at least 1")
+        if 'moves' in data:
+            if len(data['moves']) > analysis.ANALYZE_MAX_POSITIONS:
+                raise ValueError(f"at most {analysis.ANALYZE_MAX_POSITIONS} moves")
+            moves = [chess.Move.from_uci(uci) for uci in data['moves']]
+            plies = analysis.analyze_game_positions(moves, data.get('starting_fen'), top_n, use_engine)
+            if len(plies) < len(moves):
+                raise ValueError(f"illegal move at ply {len(plies)}")
+            return jsonify({'status': 'Success', 'plies': plies})
+        fens = data.get('fens')
+        if not isinstance(fens, list) or not fens:
+            raise ValueError("send 'fens' (a list) or 'moves'")
+        if len(fens) > analysis.ANALYZE_MAX_POSITIONS:
+            raise ValueError(f"at most {analysis.ANALYZE_MAX_POSITIONS} positions")
+        boards = [chess.Board(fen) for fen in fens]
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'Error', 'message': str(e)}), 400
+    return jsonify({'status': 'Success', 'positions': analysis.analyze_positions(boards, top_n, use_engine)})
+
+@bp.route('/ai/cache-stats')
+def cache_stats():
+    return jsonify(eval_cache.cache.stats())
+
+@bp.route('/ai/cloud-stats')
+def cloud_stats():
+    return jsonify(cloud_client.client.stats())
+
+@bp.route('/ai/engine-stats')
+def engine_stats():
+    return jsonify(uci_pool.pool.stats())
+
+@bp.route('/ai/ponder-stats')
+def ponder_stats():
+    return jsonify(ponderer.metrics())
+
+@bp.route('/book/stats')
+def book_stats():
+    return jsonify(book.book.stats())
+
+@bp.route('/ai/job-stats')
+def job_stats():
+    return jsonify(move_jobs.stats())
+
+@bp.route('/gamelog/stats')
+def gamelog_stats():
+    return jsonify(log_writer.stats())
+
+# --- Prometheus scrape endpoint (see metrics.py); the stats above are exported alongside ---
+@bp.route('/metrics')
+def prometheus_metrics():
+    if metrics.METRICS_TOKEN:
+        token = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(token, f'Bearer {metrics.METRICS_TOKEN}'):
+            return jsonify({'status': 'Error', 'message': 'Forbidden'}), 403
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+def _stat(read, key):
+    return lambda: read().get(key)
+
+def _counts(read, keys):
+    return lambda: {key: value for key, value in read().items() if key in keys}
+
+metrics.registry.collect('mimic_eval_cache_lookups_total', 'Eval cache lookups by tier',
+                         _counts(eval_cache.cache.stats, ('memory_hits', 'disk_hits', 'misses')),
+                         kind='counter', labelname='result')
+metrics.registry.collect('mimic_eval_cache_memory_entries', 'Entries in the in-process eval cache',
+                         _stat(eval_cache.cache.stats, 'memory_entries'))
+metrics.registry.collect('mimic_cloud_breaker_opened_total', 'Times the cloud circuit breaker opened',
+                         _stat(cloud_client.client.stats, 'breaker_times_opened'), kind='counter')
+metrics.registry.collect('mimic_cloud_deduplicated_total', 'Cloud lookups answered by an identical in-flight call',
+                         _stat(cloud_client.client.stats, 'deduplicated'), kind='counter')
+metrics.registry.collect('mimic_ponder_lookups_total', 'Ponder lookups by outcome',
+                         _counts(ponderer.metrics, ('hits', 'misses')), kind='counter', labelname='result')
+metrics.registry.collect('mimic_move_jobs_pending', 'Async move jobs queued or running',
+                         _stat(move_jobs.stats, 'pending'))
+metrics.registry.collect('mimic_move_jobs_rejected_total', 'Async moves refused with 429',
+                         _stat(move_jobs.stats, 'rejected'), kind='counter')
+metrics.registry.collect('mimic_engine_idle', 'Idle Stockfish processes in the pool',
+                         _stat(uci_pool.pool.stats, 'idle'))
+metrics.registry.collect('mimic_gamelog_queue_depth', 'Game logs waiting for the write-behind writer',
+                         _stat(log_writer.stats, 'queue_depth'))
+
+def save_game_log(username, record):
+    """Hand the log to the write-behind writer (see log_writer.py); game.finish() already marked the session."""
+    if not record['user_id'] or not username: return
+    log_writer.submit(record)
+    print(f"Game log queued for user '{username}'")
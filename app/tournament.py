@@ -0,0 +1,324 @@
+# app/tournament.py (Headless Self-Play and Tournaments)
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+import chess.engine
+from . import engine, mimic
+
+# --- Configuration ---
+TOURNAMENT_MAX_PLIES = int(os.environ.get('TOURNAMENT_MAX_PLIES', 200))
+DEFAULT_MOVE_TIME_MS = 100
+
+# Balanced, well-known starting lines; every opening is played once with each colour.
+OPENINGS = [
+    ("Italian Game", "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5"),
+    ("Ruy Lopez", "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6"),
+    ("Sicilian Najdorf", "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6"),
+    ("French Defence", "e2e4 e7e6 d2d4 d7d5"),
+    ("Caro-Kann", "e2e4 c7c6 d2d4 d7d5"),
+    ("Queen's Gambit Declined", "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6"),
+    ("King's Indian", "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6"),
+    ("English", "c2c4 e7e5 b1c3 g8f6"),
+]
+
+
+# --- Move providers ---
+def parse_spec(spec):
+    """'simple:ms=50,depth=4' -> ('simple', {'ms': '50', 'depth': '4'})."""
+    kind, _, rest = spec.partition(':')
+    options = {}
+    for item in filter(None, rest.split(',')):
+        key, _, value = item.partition('=')
+        options[key.strip()] = value.strip()
+    return kind.strip(), options
+
+
+class Provider:
+    """Picks moves for one side. choose() returns (uci or None, nodes searched)."""
+
+    def __init__(self, spec, options):
+        self.spec = spec
+        self.ms = int(options.get('ms', DEFAULT_MOVE_TIME_MS))
+        self.depth = int(options['depth']) if 'depth' in options else None
+
+    def _search(self, board):
+        # A depth limit makes games reproducible; a time limit alone depends on machine load.
+        result = engine.search(board, time_limit_ms=self.ms if self.depth is None else 10 ** 7,
+                               max_depth=self.depth or engine.MAX_PLY)
+        return (result.move.uci() if result.move else None), result.nodes
+
+    def choose(self, board, rng):
+        return self._search(board)
+
+    def close(self):
+        pass
+
+
+class RandomProvider(Provider):
+    def choose(self, board, rng):
+        return rng.choice(sorted(move.uci() for move in board.legal_moves)), 0
+
+
+class CloudProvider(Provider):
+    """The cloud-eval path (point url= at benchmarks/stub_cloud_eval.py), local search when it has no answer."""
+
+    def __init__(self, spec, options):
+        super().__init__(spec, options)
+        from . import cloud_client
+        from .eval_cache import CachedEval
+        self._from_cloud_eval = CachedEval.from_cloud_eval
+        self.client = cloud_client.CloudEvalClient(base_url=options.get('url', cloud_client.CLOUD_EVAL_URL))
+
+    def choose(self, board, rng):
+        try:
+            entry = self._from_cloud_eval(self.client.get_eval(board.fen()))
+            if entry is not None and chess.Move.from_uci(entry.best_move) in board.legal_moves:
+                return entry.best_move, 0
+        except Exception:
+            pass
+        return self._search(board)
+
+    def close(self):
+        self.client.close()
+
+
+class UCIProvider(Provider):
+    def __init__(self, spec, options):
+        super().__init__(spec, options)
+        from . import uci_pool
+        self.pool = uci_pool.EnginePool(path=options.get('path', uci_pool.STOCKFISH_PATH), size=1)
+        if not self.pool.available:
+            raise ValueError(f"no UCI engine at '{options.get('path', uci_pool.STOCKFISH_PATH)}'")
+        self.skill = int(options['skill']) if 'skill' in options else None
+        # Start the process before the first move's clock runs.
+        self.pool.warm_up()
+
+    def choose(self, board, rng):
+        # play(), not analyse(): Skill Level only weakens bestmove, the PV stays full strength.
+        result = self.pool.play(board, time_ms=None if self.depth else self.ms, depth=self.depth,
+                                skill_level=self.skill, info=chess.engine.INFO_BASIC)
+        return (result.move.uci() if result.move else None), result.info.get('nodes', 0)
+
+    def close(self):
+        self.pool.close()
+
+
+class MimicProvider(Provider):
+    """Local search for the best move, then mimic.choose_move with a style profile."""
+
+    def __init__(self, spec, options, style):
+        super().__init__(spec, options)
+        if not style:
+            raise ValueError(f"'{spec}' needs a style profile (user=<name> or profile=<json file>)")
+        self.style = dict(style, moves_analyzed=max(style.get('moves_analyzed') or 0, mimic.MIMIC_MIN_MOVES))
+        self.temperature = float(options.get('temp', mimic.MIMIC_TEMPERATURE))
+
+    def choose(self, board, rng):
+        best, nodes = self._search(board)
+        return mimic.choose_move(board, self.style, best, temperature=self.temperature, rng=rng), nodes
+
+
+def make_provider(spec, style=None):
+    kind, options = parse_spec(spec)
+    if kind == 'simple':
+        return Provider(spec, options)
+    if kind == 'random':
+        return RandomProvider(spec, options)
+    if kind == 'cloud':
+        return CloudProvider(spec, options)
+    if kind == 'uci':
+        return UCIProvider(spec, options)
+    if kind == 'mimic':
+        return MimicProvider(spec, options, style)
+    raise ValueError(f"unknown provider '{kind}' (simple, random, cloud, uci, mimic)")
+
+
+# --- Playing games ---
+def load_openings(path):
+    """One opening per line: a FEN/EPD, or UCI moves from the start position. '#' starts a comment."""
+    openings = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                openings.append((line[:40], line))
+    return openings
+
+
+def opening_board(line):
+    if '/' in line:
+        board = chess.Board()
+        try:
+            board.set_fen(line)
+        except ValueError:
+            board.set_epd(line)
+        return board
+    board = chess.Board()
+    for uci in line.split():
+        board.push_uci(uci)
+    return board
+
+
+def play_game(task):
+    """Process-pool entry point: play one game, return it as a plain dict."""
+    index, white, black, styles, opening_name, opening_line, seed, max_plies = task
+    rng = random.Random(seed)
+    board = opening_board(opening_line)
+    # Providers live for one game: an open UCI engine would keep the worker process from exiting.
+    providers = {chess.WHITE: make_provider(white, styles.get(white))}
+    providers[chess.BLACK] = providers[chess.WHITE] if black == white else make_provider(black, styles.get(black))
+    try:
+        result, termination, per_side = _play(board, providers, rng, max_plies)
+    finally:
+        for provider in set(providers.values()):
+            provider.close()
+    return {'id': index, 'white': white, 'black': black, 'opening': opening_name, 'seed': seed,
+            'result': result, 'termination': termination, 'starting_fen': board.root().fen(),
+            'moves': [move.uci() for move in board.move_stack],
+            'sides': {'white': per_side[chess.WHITE], 'black': per_side[chess.BLACK]}}
+
+
+def _play(board, providers, rng, max_plies):
+    """Play `board` out in place. Returns (result, termination, per-colour move stats)."""
+    opening_plies = len(board.move_stack)
+    per_side = {chess.WHITE: {'latencies_ms': [], 'nodes': 0, 'search_ms': 0.0},
+                chess.BLACK: {'latencies_ms': [], 'nodes': 0, 'search_ms': 0.0}}
+    termination, result = None, None
+    while True:
+        outcome = board.outcome(claim_draw=True)
+        if outcome is not None:
+            result, termination = outcome.result(), outcome.termination.name.lower()
+            break
+        if len(board.move_stack) - opening_plies >= max_plies:
+            result, termination = '1/2-1/2', 'max_plies'
+            break
+        side = board.turn
+        started = time.perf_counter()
+        try:
+            uci, nodes = providers[side].choose(board, rng)
+            move = chess.Move.from_uci(uci) if uci else None
+        except Exception as e:
+            print(f"!!! {providers[side].spec} failed: {e!r} !!!")
+            move, nodes = None, 0
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        if move is None or move not in board.legal_moves:
+            result, termination = ('0-1' if side == chess.WHITE else '1-0'), 'illegal_move'
+            break
+        per_side[side]['latencies_ms'].append(elapsed_ms)
+        if nodes:
+            per_side[side]['nodes'] += nodes
+            per_side[side]['search_ms'] += elapsed_ms
+        board.push(move)
+    return result, termination, per_side
+
+
+def moves_json(game):
+    """The game in the moves_json style GameLog / match files use: [{"turn", "move_san"}, ...]."""
+    board = chess.Board(game['starting_fen'])
+    history = []
+    for uci in game['moves']:
+        move = chess.Move.from_uci(uci)
+        history.append({"turn": board.fullmove_number, "move_san": board.san(move)})
+        board.push(move)
+    return history
+
+
+# --- Reporting ---
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None}
+    values = sorted(values)
+    pick = lambda pct: round(values[min(len(values) - 1, int(len(values) * pct / 100.0))], 2)
+    return {'p50': pick(50), 'p90': pick(90), 'p99': pick(99)}
+
+
+def _elo(score):
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_estimate(scores):
+    """(elo, low, high): rating difference from per-game scores (1, 0.5, 0) with a 95% interval."""
+    n = len(scores)
+    if not n:
+        return None, None, None
+    mean = sum(scores) / n
+    deviation = statistics.pstdev(scores)
+    if deviation == 0:
+        # All wins, all draws or all losses: use the spread of a Laplace-smoothed score instead.
+        smoothed = (sum(scores) + 0.5) / (n + 1)
+        deviation = math.sqrt(smoothed * (1.0 - smoothed))
+    stderr = deviation / math.sqrt(n)
+    # Keep the score off 0 and 1, where the logistic curve is infinite.
+    clip = lambda s: min(max(s, 0.5 / (n + 1)), 1.0 - 0.5 / (n + 1))
+    return (round(_elo(clip(mean)), 1), round(_elo(clip(mean - 1.96 * stderr)), 1),
+            round(_elo(clip(mean + 1.96 * stderr)), 1))
+
+
+def summarize(games, player_a, player_b, wall_seconds):
+    """Aggregate report; scores and Elo are from player A's point of view."""
+    scores, wins, draws, losses = [], 0, 0, 0
+    providers = {player_a: {'latencies_ms': [], 'nodes': 0, 'search_ms': 0.0},
+                 player_b: {'latencies_ms': [], 'nodes': 0, 'search_ms': 0.0}}
+    terminations = {}
+    plies = 0
+    for game in games:
+        a_is_white = game['white'] == player_a
+        points = {'1-0': 1.0, '0-1': 0.0}.get(game['result'], 0.5)
+        score = points if a_is_white else 1.0 - points
+        scores.append(score)
+        wins += score == 1.0
+        draws += score == 0.5
+        losses += score == 0.0
+        terminations[game['termination']] = terminations.get(game['termination'], 0) + 1
+        plies += sum(len(side['latencies_ms']) for side in game['sides'].values())
+        for color, name in (('white', game['white']), ('black', game['black'])):
+            side, total = game['sides'][color], providers[name]
+            total['latencies_ms'].extend(side['latencies_ms'])
+            total['nodes'] += side['nodes']
+            total['search_ms'] += side['search_ms']
+    elo, low, high = elo_estimate(scores)
+    per_provider = {}
+    for name, total in providers.items():
+        per_provider[name] = dict(_percentiles(total['latencies_ms']), moves=len(total['latencies_ms']),
+                                  nodes=total['nodes'],
+                                  nodes_per_s=round(total['nodes'] / (total['search_ms'] / 1000.0))
+                                  if total['search_ms'] else None)
+    return {'player_a': player_a, 'player_b': player_b, 'games': len(games),
+            'wins': wins, 'draws': draws, 'losses': losses,
+            'score': round(sum(scores) / len(scores), 4) if scores else None,
+            'elo': elo, 'elo_95': [low, high],
+            'wall_s': round(wall_seconds, 2),
+            'games_per_s': round(len(games) / wall_seconds, 3) if wall_seconds else None,
+            'moves_per_s': round(plies / wall_seconds, 1) if wall_seconds else None,
+            'terminations': terminations, 'latency_ms': per_provider}
+
+
+def run_tournament(player_a, player_b, games=10, workers=None, openings=None, seed=1,
+                   max_plies=TOURNAMENT_MAX_PLIES, styles=None, progress=None):
+    """Play `games` games between two provider specs across a process pool.
+
+    Game i uses opening i // 2 (cycling through the suite) and seed + i;
+    colours alternate so each opening is played from both sides.
+    """
+    openings = openings or OPENINGS
+    styles = styles or {}
+    tasks = []
+    for i in range(games):
+        white, black = (player_a, player_b) if i % 2 == 0 else (player_b, player_a)
+        name, line = openings[(i // 2) % len(openings)]
+        tasks.append((i, white, black, styles, name, line, seed + i, max_plies))
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, task) for task in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress is not None:
+                progress(results[-1], len(results), games)
+    wall = time.perf_counter() - start
+    results.sort(key=lambda game: game['id'])
+    return results, summarize(results, player_a, player_b, wall)
@@ -0,0 +1,207 @@
+# app/uci_pool.py (Pool of Warm Stockfish Processes)
+import os
+import queue
+import shutil
+import threading
+import time
+import chess
+import chess.engine
+
+# --- Configuration ---
+# build.sh compiles Stockfish into ./pystockfish-engine
+STOCKFISH_PATH = os.environ.get('STOCKFISH_PATH', 'pystockfish-engine')
+UCI_POOL_SIZE = int(os.environ.get('UCI_POOL_SIZE', os.cpu_count() or 1))
+UCI_CHECKOUT_TIMEOUT = float(os.environ.get('UCI_CHECKOUT_TIMEOUT', 2.0))
+UCI_HASH_MB = int(os.environ.get('UCI_HASH_MB', 16))
+UCI_DEFAULT_MOVE_TIME_MS = int(os.environ.get('UCI_DEFAULT_MOVE_TIME_MS', 100))
+# Stockfish's full strength; sent whenever a caller doesn't ask for less.
+MAX_SKILL_LEVEL = 20
+
+
+class EngineUnavailable(Exception):
+    """No engine binary, or no engine could be checked out in time."""
+
+
+def resolve_engine_path(path=STOCKFISH_PATH):
+    """Absolute path to an executable engine binary, or None."""
+    if os.path.isfile(path) and os.access(path, os.X_OK):
+        return os.path.abspath(path)
+    return shutil.which(path)
+
+
+class EnginePool:
+    """Long-lived UCI engines, started lazily and checked out one per request.
+
+    Each process runs single-threaded so the pool size maps to cores. An
+    engine that crashes or stops answering is closed and replaced on the
+    next checkout.
+    """
+
+    def __init__(self, path=STOCKFISH_PATH, size=UCI_POOL_SIZE, checkout_timeout=UCI_CHECKOUT_TIMEOUT):
+        self.path = resolve_engine_path(path)
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.restarts = 0
+        self.requests = 0
+
+    @property
+    def available(self):
+        return self.path is not None
+
+    def _start_engine(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.path)
+        engine.configure({"Threads": 1, "Hash": UCI_HASH_MB})
+        return engine
+
+    def _check_fork(self):
+        # Engines belong to the process that started them; a forked worker starts its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._idle = queue.LifoQueue()
+                    self._started = 0
+                    self._pid = os.getpid()
+
+    def _acquire(self):
+        if not self.available:
+            raise EngineUnavailable("no UCI engine binary found")
+        self._check_fork()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            start_new = self._started < self.size
+            if start_new:
+                self._started += 1
+        if start_new:
+            try:
+                return self._start_engine()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise EngineUnavailable("all engines busy")
+
+    def _release(self, engine, healthy):
+        if healthy:
+            self._idle.put(engine)
+            return
+        # Drop the broken process; the next _acquire starts a fresh one.
+        try:
+            engine.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._started -= 1
+            self.restarts += 1
+
+    def _run(self, fn, retry=True):
+        engine = self._acquire()
+        healthy = True
+        self.requests += 1
+        try:
+            return fn(engine)
+        except chess.engine.EngineTerminatedError:
+            # The process died while idle or mid-search: replace it and try once more.
+            healthy = False
+            if not retry:
+                raise
+        except (chess.engine.EngineError, TimeoutError, OSError):
+            healthy = False
+            raise
+        finally:
+            self._release(engine, healthy)
+        return self._run(fn, retry=False)
+
+    @staticmethod
+    def _limit(time_ms, depth):
+        if time_ms is None and depth is None:
+            time_ms = UCI_DEFAULT_MOVE_TIME_MS
+        return chess.engine.Limit(time=time_ms / 1000.0 if time_ms else None, depth=depth)
+
+    @staticmethod
+    def _options(skill_level):
+        # python-chess keeps per-call options on the engine, so a pooled engine would
+        # otherwise keep the last caller's Skill Level. Always say which one we want.
+        return {"Skill Level": MAX_SKILL_LEVEL if skill_level is None else skill_level}
+
+    # --- Public API ---
+    def play(self, board, time_ms=None, depth=None, skill_level=None, info=chess.engine.INFO_NONE):
+        """The engine's chess.engine.PlayResult for `board`; Skill Level weakens this move (not a PV)."""
+        limit = self._limit(time_ms, depth)
+        options = self._options(skill_level)
+        return self._run(lambda engine: engine.play(board, limit, info=info, options=options))
+
+    def best_move(self, board, time_ms=None, depth=None, skill_level=None):
+        """UCI string of the engine's move for `board`."""
+        result = self.play(board, time_ms, depth, skill_level)
+        return result.move.uci() if result.move else None
+
+    def analyse(self, board, multipv=1, time_ms=None, depth=None, skill_level=None):
+        """MultiPV analysis: a list of python-chess info dicts, best line first."""
+        limit = self._limit(time_ms, depth)
+        options = self._options(skill_level)
+        return self._run(lambda engine: engine.analyse(board, limit, multipv=multipv, options=options))
+
+    def warm_up(self):
+        """Start an engine now, so its startup is not charged to the first request."""
+        self._release(self._acquire(), True)
+
+    def health_check(self):
+        """Ping every idle engine and replace the ones that don't answer."""
+        checked = []
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                engine.ping()
+                checked.append((engine, True))
+            except Exception:
+                checked.append((engine, False))
+        for engine, healthy in checked:
+            self._release(engine, healthy)
+        return sum(1 for _, healthy in checked if healthy)
+
+    def start_health_checks(self, interval=60):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.health_check()
+                except Exception as e:
+                    print(f"!!! UCI pool health check failed: {e} !!!")
+        thread = threading.Thread(target=run, name='uci-health', daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Quit every idle engine (checked-out ones are closed when they come back unhealthy)."""
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                engine.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._started -= 1
+
+    def stats(self):
+        return {'available': self.available, 'path': self.path, 'size': self.size,
+                'started': self._started, 'idle': self._idle.qsize(),
+                'requests': self.requests, 'restarts': self.restarts}
+
+
+pool = EnginePool()
@@ -0,0 +1,130 @@
+# benchmarks/bench_boot.py (Gunicorn Worker Boot Time and Memory, Preloaded vs Per-Worker App)
+# Usage: python -m benchmarks.bench_boot [--workers 4] [--cache-entries 10000]
+#
+# Starts gunicorn with gunicorn.conf.py twice: once with GUNICORN_PRELOAD=0
+# (every worker imports and builds its own app) and once with preloading
+# (the master builds it and forks). Reports the time from fork to ready per
+# worker (post_worker_init log line), the time until every worker is up, and
+# RSS / PSS / USS per process from /proc/<pid>/smaps_rollup. PSS splits
+# shared pages between the processes mapping them, so its total is the real
+# footprint; USS is what a worker holds alone. Linux only.
+import argparse
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY = re.compile(r"--- Worker (\d+) ready in ([\d.]+) ms")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _seed_eval_cache(path, entries):
+    """A disk eval cache with `entries` live rows, the part a preloaded master warms into memory."""
+    import sqlite3
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS eval_cache (key TEXT PRIMARY KEY, best_move TEXT, pv TEXT, "
+                 "depth INTEGER, cp INTEGER, mate INTEGER, expires_at REAL NOT NULL)")
+    expires = time.time() + 3600
+    conn.executemany("INSERT OR REPLACE INTO eval_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     ((f"bench-position-{i} w - -", 'e2e4', '["e2e4", "e7e5", "g1f3", "b8c6"]', 30, i % 200, None,
+                       expires + i) for i in range(entries)))
+    conn.commit()
+    conn.close()
+
+
+def _memory(pid):
+    """{'rss': kB, 'pss': kB, 'uss': kB} from smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields.get('Rss', 0), 'pss': fields.get('Pss', 0),
+            'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)}
+
+
+def run_mode(preload, workers, env, timeout=60.0):
+    env = dict(env, GUNICORN_PRELOAD='1' if preload else '0', WEB_CONCURRENCY=str(workers),
+               PORT=str(_free_port()), PYTHONUNBUFFERED='1')
+    env.pop('APP_PRELOAD', None)
+    ready, lines = {}, []
+    all_ready = threading.Event()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'], cwd=ROOT,
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    def read():
+        for line in proc.stdout:
+            lines.append(line)
+            match = READY.search(line)
+            if match:
+                ready[int(match.group(1))] = float(match.group(2))
+                if len(ready) >= workers:
+                    all_ready.set()
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        if not all_ready.wait(timeout):
+            raise RuntimeError("gunicorn did not start:\n" + ''.join(lines[-20:]))
+        startup_s = time.perf_counter() - start
+        time.sleep(1.0)  # let the per-worker threads settle
+        memory = {pid: _memory(pid) for pid in ready}
+        master = _memory(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        reader.join(5)
+    return {'startup_s': startup_s, 'boot_ms': ready, 'memory': memory, 'master': master}
+
+
+def _summary(name, result):
+    boots = sorted(result['boot_ms'].values())
+    memory = list(result['memory'].values())
+    mean = lambda key: sum(m[key] for m in memory) / len(memory) / 1024.0
+    total_pss = (sum(m['pss'] for m in memory) + result['master']['pss']) / 1024.0
+    print(f"{name:<10} {result['startup_s']:>8.2f}s {boots[len(boots) // 2]:>9.1f}ms {boots[-1]:>9.1f}ms "
+          f"{mean('rss'):>8.1f} {mean('pss'):>8.1f} {mean('uss'):>8.1f} {result['master']['rss'] / 1024.0:>8.1f} "
+          f"{total_pss:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker boot time and memory with and without preload_app.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cache-entries", type=int, default=10000, help="live rows in the scratch eval cache")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-boot-')
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               EVAL_CACHE_PATH=os.path.join(workdir, 'eval_cache.sqlite3'),
+               GAMELOG_SPOOL_PATH=os.path.join(workdir, 'spool.jsonl'),
+               PONDER_ENABLED='0')
+    _seed_eval_cache(env['EVAL_CACHE_PATH'], args.cache_entries)
+
+    results = {'per-worker': run_mode(False, args.workers, env), 'preloaded': run_mode(True, args.workers, env)}
+    print(f"{args.workers} workers; memory in MiB per worker (mean) and for the master")
+    print(f"{'mode':<10} {'all up':>9} {'boot p50':>11} {'boot max':>11} {'RSS':>8} {'PSS':>8} {'USS':>8} "
+          f"{'master':>8} {'total PSS':>9}")
+    for name, result in results.items():
+        _summary(name, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_core.py (Evaluation, Search and Perft over the Position Suite)
+# Usage: python -m benchmarks.bench_core [--seconds 1.0] [--depth 3] [--perft-depth 3]
+import argparse
+import contextlib
+import io
+import time
+import chess
+from benchmarks.positions import PERFT_SUITE, boards, perft
+
+
+def bench_evaluate_board(seconds=1.0):
+    """ai.evaluate_board calls per second, cycling through the suite."""
+    from app.ai import evaluate_board
+    suite = boards()
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for board in suite:
+            evaluate_board(board)
+        calls += len(suite)
+    return calls / (time.perf_counter() - start)
+
+
+def bench_simple_best_move(depth=3):
+    """Mean ms per ai.get_simple_best_move at a fixed depth, and the search's nodes/s."""
+    from app import engine
+    from app.ai import get_simple_best_move
+    suite = boards()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # it logs every search
+        for board in suite:
+            get_simple_best_move(board, time_limit_ms=10 ** 7, max_depth=depth)
+    mean_ms = (time.perf_counter() - start) * 1000.0 / len(suite)
+    nodes, elapsed = 0, 0.0
+    for board in suite:
+        result = engine.search(board, time_limit_ms=10 ** 7, max_depth=depth)
+        nodes += result.nodes
+        elapsed += result.elapsed_ms / 1000.0
+    return mean_ms, nodes / elapsed if elapsed else 0.0
+
+
+def bench_perft(depth=3):
+    """Perft nodes per second; raises if any count disagrees with the reference."""
+    nodes = 0
+    start = time.perf_counter()
+    for name, fen, expected in PERFT_SUITE:
+        plies = min(depth, len(expected))
+        count = perft(chess.Board(fen), plies)
+        if count != expected[plies - 1]:
+            raise AssertionError(f"perft({plies}) of {name} is {count}, expected {expected[plies - 1]}")
+        nodes += count
+    return nodes / (time.perf_counter() - start)
+
+
+def run(seconds=1.0, depth=3, perft_depth=3):
+    """Metrics as {name: {"value", "unit", "better"}} (the format benchmarks/run.py compares)."""
+    best_move_ms, search_nps = bench_simple_best_move(depth)
+    return {
+        'evaluate_board': {'value': bench_evaluate_board(seconds), 'unit': 'calls/s', 'better': 'higher'},
+        f'simple_best_move_depth{depth}': {'value': best_move_ms, 'unit': 'ms', 'better': 'lower'},
+        f'search_depth{depth}_nodes': {'value': search_nps, 'unit': 'nodes/s', 'better': 'higher'},
+        f'perft{perft_depth}': {'value': bench_perft(perft_depth), 'unit': 'nodes/s', 'better': 'higher'},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Core hot paths over the standard position suite.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time for the evaluate_board loop")
+    parser.add_argument("--depth", type=int, default=3, help="search depth for get_simple_best_move")
+    parser.add_argument("--perft-depth", type=int, default=3)
+    args = parser.parse_args()
+    for name, metric in run(args.seconds, args.depth, args.perft_depth).items():
+        print(f"{name:<28} {metric['value']:>14,.1f} {metric['unit']}")
+
+
+if __name__ == '__main__':
+    main()
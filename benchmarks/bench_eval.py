@@ -0,0 +1,112 @@
+# benchmarks/bench_eval.py (Leaf Evaluation Microbenchmark)
+# Usage: python -m benchmarks.bench_eval [--seconds 1.0]
+import argparse
+import time
+import chess
+from app import evaluation
+
+POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+]
+
+
+# The evaluate_board that app/ai.py used before the bitboard evaluator.
+def legacy_evaluate_board(board):
+    piece_values = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+    score = 0
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece:
+            value = piece_values[piece.piece_type]
+            score += value if piece.color == chess.WHITE else -value
+    return score
+
+
+def _rate(fn, seconds):
+    # Runs fn() repeatedly; fn returns how many leaves it scored.
+    leaves = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        leaves += fn()
+    return leaves / (time.perf_counter() - start)
+
+
+def bench_legacy(boards):
+    def run():
+        count = 0
+        for board in boards:
+            for move in board.legal_moves:
+                board.push(move)
+                legacy_evaluate_board(board)
+                board.pop()
+                count += 1
+        return count
+    return run
+
+
+def bench_full(boards):
+    def run():
+        count = 0
+        for board in boards:
+            for move in board.legal_moves:
+                board.push(move)
+                evaluation.evaluate(board)
+                board.pop()
+                count += 1
+        return count
+    return run
+
+
+def bench_incremental(boards):
+    evaluators = [evaluation.IncrementalEvaluator(board) for board in boards]
+
+    def run():
+        count = 0
+        for board, evaluator in zip(boards, evaluators):
+            for move in board.legal_moves:
+                evaluator.push(board, move)
+                evaluator.score(board)
+                evaluator.pop(board)
+                count += 1
+        return count
+    return run
+
+
+def bench_batched(boards):
+    def run():
+        count = 0
+        for board in boards:
+            count += len(evaluation.score_children(board))
+        return count
+    return run
+
+
+def run_all(seconds=1.0):
+    boards = [chess.Board(fen) for fen in POSITIONS]
+    results = {}
+    for name, factory in (("legacy_64_square_scan", bench_legacy),
+                          ("bitboard_full", bench_full),
+                          ("incremental_push_pop", bench_incremental),
+                          ("batched_children", bench_batched)):
+        results[name] = _rate(factory(boards), seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaves/second for each evaluator.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per evaluator")
+    args = parser.parse_args()
+
+    results = run_all(args.seconds)
+    baseline = results["legacy_64_square_scan"]
+    for name, rate in results.items():
+        print(f"{name:<24} {rate:>12,.0f} leaves/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
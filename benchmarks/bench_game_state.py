@@ -0,0 +1,97 @@
+# benchmarks/bench_game_state.py (Per-Move Bookkeeping vs Game Length)
+# Usage: python -m benchmarks.bench_game_state [--plies 20 100 300] [--games 20]
+#
+# What /move does around the AI call: check the player's move, push it,
+# is_game_over() before and after the reply, result(). Timed on a plain
+# chess.Board and on app.game_state.GameState, for games of growing length,
+# next to the local search's nodes/s (its repetition check used to scan the stack too).
+import argparse
+import random
+import time
+import chess
+from app import engine
+from app.game_state import GameState
+
+
+def _games(plies, count, seed=3):
+    """Random games still running after `plies` moves, mostly piece moves so they stay open."""
+    rng = random.Random(seed)
+    games = []
+    while len(games) < count:
+        board = chess.Board()
+        while len(board.move_stack) < plies and not board.is_game_over():
+            moves = list(board.legal_moves)
+            quiet = [m for m in moves if board.piece_type_at(m.from_square) != chess.PAWN]
+            board.push(rng.choice(quiet) if quiet and rng.random() < 0.8 else rng.choice(moves))
+        if len(board.move_stack) == plies and not board.is_game_over():
+            games.append(board)
+    return games
+
+
+def _one_move(board, rng):
+    """A legal move for the player and a legal reply, or None if the game would end first."""
+    move = rng.choice(list(board.legal_moves))
+    board.push(move)
+    try:
+        if board.is_game_over():
+            return None
+        return move, rng.choice(list(board.legal_moves))
+    finally:
+        board.pop()
+
+
+def _time_board(board, move, reply):
+    start = time.perf_counter()
+    assert move in board.legal_moves
+    board.push(move)
+    if not board.is_game_over():
+        board.push(reply)
+    board.result() if board.is_game_over() else None
+    return time.perf_counter() - start
+
+
+def _time_state(state, move, reply):
+    start = time.perf_counter()
+    assert state.is_legal(move)
+    state.push(move)
+    if not state.is_game_over():
+        state.push(reply)
+    state.result() if state.is_game_over() else None
+    return time.perf_counter() - start
+
+
+def run(plies=(20, 100, 300), games=20, depth=3):
+    rng = random.Random(1)
+    report = {}
+    for length in plies:
+        board_us, state_us, nodes, search_s = [], [], 0, 0.0
+        for board in _games(length, games):
+            pair = _one_move(board, rng)
+            if pair is None:
+                continue
+            state = GameState(board.copy())
+            state.is_game_over()  # warm, as after the previous request
+            board_us.append(_time_board(board.copy(), *pair) * 1e6)
+            state_us.append(_time_state(state, *pair) * 1e6)
+            start = time.perf_counter()
+            nodes += engine.search(board, time_limit_ms=10 ** 7, max_depth=depth).nodes
+            search_s += time.perf_counter() - start
+        report[length] = {'board_us': sum(board_us) / len(board_us), 'state_us': sum(state_us) / len(state_us),
+                          'search_nps': nodes / search_s}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-move bookkeeping cost against game length.")
+    parser.add_argument("--plies", type=int, nargs='+', default=[20, 100, 300])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=3, help="fixed search depth for the search column")
+    args = parser.parse_args()
+    report = run(args.plies, args.games, args.depth)
+    print(f"{'plies':>6} {'chess.Board':>12} {'GameState':>10} {'search':>12}")
+    for length, r in report.items():
+        print(f"{length:>6} {r['board_us']:>10.1f}us {r['state_us']:>8.1f}us {r['search_nps']:>7,.0f} n/s")
+
+
+if __name__ == '__main__':
+    main()
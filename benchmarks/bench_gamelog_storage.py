@@ -0,0 +1,105 @@
+# benchmarks/bench_gamelog_storage.py (GameLog: JSON vs Packed Storage)
+# Usage: python -m benchmarks.bench_gamelog_storage [--users 50] [--games 40]
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import chess
+
+
+def _random_history(rng, max_plies=80):
+    board = chess.Board()
+    history = []
+    while not board.is_game_over() and len(history) < max_plies:
+        move = rng.choice(list(board.legal_moves))
+        entry = {"turn": board.fullmove_number, "move_san": board.san(move)}
+        if board.turn == chess.WHITE:
+            # Player moves carry the chess_game.py annotations.
+            entry.update({"move_rank": rng.randint(1, 20), "total_options": board.legal_moves.count(),
+                          "piece": board.piece_at(move.from_square).symbol(),
+                          "is_capture": board.is_capture(move), "is_check": board.gives_check(move)})
+        history.append(entry)
+        board.push(move)
+    return history
+
+
+def _timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def run(users=50, games_per_user=40, seed=1):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from app import create_app, db
+    from app.models import User, GameLog
+    from app.migrations import migrate_game_log
+    import sqlalchemy as sa
+
+    app = create_app()
+    rng = random.Random(seed)
+    report = {}
+    with app.app_context():
+        # Start from the legacy layout: no composite indexes, JSON rows only.
+        for index in GameLog.__table__.indexes:
+            index.drop(db.engine, checkfirst=True)
+        for u in range(users):
+            user = User(username=f'bench{u}', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            for _ in range(games_per_user):
+                db.session.add(GameLog(user_id=user.id, result='*', moves_json=json.dumps(_random_history(rng))))
+        db.session.commit()
+        probe_user = users // 2 + 1
+
+        def recent_rows():
+            db.session.expire_all()
+            return (GameLog.query.filter_by(user_id=probe_user)
+                    .order_by(GameLog.played_at.desc()).limit(20).all())
+
+        def measure():
+            return {
+                'move_bytes': stored_bytes(),
+                # Row fetch only: packed rows are not decoded until accessed.
+                'query_ms': _timed(recent_rows),
+                # chess.Move lists (what replay/analysis needs).
+                'moves_ms': _timed(lambda: [row.moves for row in recent_rows()]),
+                # Full moves_json style dicts with SAN (what exports need).
+                'history_ms': _timed(lambda: [row.history() for row in recent_rows()], repeat=5),
+            }
+
+        def stored_bytes():
+            return db.session.execute(sa.text(
+                "SELECT SUM(LENGTH(moves_json)) + COALESCE(SUM(LENGTH(moves_blob)), 0) "
+                "+ COALESCE(SUM(LENGTH(annotations_blob)), 0) FROM game_log")).scalar()
+
+        report['json'] = measure()
+        start = time.perf_counter()
+        migration = migrate_game_log()
+        report['migration'] = dict(migration, seconds=time.perf_counter() - start)
+        db.session.execute(sa.text("VACUUM"))
+        report['packed'] = measure()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage size and query time: JSON vs packed GameLog.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--games", type=int, default=40, help="games per user")
+    args = parser.parse_args()
+    report = run(args.users, args.games)
+    print("Latest 20 games of one user (ms): query only / + decode to moves / + full SAN history")
+    for form in ('json', 'packed'):
+        r = report[form]
+        print(f"{form:<7} move data: {r['move_bytes']:>10,} bytes   "
+              f"{r['query_ms']:.2f} / {r['moves_ms']:.2f} / {r['history_ms']:.2f}")
+    print(f"size ratio: {report['json']['move_bytes'] / report['packed']['move_bytes']:.1f}x smaller; "
+          f"migration: {report['migration']}")
+
+
+if __name__ == '__main__':
+    main()
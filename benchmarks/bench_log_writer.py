@@ -0,0 +1,108 @@
+# benchmarks/bench_log_writer.py (GameLog Writes: Synchronous Commit vs Write-Behind)
+# Usage: python -m benchmarks.bench_log_writer [--threads 16] [--games 200]
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import chess
+
+
+def _random_board(rng, max_plies=80):
+    board = chess.Board()
+    while not board.is_game_over() and len(board.move_stack) < max_plies:
+        board.push(rng.choice(list(board.legal_moves)))
+    return board
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))] * 1000.0
+
+
+def _load(app, boards_per_thread, save):
+    """Each thread finishes its games back to back; returns per-call latencies and wall time."""
+    latencies = []
+    lock = threading.Lock()
+
+    def player(boards):
+        mine = []
+        with app.app_context():
+            for board in boards:
+                start = time.perf_counter()
+                save(board)
+                mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=player, args=(boards,)) for boards in boards_per_thread]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, time.perf_counter() - start
+
+
+def run(threads=16, games_per_thread=200):
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['GAMELOG_SPOOL_PATH'] = os.path.join(workdir, 'spool.jsonl')
+    from app import create_app, db
+    from app.models import User, GameLog
+    from app.log_writer import writer, game_record
+
+    app = create_app()
+    writer.update_profiles = False  # measure the write path alone
+    with app.app_context():
+        user = User(username='bench', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def sync_save(board):
+        # The old save_game_log: one INSERT + COMMIT inside the request.
+        record = game_record(user_id, board, board.result(claim_draw=True))
+        db.session.add(GameLog(**record))
+        db.session.commit()
+
+    def behind_save(board):
+        writer.submit(game_record(user_id, board, board.result(claim_draw=True)))
+
+    rng = random.Random(1)
+    boards_per_thread = [[_random_board(rng) for _ in range(games_per_thread)] for _ in range(threads)]
+    report = {}
+    total = threads * games_per_thread
+    for name, save in (('sync', sync_save), ('write_behind', behind_save)):
+        start = time.perf_counter()
+        latencies, _ = _load(app, boards_per_thread, save)
+        writer.flush(timeout=60)
+        # Throughput counts until the last row is committed, not just queued.
+        wall = time.perf_counter() - start
+        with app.app_context():
+            rows = GameLog.query.count()
+        report[name] = {'games': total, 'rows_after': rows, 'wall_s': wall,
+                        'games_per_s': total / wall,
+                        'p50_ms': _percentile(latencies, 50), 'p99_ms': _percentile(latencies, 99),
+                        'max_ms': max(latencies) * 1000.0}
+    report['writer'] = writer.stats()
+    writer.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of ending a game: commit in the request vs write-behind.")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--games", type=int, default=200, help="games per thread")
+    args = parser.parse_args()
+    report = run(args.threads, args.games)
+    for name in ('sync', 'write_behind'):
+        r = report[name]
+        print(f"{name:<13} {r['games_per_s']:>9,.0f} games/s   p50 {r['p50_ms']:.2f} ms   "
+              f"p99 {r['p99_ms']:.2f} ms   max {r['max_ms']:.2f} ms   rows {r['rows_after']}")
+    print(f"writer: {report['writer']}")
+
+
+if __name__ == '__main__':
+    main()
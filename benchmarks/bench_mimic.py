@@ -0,0 +1,83 @@
+# benchmarks/bench_mimic.py (Cost and Behaviour of Mimic Move Selection)
+# Usage: python -m benchmarks.bench_mimic [--positions 500]
+import argparse
+import random
+import time
+import chess
+from app import evaluation, mimic
+
+# Profiles in the UserProfile.to_style() shape, from a careful positional player to a wild one.
+PROFILES = {
+    'precise': {'aggression': 0.10, 'avg_rank_percent': 0.08, 'moves_analyzed': 500,
+                'piece_preference': {'P': 150, 'N': 80, 'B': 90, 'R': 60, 'Q': 40, 'K': 30}},
+    'average': {'aggression': 0.25, 'avg_rank_percent': 0.25, 'moves_analyzed': 500,
+                'piece_preference': {'P': 120, 'N': 100, 'B': 80, 'R': 60, 'Q': 90, 'K': 50}},
+    'wild': {'aggression': 0.60, 'avg_rank_percent': 0.45, 'moves_analyzed': 500,
+             'piece_preference': {'P': 60, 'N': 60, 'B': 60, 'R': 40, 'Q': 240, 'K': 40}},
+}
+
+
+def _positions(count, seed=7):
+    """Positions from games where both sides mostly play the static best move."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(6, 60)):
+            if board.is_game_over():
+                break
+            if rng.random() < 0.7:
+                board.push(chess.Move.from_uci(_best_static(board)))
+            else:
+                board.push(rng.choice(list(board.legal_moves)))
+        if not board.is_game_over():
+            positions.append(board)
+    return positions
+
+
+def _best_static(board):
+    sign = 1 if board.turn == chess.WHITE else -1
+    return max(evaluation.score_children(board), key=lambda item: sign * item[1])[0].uci()
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+def run(positions=500, temperature=mimic.MIMIC_TEMPERATURE):
+    boards = _positions(positions)
+    best_moves = [_best_static(board) for board in boards]
+    rng = random.Random(1)
+    report = {}
+    for name, style in PROFILES.items():
+        timings, top, aggressive = [], 0, 0
+        for board, best in zip(boards, best_moves):
+            start = time.perf_counter()
+            move = mimic.choose_move(board, style, best, temperature=temperature, rng=rng)
+            timings.append((time.perf_counter() - start) * 1e6)
+            chosen = chess.Move.from_uci(move)
+            top += move == best
+            aggressive += board.is_capture(chosen) or board.gives_check(chosen)
+        report[name] = {'mean_us': sum(timings) / len(timings), 'p50_us': _percentile(timings, 50),
+                        'p99_us': _percentile(timings, 99), 'best_move_rate': top / len(boards),
+                        'aggression': aggressive / len(boards)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time added by mimic selection on top of best-move play.")
+    parser.add_argument("--positions", type=int, default=500)
+    parser.add_argument("--temperature", type=float, default=mimic.MIMIC_TEMPERATURE)
+    args = parser.parse_args()
+    report = run(args.positions, args.temperature)
+    print(f"{'profile':<8} {'mean':>8} {'p50':>8} {'p99':>8}   best-move  aggressive  (added per move, us)")
+    for name, r in report.items():
+        print(f"{name:<8} {r['mean_us']:>8.1f} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f}   "
+              f"{r['best_move_rate']:>8.0%}  {r['aggression']:>9.0%}")
+    worst = max(r['p99_us'] for r in report.values())
+    print(f"budget: p99 {worst:.0f} us of 1000 us -> {'OK' if worst < 1000 else 'OVER BUDGET'}")
+
+
+if __name__ == '__main__':
+    main()
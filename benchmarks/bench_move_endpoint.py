@@ -0,0 +1,111 @@
+# benchmarks/bench_move_endpoint.py (End-to-End /move Load Test)
+# Usage: python -m benchmarks.bench_move_endpoint [--players 8] [--moves 20] [--stub-latency-ms 20]
+#
+# Drives POST /move through the Flask test client, with the cloud-eval API
+# replaced by benchmarks/stub_cloud_eval.py. The app reads its configuration
+# at import time, so prepare_environment() must run before anything imports app.*.
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from benchmarks.stub_cloud_eval import StubConfig, start_stub_server
+
+
+def prepare_environment(stub_latency_ms=20.0, unknown_after_ply=None):
+    """Scratch database and caches, stub cloud eval, no background pondering. Returns the stub server."""
+    workdir = tempfile.mkdtemp(prefix='bench-move-')
+    server, _, url = start_stub_server(StubConfig(latency_ms=stub_latency_ms, unknown_after_ply=unknown_after_ply,
+                                                  seed=1))
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'EVAL_CACHE_PATH': os.path.join(workdir, 'eval_cache.sqlite3'),
+        'OPENING_BOOK_PATH': os.path.join(workdir, 'no_book.bin'),
+        'GAMELOG_SPOOL_PATH': os.path.join(workdir, 'spool.jsonl'),
+        'CLOUD_EVAL_URL': url,
+        'PONDER_ENABLED': '0',
+        'STOCKFISH_PATH': os.path.join(workdir, 'no-engine'),
+    })
+    return server
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+def run(players=8, moves_per_player=20, seed=1):
+    """Each player thread logs in and plays random legal moves against /move."""
+    import chess
+    from app import create_app, db
+    from app.models import User
+
+    app = create_app()
+    with app.app_context():
+        for i in range(players):
+            user = User(username=f'bench{i}')
+            user.set_password('bench')
+            db.session.add(user)
+        db.session.commit()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def player(index):
+        rng = random.Random(seed + index)
+        client = app.test_client()
+        client.post('/login', data={'username': f'bench{index}', 'password': 'bench'})
+        client.get('/')  # starts a game
+        board = chess.Board()
+        mine, failed = [], 0
+        for _ in range(moves_per_player):
+            if board.is_game_over():
+                client.get('/')
+                board = chess.Board()
+            move = rng.choice(list(board.legal_moves))
+            start = time.perf_counter()
+            response = client.post('/move', json={'move': move.uci()})
+            mine.append((time.perf_counter() - start) * 1000.0)
+            data = response.get_json(silent=True) or {}
+            if response.status_code != 200:
+                failed += 1
+                continue
+            board.push(move)
+            if data.get('ai_move'):
+                board.push_uci(data['ai_move'])
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=player, args=(i,)) for i in range(players)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        'move_requests_per_s': {'value': len(latencies) / wall, 'unit': 'req/s', 'better': 'higher'},
+        'move_p50': {'value': _percentile(latencies, 50), 'unit': 'ms', 'better': 'lower'},
+        'move_p95': {'value': _percentile(latencies, 95), 'unit': 'ms', 'better': 'lower'},
+        'move_p99': {'value': _percentile(latencies, 99), 'unit': 'ms', 'better': 'lower'},
+        'move_errors': {'value': sum(errors), 'unit': 'requests', 'better': 'lower'},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput of POST /move against a stub cloud.")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--moves", type=int, default=20, help="moves per player")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    parser.add_argument("--unknown-after-ply", type=int, default=None,
+                        help="stub answers 404 past this ply, forcing local search")
+    args = parser.parse_args()
+    prepare_environment(args.stub_latency_ms, args.unknown_after_ply)
+    for name, metric in run(args.players, args.moves).items():
+        print(f"{name:<22} {metric['value']:>10,.1f} {metric['unit']}")
+
+
+if __name__ == '__main__':
+    main()
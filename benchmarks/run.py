@@ -0,0 +1,120 @@
+# benchmarks/run.py (Run the Benchmark Suite and Compare Against a Baseline)
+# Usage: python -m benchmarks.run                    run, write results, compare with the baseline
+#        python -m benchmarks.run --save-baseline    run and make these results the new baseline
+#
+# Exits 1 when a metric regressed by more than its threshold, so it can gate CI.
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+
+# Allowed relative regression per metric (prefix match); end-to-end timings are noisier.
+DEFAULT_THRESHOLD = 0.10
+THRESHOLDS = {
+    'move_': 0.25,
+}
+
+
+def threshold_for(name, default=DEFAULT_THRESHOLD):
+    for prefix, threshold in THRESHOLDS.items():
+        if name.startswith(prefix):
+            return threshold
+    return default
+
+
+def run_suites(suites, quick=False):
+    # The /move bench must configure the environment before any app module is imported.
+    metrics = {}
+    if 'move' in suites:
+        from benchmarks import bench_move_endpoint
+        bench_move_endpoint.prepare_environment()
+    if 'core' in suites:
+        from benchmarks import bench_core
+        print("Running core benchmarks (evaluate_board, get_simple_best_move, perft)...")
+        metrics.update(bench_core.run(seconds=0.5 if quick else 2.0, depth=3, perft_depth=3))
+    if 'move' in suites:
+        print("Running /move load test against the stub cloud-eval server...")
+        with contextlib.redirect_stdout(io.StringIO()):  # the app logs every move
+            metrics.update(bench_move_endpoint.run(players=4 if quick else 8, moves_per_player=10 if quick else 25))
+    return metrics
+
+
+def compare(metrics, baseline, default_threshold=DEFAULT_THRESHOLD):
+    """[(name, baseline, current, change, threshold, regressed)] for metrics present in both."""
+    rows = []
+    for name, metric in metrics.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        old, new = base['value'], metric['value']
+        threshold = threshold_for(name, default_threshold)
+        change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+        if metric['better'] == 'higher':
+            regressed = new < old * (1.0 - threshold)
+        else:
+            regressed = new > old * (1.0 + threshold) if old else new > old
+        rows.append((name, old, new, change, threshold, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmarks and compare with a stored baseline.")
+    parser.add_argument("--suite", choices=['core', 'move'], action='append',
+                        help="run only this suite (repeatable; default: all)")
+    parser.add_argument("--quick", action='store_true', help="shorter runs, for a smoke test")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action='store_true')
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative regression for metrics without their own threshold")
+    args = parser.parse_args()
+
+    metrics = run_suites(set(args.suite or ['core', 'move']), quick=args.quick)
+    results = {'created_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'machine': platform.platform(),
+               'quick': args.quick, 'metrics': metrics}
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        for name, metric in metrics.items():
+            print(f"  {name:<28} {metric['value']:>14,.1f} {metric['unit']}")
+        return 0
+    if baseline.get('machine') != results['machine']:
+        print(f"Note: baseline was recorded on {baseline.get('machine')}.")
+
+    rows = compare(metrics, baseline['metrics'], args.threshold)
+    print(f"{'metric':<28} {'baseline':>14} {'current':>14} {'change':>8}  limit")
+    for name, old, new, change, threshold, regressed in rows:
+        flag = 'REGRESSION' if regressed else 'ok'
+        print(f"{name:<28} {old:>14,.1f} {new:>14,.1f} {change:>+7.1%}  {threshold:.0%}  {flag}")
+    regressions = [row[0] for row in rows if row[5]]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
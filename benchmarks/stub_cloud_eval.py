@@ -0,0 +1,107 @@
+# benchmarks/stub_cloud_eval.py (Local Stand-in for lichess /api/cloud-eval)
+# Usage: python -m benchmarks.stub_cloud_eval --port 8765 --latency-ms 200 --error-rate 0.1
+# then:  CLOUD_EVAL_URL=http://127.0.0.1:8765/api/cloud-eval python run.py
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import chess
+
+
+class StubConfig:
+    """Knobs the handler reads on every request; change them while the server runs."""
+
+    def __init__(self, latency_ms=0.0, error_rate=0.0, error_status=503, unknown_after_ply=None, seed=None):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Answer 404 for positions deeper than this many plies (None = know everything).
+        self.unknown_after_ply = unknown_after_ply
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _answer(board):
+    # Deterministic "best" move: first legal move in UCI order.
+    moves = sorted(move.uci() for move in board.legal_moves)
+    if not moves:
+        return None
+    return {"fen": board.fen(), "knodes": 1, "depth": 1, "pvs": [{"moves": moves[0], "cp": 0}]}
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            with config.lock:
+                config.requests += 1
+                fail = config.random.random() < config.error_rate
+            if config.latency_ms:
+                time.sleep(config.latency_ms / 1000.0)
+            if fail:
+                return self._send(config.error_status, {"error": "injected failure"})
+            url = urlparse(self.path)
+            fen = parse_qs(url.query).get("fen", [None])[0]
+            try:
+                board = chess.Board(fen)
+            except (TypeError, ValueError):
+                return self._send(400, {"error": "bad fen"})
+            ply = (board.fullmove_number - 1) * 2 + (0 if board.turn == chess.WHITE else 1)
+            if config.unknown_after_ply is not None and ply > config.unknown_after_ply:
+                return self._send(404, {"error": "Not found"})
+            answer = _answer(board)
+            if answer is None:
+                return self._send(404, {"error": "Not found"})
+            return self._send(200, answer)
+
+    return Handler
+
+
+def start_stub_server(config=None, host="127.0.0.1", port=0):
+    """Start the stub in a daemon thread. Returns (server, config, url)."""
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_address[1]}/api/cloud-eval"
+    return server, config, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub cloud-eval server with injectable latency and errors.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--unknown-after-ply", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.error_rate, args.error_status, args.unknown_after_ply)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"Stub cloud-eval listening on http://{args.host}:{args.port}/api/cloud-eval")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# gunicorn.conf.py (Preloaded, Fork-Friendly Gunicorn Settings)
+# Usage: gunicorn -c gunicorn.conf.py run:app
+#
+# With preload_app the master builds the app once: schema check, opening
+# book, piece-square tables, warmed eval cache. Workers are forked from it
+# and share those pages copy-on-write. Whatever must not cross a fork
+# (threads, DB connections, HTTP sessions, Stockfish processes) is started
+# per worker in post_fork or opened lazily on first use. Metrics are summed
+# across workers through PROMETHEUS_MULTIPROC_DIR (see app/metrics.py).
+import os
+import time
+
+# --- Configuration ---
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+wsgi_app = 'run:app'
+
+if preload_app:
+    # Read by app.create_app() when run.py is imported in the master.
+    os.environ['APP_PRELOAD'] = '1'
+
+# Workers share their metrics through this directory, so /metrics reports all of them.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+
+def on_starting(server):
+    from app import metrics
+    metrics.clear_multiproc_dir()
+
+
+def pre_fork(server, worker):
+    worker.spawned_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import start_worker
+        start_worker(worker.app.wsgi())
+
+
+def post_worker_init(worker):
+    booted_ms = (time.monotonic() - worker.spawned_at) * 1000.0
+    print(f"--- Worker {worker.pid} ready in {booted_ms:.1f} ms "
+          f"({'preloaded' if preload_app else 'own app'}). ---", flush=True)
+
+
+def worker_exit(server, worker):
+    from app import stop_worker
+    stop_worker()
@@ -0,0 +1,50 @@
+# tests/conftest.py (Scratch App: Temporary Files, No Network, No Stockfish)
+import os
+import tempfile
+import uuid
+import pytest
+
+# Read at import by the app modules, so set before any test imports them.
+_WORKDIR = tempfile.mkdtemp(prefix='mimic-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}",
+    'EVAL_CACHE_PATH': os.path.join(_WORKDIR, 'eval_cache.sqlite3'),
+    'OPENING_BOOK_PATH': os.path.join(_WORKDIR, 'opening_book.bin'),
+    'GAMELOG_SPOOL_PATH': os.path.join(_WORKDIR, 'gamelog_spool.jsonl'),
+    'GAMELOG_DEAD_LETTER_PATH': os.path.join(_WORKDIR, 'gamelog_dead_letter.jsonl'),
+    'CLOUD_EVAL_URL': 'http://127.0.0.1:9/cloud-eval',
+    'STOCKFISH_PATH': os.path.join(_WORKDIR, 'no-engine'),
+    'AI_SEARCH_TIME_MS': '20',
+    'AI_HEDGE_DEADLINE_MS': '20',
+    'PONDER_ENABLED': '0',
+    'APP_PRELOAD': '0',
+})
+
+
+@pytest.fixture(scope='session')
+def app():
+    # One app per run: the game-log writer and other per-process singletons bind to the first one.
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def user(app):
+    from app import db
+    from app.models import User
+    with app.app_context():
+        user = User(username=f"player-{uuid.uuid4().hex[:8]}")
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        return user.id, user.username
+
+
+@pytest.fixture
+def client(app, user):
+    """A logged-in test client with a fresh game (GET / starts one)."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'], session['username'] = user
+    client.get('/')
+    return client
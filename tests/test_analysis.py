@@ -0,0 +1,45 @@
+# tests/test_analysis.py (Style Profiles from Logged Games)
+import chess
+from app import analysis, db
+from app.models import GameLog, UserProfile
+
+ENDGAME_FEN = '4k3/8/8/8/8/8/4P3/4K2R w K - 0 1'
+
+
+def _history(fen, sans):
+    board = chess.Board(fen)
+    history = []
+    for san in sans:
+        history.append({'turn': board.fullmove_number, 'move_san': san})
+        board.push_san(san)
+    return history
+
+
+def test_games_from_a_custom_position_are_analysed():
+    history = _history(ENDGAME_FEN, ['e4', 'Kd7', 'Rh7+', 'Kc6', 'e5'])
+    summary = analysis.analyze_game(history, use_engine=False, starting_fen=ENDGAME_FEN)
+    assert summary['games'] == 1
+    assert summary['moves'] == 3  # the player's (White's) moves
+    assert summary['aggressive'] == 1  # Rh7+
+    assert summary['pieces'] == {'P': 2, 'R': 1}
+    # Replayed from the standard start, the log stops making sense after e4.
+    assert analysis.analyze_game(history, use_engine=False)['moves'] < 3
+
+
+def test_backfill_slices_carry_the_starting_position():
+    history = _history(ENDGAME_FEN, ['e4', 'Kd7', 'Rh7+'])
+    [(game_id, summary)] = analysis._analyze_chunk(([(7, history, ENDGAME_FEN)], False))
+    assert game_id == 7 and summary['moves'] == 2
+
+
+def test_update_profile_uses_the_logged_starting_position(app, user):
+    user_id = user[0]
+    with app.app_context():
+        db.session.add(GameLog.from_history(user_id, '1-0', _history(ENDGAME_FEN, ['e4', 'Kd7', 'Rh7+']),
+                                            starting_fen=ENDGAME_FEN))
+        db.session.commit()
+        [chunk] = [chunk for chunk in analysis._stream_game_chunks(user_id)]
+        assert chunk[0][3] == ENDGAME_FEN
+        profile = analysis.update_profile(user_id)
+        assert (profile.games_analyzed, profile.moves_analyzed) == (1, 2)
+        assert db.session.get(UserProfile, user_id).last_game_id == chunk[0][0]
@@ -0,0 +1,63 @@
+# tests/test_book.py (Building and Reading the Opening Book)
+import os
+import random
+import chess
+from app.book import BookBuilder, OpeningBook
+
+ITALIAN = 'e2e4 e7e5 g1f3 b8c6 f1c4 f8c5 e1g1'
+
+
+def _moves(line):
+    return [chess.Move.from_uci(uci) for uci in line.split()]
+
+
+def _board(line=''):
+    board = chess.Board()
+    for move in _moves(line):
+        board.push(move)
+    return board
+
+
+def _build(path, games, max_ply=20):
+    builder = BookBuilder(max_ply=max_ply)
+    builder.add_games((_moves(line), result, None) for line, result in games)
+    return builder.write(str(path))
+
+
+def test_lookup_prefers_moves_that_won(tmp_path):
+    path = tmp_path / 'book.bin'
+    stats = _build(path, [('e2e4 e7e5', '1-0'), ('e2e4 c7c5', '1/2-1/2'), ('d2d4 d7d5', '1-0'),
+                          ('d2d4 g8f6', '0-1'), ('c2c4', '0-1')])
+    assert stats['games'] == 5
+    assert stats['positions_by_ply'] == {'0': 1, '1': 2}
+    book = OpeningBook(str(path), selection='best')
+    # Wins weigh 2, draws 1, losses 0: e4 has 3, d4 2 and c4 nothing.
+    assert book.choose(chess.Board()) == 'e2e4'
+    assert book.choose(_board('d2d4')) == 'g8f6'  # won for Black; d5 lost
+    assert book.choose(_board('c2c4')) is None
+
+
+def test_castling_and_max_ply(tmp_path):
+    path = tmp_path / 'book.bin'
+    _build(path, [(ITALIAN, '1-0')])
+    book = OpeningBook(str(path), selection='best')
+    assert book.choose(_board('e2e4 e7e5 g1f3 b8c6 f1c4 f8c5')) == 'e1g1'
+
+    _build(path, [(ITALIAN, '1-0')], max_ply=2)
+    os.utime(path, (1, 1))  # a rebuild within the same clock tick still gets reopened
+    assert book.choose(_board('e2e4')) is None  # Black lost: not booked
+    assert book.choose(_board('e2e4 e7e5')) is None  # past max_ply
+    assert book.choose(chess.Board()) == 'e2e4'
+
+
+def test_missing_book_and_weighted_choice(tmp_path):
+    book = OpeningBook(str(tmp_path / 'none.bin'))
+    assert not book.load()
+    assert book.choose(chess.Board()) is None
+
+    path = tmp_path / 'book.bin'
+    _build(path, [('e2e4', '1-0'), ('d2d4', '1-0'), ('d2d4', '1-0')])
+    book = OpeningBook(str(path))
+    picks = {book.choose(chess.Board(), rng=random.Random(seed)) for seed in range(50)}
+    assert picks == {'e2e4', 'd2d4'}
+    assert book.stats()['coverage_by_ply']['0']['hit_rate'] == 1.0
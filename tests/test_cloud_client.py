@@ -0,0 +1,68 @@
+# tests/test_cloud_client.py (Circuit Breaker States)
+from app import cloud_client
+from app.cloud_client import CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(monkeypatch, failure_threshold=3, cooldown=30):
+    clock = _Clock()
+    monkeypatch.setattr(cloud_client.time, 'monotonic', clock)
+    return CircuitBreaker(failure_threshold=failure_threshold, cooldown=cooldown), clock
+
+
+def test_opens_after_consecutive_failures(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
@@ -0,0 +1,50 @@
+# tests/test_engine.py (Alpha-Beta Search: Mates, Material and Repetitions)
+import threading
+import chess
+from app import engine
+
+SEARCH_MS = 10000  # depth-limited below, so the clock never decides
+
+
+def _search(board, depth, **kwargs):
+    return engine.search(board, time_limit_ms=SEARCH_MS, max_depth=depth, **kwargs)
+
+
+def test_finds_mate_in_one():
+    for fen, mate in (('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', 'a1a8'),
+                      ('r5k1/8/8/8/8/8/5PPP/6K1 b - - 0 1', 'a8a1')):
+        result = _search(chess.Board(fen), 3)
+        assert result.move.uci() == mate
+        assert result.score >= engine.MATE_SCORE - engine.MAX_PLY
+
+
+def test_takes_a_hanging_queen():
+    result = _search(chess.Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1'), 2)
+    assert result.move.uci() == 'd2d5'
+    assert result.score > 0
+
+
+def test_no_legal_moves():
+    result = _search(chess.Board('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1'), 2)  # stalemate
+    assert result.move is None
+
+
+def test_repetition_scores_as_a_draw():
+    # Two queens down, White's only move walks back into a position seen before.
+    fen = 'k7/8/8/8/8/8/qq6/7K w - - 0 1'
+    assert _search(chess.Board(fen), 1).score < -1000
+
+    board = chess.Board(fen)
+    for uci in ('h1g1', 'a8b8', 'g1h1', 'b8a8'):
+        board.push_uci(uci)
+    result = _search(board, 1)
+    assert result.move.uci() == 'h1g1'
+    assert result.score == 0
+
+
+def test_stop_event_still_returns_a_legal_move():
+    stop = threading.Event()
+    stop.set()
+    board = chess.Board()
+    result = engine.search(board, time_limit_ms=SEARCH_MS, stop=stop)
+    assert result.move in board.legal_moves
@@ -0,0 +1,38 @@
+# tests/test_evaluation.py (Incremental Evaluation Against a Full Rescore)
+import random
+import chess
+from app import evaluation
+
+FENS = (
+    chess.STARTING_FEN,
+    'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1',
+    'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3',
+    '1n5k/P7/8/8/8/8/8/K7 w - - 0 1',
+)
+
+
+def test_incremental_matches_evaluate_through_push_and_pop():
+    for seed, fen in enumerate(FENS * 3):
+        rng = random.Random(seed)
+        board = chess.Board(fen)
+        evaluator = evaluation.IncrementalEvaluator(board)
+        scores = [evaluation.evaluate(board)]
+        while not board.is_game_over() and len(board.move_stack) < 200:
+            evaluator.push(board, rng.choice(list(board.legal_moves)))
+            scores.append(evaluation.evaluate(board))
+            assert evaluator.white_score == scores[-1]
+            sign = 1 if board.turn == chess.WHITE else -1
+            assert evaluator.score(board) == sign * scores[-1]
+        while board.move_stack:
+            evaluator.pop(board)
+            scores.pop()
+            assert evaluator.white_score == scores[-1]
+
+
+def test_score_children_matches_evaluate():
+    for fen in FENS:
+        board = chess.Board(fen)
+        for move, score in evaluation.score_children(board):
+            board.push(move)
+            assert score == evaluation.evaluate(board)
+            board.pop()
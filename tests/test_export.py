@@ -0,0 +1,45 @@
+# tests/test_export.py (Resuming an Interrupted Export)
+import datetime
+import chess
+from app import export, movecodec
+
+MOVES = [chess.Move.from_uci(uci) for uci in ('e2e4', 'e7e5', 'g1f3')]
+
+
+def _row(game_id):
+    return (game_id, 1, 'player', '*', datetime.datetime(2026, 1, game_id), None, None,
+            movecodec.encode_moves(MOVES), None)
+
+
+def _write(path, fmt, ids, cut=0):
+    render = export.game_to_pgn if fmt == 'pgn' else export.game_to_ndjson
+    data = ''.join(render(_row(game_id)) for game_id in ids).encode()
+    path.write_bytes(data[:len(data) - cut])
+    return data
+
+
+def test_missing_file_starts_from_scratch(tmp_path):
+    assert export.resume_point(str(tmp_path / 'none.pgn'), 'pgn') == (None, 0)
+    assert export.resume_point(str(tmp_path / 'none.ndjson'), 'ndjson') == (None, 0)
+
+
+def test_ndjson_keeps_complete_lines(tmp_path):
+    path = tmp_path / 'games.ndjson'
+    data = _write(path, 'ndjson', [1, 2, 3])
+    assert export.resume_point(str(path), 'ndjson') == (3, len(data))
+
+    data = _write(path, 'ndjson', [1, 2, 3], cut=10)
+    after_id, offset = export.resume_point(str(path), 'ndjson')
+    assert after_id == 2
+    assert data[:offset] == ''.join(export.game_to_ndjson(_row(i)) for i in (1, 2)).encode()
+
+
+def test_pgn_redoes_the_last_game(tmp_path):
+    path = tmp_path / 'games.pgn'
+    first_two = ''.join(export.game_to_pgn(_row(i)) for i in (1, 2)).encode()
+    for cut in (0, 5):
+        _write(path, 'pgn', [1, 2, 3], cut=cut)
+        assert export.resume_point(str(path), 'pgn') == (2, len(first_two))
+
+    _write(path, 'pgn', [1])
+    assert export.resume_point(str(path), 'pgn') == (None, 0)
@@ -0,0 +1,57 @@
+# tests/test_game_state.py (GameState Against python-chess)
+import random
+import chess
+import chess.polyglot
+from app.game_state import GameState
+
+FENS = (
+    chess.STARTING_FEN,
+    'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1',  # castling both ways
+    'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3',  # en passant available
+    '1n5k/P7/8/8/8/8/8/K7 w - - 0 1',  # promotion, with and without capture
+    '8/8/8/4k3/8/8/3K4/8 w - - 0 1',  # bare kings
+)
+
+
+def _check(state):
+    board = state.board
+    assert state.zobrist == chess.polyglot.zobrist_hash(board)
+    assert state.outcome() == board.outcome()
+    assert state.is_game_over() == board.is_game_over()
+    assert state.result() == board.result()
+
+
+def test_random_games_match_python_chess():
+    for seed, fen in enumerate(FENS * 4):
+        rng = random.Random(seed)
+        state = GameState(chess.Board(fen))
+        _check(state)
+        while not state.is_game_over() and len(state.board.move_stack) < 300:
+            state.push(rng.choice(state.legal_moves))
+            _check(state)
+
+
+def test_fivefold_repetition():
+    state = GameState()
+    shuffle = [chess.Move.from_uci(uci) for uci in ('g1f3', 'g8f6', 'f3g1', 'f6g8')]
+    for _ in range(4):
+        assert not state.is_game_over()
+        for move in shuffle:
+            state.push(move)
+            _check(state)
+    assert state.repetitions() == 5
+    assert state.outcome().termination == chess.Termination.FIVEFOLD_REPETITION
+
+
+def test_board_with_a_past_and_copies():
+    board = chess.Board()
+    for uci in ('g1f3', 'g8f6', 'f3g1', 'f6g8', 'g1f3', 'g8f6', 'f3g1', 'f6g8'):
+        board.push_uci(uci)
+    state = GameState(board)
+    assert state.repetitions() == 3
+    copy = state.copy()
+    copy.push(chess.Move.from_uci('e2e4'))
+    _check(copy)
+    _check(state)
+    assert state.repetitions() == 3
+    assert len(state.board.move_stack) == 8
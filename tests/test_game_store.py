@@ -0,0 +1,59 @@
+# tests/test_game_store.py (Shared Game Sessions Across Workers)
+import chess
+import pytest
+from app.game_store import GameStore, GameConflict, GameNotFound
+
+E4, E5, D4 = (chess.Move.from_uci(uci) for uci in ('e2e4', 'e7e5', 'd2d4'))
+
+
+@pytest.fixture
+def game(app, user):
+    with app.app_context():
+        store = GameStore()
+        yield store, store.new_game(user[0]), user[0]
+
+
+def test_moves_are_shared_between_workers(game):
+    store, game_id, user_id = game
+    other = GameStore()  # a second worker: its own hot boards, the same table
+    with store.open(game_id, user_id) as handle:
+        handle.push(E4)
+    with other.open(game_id, user_id) as handle:
+        assert handle.board.move_stack == [E4]
+        handle.push(E5)
+    with store.open(game_id, user_id) as handle:
+        assert handle.board.move_stack == [E4, E5]  # replayed onto the cached board
+    assert store.reply_after(game_id, 1, user_id)[0] == E5
+    assert store.reply_after(game_id, 2, user_id)[0] is None
+
+
+def test_concurrent_move_conflicts(game):
+    store, game_id, user_id = game
+    other = GameStore()
+    with pytest.raises(GameConflict):
+        with other.open(game_id, user_id) as late:
+            with store.open(game_id, user_id) as first:
+                first.push(E4)
+            late.push(D4)
+    with other.open(game_id, user_id) as handle:
+        assert handle.board.move_stack == [E4]  # the losing move was dropped with the cached board
+
+
+def test_other_users_cannot_open_a_game(game):
+    store, game_id, user_id = game
+    with pytest.raises(GameNotFound):
+        with store.open(game_id, user_id + 1000):
+            pass
+    with pytest.raises(GameNotFound):
+        store.reply_after('no-such-game', 0)
+
+
+def test_finish_records_the_result(game):
+    store, game_id, user_id = game
+    with store.open(game_id, user_id) as handle:
+        handle.push(E4)
+        handle.finish('1-0')
+    move, result, _ = store.reply_after(game_id, 0, user_id)
+    assert (move, result) == (E4, '1-0')
+    with store.open(game_id, user_id) as handle:
+        assert handle.result == '1-0'
@@ -0,0 +1,76 @@
+# tests/test_log_writer.py (Spool and Dead-Letter Handling of the GameLog Writer)
+import json
+import chess
+import pytest
+import sqlalchemy as sa
+from app.log_writer import GameLogWriter, game_record
+from app.models import GameLog
+
+
+def _record(user_id, moves=('e2e4', 'e7e5')):
+    board = chess.Board()
+    for uci in moves:
+        board.push_uci(uci)
+    return game_record(user_id, board, '*')
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def _logged(user_id):
+    return GameLog.query.filter_by(user_id=user_id).count()
+
+
+@pytest.fixture
+def writer(app, tmp_path):
+    # Not started, so submit() writes through on the calling thread.
+    with app.app_context():
+        yield GameLogWriter(spool_path=str(tmp_path / 'spool.jsonl'),
+                            dead_letter_path=str(tmp_path / 'dead_letter.jsonl'), update_profiles=False)
+
+
+def _database_down(monkeypatch, writer):
+    def insert(records):
+        raise sa.exc.OperationalError('INSERT INTO game_log', {}, Exception('unable to open database file'))
+    monkeypatch.setattr(writer, '_insert', insert)
+
+
+def test_games_are_spooled_while_the_database_is_down_and_replayed(writer, user, tmp_path, monkeypatch):
+    user_id = user[0]
+    with monkeypatch.context() as down:
+        _database_down(down, writer)
+        writer.submit(_record(user_id))
+        writer.submit(_record(user_id, ('d2d4',)))
+        assert writer._replay_spool() == 0  # still down: the games stay spooled
+    assert len(_lines(tmp_path / 'spool.jsonl')) == 2
+    assert _logged(user_id) == 0
+
+    assert writer._replay_spool() == 2
+    assert _lines(tmp_path / 'spool.jsonl') == []
+    assert _logged(user_id) == 2
+    assert GameLog.query.filter_by(user_id=user_id).order_by(GameLog.id).first().moves[0].uci() == 'e2e4'
+
+
+def test_rejected_games_are_dead_lettered_without_holding_back_the_batch(writer, user, tmp_path):
+    user_id = user[0]
+    bad = dict(_record(user_id), result=None)  # result is NOT NULL
+    assert writer._write([_record(user_id), bad, _record(user_id)])
+    assert _logged(user_id) == 2
+    [dead] = _lines(tmp_path / 'dead_letter.jsonl')
+    assert dead['user_id'] == user_id and 'NOT NULL' in dead['error']
+    assert writer.stats()['dead_lettered'] == 1
+
+
+def test_replay_dead_letters_bad_lines_and_keeps_the_rest(writer, user, tmp_path):
+    user_id = user[0]
+    writer._spool([_record(user_id)])
+    with open(tmp_path / 'spool.jsonl', 'a') as handle:
+        handle.write('{"truncated": \n')
+    writer._spool([dict(_record(user_id), result=None), _record(user_id)])
+
+    assert writer._replay_spool() == 2
+    assert _lines(tmp_path / 'spool.jsonl') == []
+    dead = _lines(tmp_path / 'dead_letter.jsonl')
+    assert [('line' in entry, 'error' in entry) for entry in dead] == [(True, True), (False, True)]
+    assert _logged(user_id) == 2
@@ -0,0 +1,66 @@
+# tests/test_mimic.py (Style-Conditioned Move Selection)
+import random
+import chess
+import numpy as np
+from app import mimic
+
+MIDDLEGAME = 'r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/3P1N2/PPP2PPP/RNBQK2R w KQkq - 1 5'
+TACTICAL = 'r3k2r/ppp2ppp/2n5/3qp3/1b1P4/2N2N2/PPP1QPPP/R3K2R w KQkq - 0 10'
+
+
+def _style(aggression=0.2, avg_rank_percent=0.3, pieces=None, moves=200):
+    return {'aggression': aggression, 'avg_rank_percent': avg_rank_percent,
+            'piece_preference': pieces or {'P': 10, 'N': 10, 'B': 10, 'R': 10, 'Q': 10, 'K': 10},
+            'moves_analyzed': moves}
+
+
+def test_aggressive_column_matches_python_chess():
+    rng = random.Random(5)
+    for _ in range(30):
+        board = chess.Board()
+        while not board.is_game_over() and len(board.move_stack) < 80:
+            moves, features = mimic.move_features(board)
+            for move, row in zip(moves, features):
+                assert bool(row[mimic._AGGRESSIVE]) == (board.is_capture(move) or board.gives_check(move)), \
+                    (board.fen(), move)
+            board.push(rng.choice(moves))
+
+
+def test_best_move_is_ranked_first_with_no_loss():
+    board = chess.Board(MIDDLEGAME)
+    best = chess.Move.from_uci('h2h3')  # a quiet move the static ranking would not put first
+    moves, features = mimic.move_features(board, best)
+    row = features[moves.index(best)]
+    assert row[mimic._RANK] == 1.0 / len(moves)
+    assert row[mimic._LOSS] == 0.0
+    assert sorted(np.rint(features[:, mimic._RANK] * len(moves))) == list(range(1, len(moves) + 1))
+
+
+def test_aggressive_profiles_favour_captures_and_checks():
+    board = chess.Board(TACTICAL)
+    moves, features = mimic.move_features(board)
+    aggressive = features[:, mimic._AGGRESSIVE] == 1
+    share = lambda style: mimic.move_probabilities(features, mimic.style_weights(style))[aggressive].sum()
+    assert share(_style(aggression=0.6)) > share(_style(aggression=0.05))
+    probs = mimic.move_probabilities(features, mimic.style_weights(_style()))
+    assert np.isclose(probs.sum(), 1.0) and (probs > 0).all()
+
+
+def test_choose_move_samples_legal_moves_reproducibly():
+    board = chess.Board(MIDDLEGAME)
+    picks = [mimic.choose_move(board, _style(), 'e1g1', rng=random.Random(seed)) for seed in range(40)]
+    assert all(chess.Move.from_uci(uci) in board.legal_moves for uci in picks)
+    assert len(set(picks)) > 1
+    assert picks == [mimic.choose_move(board, _style(), 'e1g1', rng=random.Random(seed)) for seed in range(40)]
+    # A sharper temperature concentrates on the profile's favourite moves.
+    sharp = {mimic.choose_move(board, _style(), 'e1g1', temperature=0.05, rng=random.Random(seed))
+             for seed in range(40)}
+    assert len(sharp) < len(set(picks))
+
+
+def test_falls_back_to_the_best_move():
+    board = chess.Board(MIDDLEGAME)
+    assert mimic.choose_move(board, _style(moves=mimic.MIMIC_MIN_MOVES - 1), 'e1g1') == 'e1g1'
+    assert mimic.choose_move(board, {}, 'e1g1') == 'e1g1'
+    stalemate = chess.Board('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+    assert mimic.choose_move(stalemate, _style(), None) is None
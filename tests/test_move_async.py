@@ -0,0 +1,126 @@
+# tests/test_move_async.py (Async Move API: Back-Pressure and Failed Replies)
+import threading
+import time
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import routes
+from app.jobs import QueueFull, move_jobs
+
+
+def _first_legal(game_id, state, user_id=None, use_mimic=False):
+    return next(iter(state.board.legal_moves)).uci()
+
+
+def _move(client, uci):
+    return client.post('/move/async', json={'move': uci, 'mode': 'best'})
+
+
+def _wait(client, poll_url, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(poll_url).get_json()
+        if data['status'] != 'pending':
+            return data
+        time.sleep(0.01)
+    raise AssertionError(f"job still pending: {poll_url}")
+
+
+@pytest.fixture
+def ai(monkeypatch):
+    """Replaces the AI with 'first legal move'; set `fail` to make the next replies raise."""
+    class Fake:
+        fail = 0
+        gate = None
+
+        def __call__(self, *args, **kwargs):
+            if self.gate is not None:
+                self.gate.wait(10)
+            if self.fail:
+                self.fail -= 1
+                raise OperationalError('UPDATE game_session', {}, Exception('database is locked'))
+            return _first_legal(*args, **kwargs)
+
+    fake = Fake()
+    monkeypatch.setattr(routes, '_choose_ai_move', fake)
+    return fake
+
+
+def test_reply_is_delivered(client, ai):
+    response = _move(client, 'e2e4')
+    assert response.status_code == 202
+    data = _wait(client, response.get_json()['poll_url'])
+    assert data['status'] == 'done' and data['ai_move']
+    assert _move(client, 'd2d4').status_code == 202
+
+
+def test_moves_are_refused_while_the_reply_is_owed(client, ai):
+    ai.gate = threading.Event()
+    response = _move(client, 'e2e4')
+    assert response.status_code == 202
+    try:
+        assert _move(client, 'd2d4').status_code == 409
+        assert client.post('/move', json={'move': 'd2d4'}).status_code == 409
+    finally:
+        ai.gate.set()
+    assert _wait(client, response.get_json()['poll_url'])['status'] == 'done'
+
+
+def test_full_queue_answers_429_and_leaves_the_game(client, ai):
+    reserved = 0
+    try:
+        while True:
+            move_jobs.reserve()
+            reserved += 1
+    except QueueFull:
+        pass
+    try:
+        response = _move(client, 'e2e4')
+        assert response.status_code == 429
+        assert response.headers['Retry-After']
+    finally:
+        for _ in range(reserved):
+            move_jobs.release()
+    response = _move(client, 'e2e4')  # still White's first move
+    assert response.status_code == 202
+    _wait(client, response.get_json()['poll_url'])
+
+
+def test_failed_reply_can_be_requeued(client, ai):
+    ai.fail = 1
+    response = _move(client, 'e2e4')
+    assert response.status_code == 202
+    data = _wait(client, response.get_json()['poll_url'])
+    assert data['status'] == 'error'
+    assert _move(client, 'd2d4').status_code == 409  # Black still owes a reply
+
+    retry = client.post('/move/async', json={'mode': 'best'})
+    assert retry.status_code == 202
+    data = _wait(client, retry.get_json()['poll_url'])
+    assert data['status'] == 'done' and data['ai_move']
+
+    assert client.post('/move/async', json={'mode': 'best'}).status_code == 409  # nothing left to retry
+    response = _move(client, 'd2d4')
+    assert response.status_code == 202
+    assert _wait(client, response.get_json()['poll_url'])['status'] == 'done'
+
+
+def test_reply_lost_on_another_worker_times_out_and_can_be_requeued(client, ai, monkeypatch):
+    ai.gate = threading.Event()
+    response = _move(client, 'e2e4')
+    job_id = response.get_json()['job_id']
+    # Another worker's job: not in this process's registry and the row is past the timeout.
+    with pytest.MonkeyPatch.context() as other_worker:
+        other_worker.setattr(routes, 'AI_REPLY_TIMEOUT_SECONDS', -1)
+        other_worker.setattr(move_jobs, 'get', lambda job_id: None)
+        other_worker.setattr(move_jobs, 'pending_for', lambda prefix: False)
+        assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'error'
+        retry = client.post('/move/async', json={'mode': 'best'})
+        assert retry.status_code == 202
+    ai.gate.set()
+    # Both replies race for the same ply; whichever loses reports the winner's move.
+    first, second = _wait(client, f"/jobs/{job_id}"), _wait(client, retry.get_json()['poll_url'])
+    assert first['status'] == second['status'] == 'done'
+    assert first['ai_move'] == second['ai_move']
+    response = _move(client, 'd2d4')
+    assert response.status_code == 202
+    assert _wait(client, response.get_json()['poll_url'])['status'] == 'done'
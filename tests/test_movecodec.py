@@ -0,0 +1,63 @@
+# tests/test_movecodec.py (Packed Move and Annotation Round Trips)
+import random
+import chess
+from app import movecodec
+
+PROMOTION_FEN = '1n5k/P7/8/8/8/8/8/K7 w - - 0 1'
+
+
+def _random_game(seed, fen=chess.STARTING_FEN, plies=120):
+    rng = random.Random(seed)
+    board = chess.Board(fen)
+    while len(board.move_stack) < plies and not board.is_game_over():
+        board.push(rng.choice(list(board.legal_moves)))
+    return board
+
+
+def test_every_square_and_promotion_round_trips():
+    for from_square in chess.SQUARES:
+        for to_square in chess.SQUARES:
+            for promotion in (None, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+                move = chess.Move(from_square, to_square, promotion)
+                code = movecodec.pack_move(move)
+                assert 0 <= code < 1 << 16
+                assert movecodec.unpack_move(code) == move
+
+
+def test_games_round_trip_through_bytes():
+    for seed, fen in ((1, chess.STARTING_FEN), (2, chess.STARTING_FEN), (3, PROMOTION_FEN)):
+        board = _random_game(seed, fen)
+        blob = movecodec.encode_moves(board.move_stack)
+        assert len(blob) == 2 * len(board.move_stack)
+        assert movecodec.decode_moves(blob) == board.move_stack
+        assert movecodec.replay(fen, blob).fen() == board.fen()
+
+
+def test_empty_blob_decodes_to_no_moves():
+    assert movecodec.decode_moves(b'') == []
+    assert movecodec.decode_moves(None) == []
+
+
+def test_history_round_trips_with_annotations():
+    board = chess.Board()
+    history = []
+    for i, san in enumerate(['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6', 'Bxc6', 'dxc6']):
+        move = board.parse_san(san)
+        entry = {'turn': board.fullmove_number, 'move_san': san}
+        if i % 2 == 0:  # the player's moves carry the engine rank
+            entry.update({'move_rank': i + 1, 'total_options': 20 + i, 'is_capture': board.is_capture(move),
+                          'is_check': board.gives_check(move),
+                          'piece': board.piece_at(move.from_square).symbol()})
+        history.append(entry)
+        board.push(move)
+
+    moves_blob, annotations_blob = movecodec.packed_from_history(history)
+    assert len(annotations_blob) == movecodec.ANNOTATION_SIZE * len(history)
+    assert movecodec.history_from_packed(None, moves_blob, annotations_blob) == history
+
+
+def test_history_stops_at_first_unparsable_move():
+    history = [{'move_san': 'e4'}, {'move_san': 'e5'}, {'move_san': 'Ke3'}, {'move_san': 'Nf3'}]
+    moves_blob, annotations_blob = movecodec.packed_from_history(history)
+    assert [move.uci() for move in movecodec.decode_moves(moves_blob)] == ['e2e4', 'e7e5']
+    assert annotations_blob == b''
@@ -0,0 +1,35 @@
+# tests/test_tournament.py (Saved Tournament Games Stay Out of Profiles and the Book)
+from app import analysis, db
+from app.models import GameLog, User, TOURNAMENT_USERNAME, tournament_user, without_tournament_games
+
+
+def test_saved_games_belong_to_the_tournament_account(app, user, tmp_path):
+    with app.app_context():
+        db.session.add(GameLog(user_id=user[0], result='*', moves_json='', moves_blob=b''))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['tournament', 'random', 'random', '--games', '2',
+                                                '--workers', '1', '--max-plies', '6', '--save'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        bot = tournament_user()
+        assert bot is not None and not bot.check_password('')
+        assert GameLog.query.filter_by(user_id=bot.id).count() == 2
+        people = without_tournament_games(GameLog.query).all()
+        assert people and all(game.user_id != bot.id for game in people)
+        owners = {owner for chunk in analysis._stream_game_chunks() for _, owner, _, _ in chunk}
+        assert bot.id not in owners and user[0] in owners
+
+        book = tmp_path / 'book.bin'
+        result = app.test_cli_runner().invoke(args=['build-book', '--output', str(book)])
+        assert result.exit_code == 0, result.output
+        assert f"from {len(people)} game(s)" in result.output
+
+
+def test_the_tournament_name_cannot_be_registered(app):
+    client = app.test_client()
+    client.post('/register', data={'username': TOURNAMENT_USERNAME, 'password': 'x'})
+    with app.app_context():
+        assert User.query.filter_by(username=TOURNAMENT_USERNAME).count() <= 1
+        user = User.query.filter_by(username=TOURNAMENT_USERNAME).first()
+        assert user is None or not user.check_password('x')